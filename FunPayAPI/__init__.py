@@ -2,7 +2,19 @@ from . import utils
 from .types import *
 from .account import *
 from .runner import *
+from .state import *
 from .users import *
 from .exceptions import *
+import importlib
+
+# Асинхронный клиент (aiohttp) импортируется при первом обращении: синхронному боту он не нужен,
+# а импорт aiohttp заметно замедляет запуск.
+__ASYNC_NAMES = {"AsyncResponse": "async_account", "AsyncAccount": "async_account", "AsyncRunner": "async_runner"}
+
+
+def __getattr__(name: str):
+    if name in __ASYNC_NAMES:
+        return getattr(importlib.import_module(f".{__ASYNC_NAMES[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 logger = logging.getLogger("FunPayAPI")
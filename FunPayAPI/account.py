@@ -1,4 +1,5 @@
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from typing import Callable
 import requests
 import json
 import time
@@ -7,6 +8,8 @@ import logging
 from . import types
 from . import exceptions
 from . import utils
+from . import parsers
+from . import state
 
 
 logger = logging.getLogger("FunPayAPI.account")
@@ -17,7 +20,8 @@ class Account:
     Класс для работы с аккаунтом FunPay.
     """
     def __init__(self, golden_key: str, user_agent: str = "", timeout: float | int = 10.0,
-                 proxy: dict | None = None):
+                 proxy: dict | None = None, pool_connections: int = 4, pool_maxsize: int = 16,
+                 chats_index_size: int = 1000):
         """
         :param golden_key: токен аккаунта.
 
@@ -26,6 +30,13 @@ class Account:
         :param timeout: тайм-аут ожидания ответа на запросы.
 
         :param proxy: HTTP/S прокси.
+
+        :param pool_connections: кол-во пулов соединений (по одному на хост).
+
+        :param pool_maxsize: максимальное кол-во keep-alive соединений в одном пуле.
+
+        :param chats_index_size: максимальное кол-во чатов в индексе self.chats_by_username (давно не обновлявшиеся
+        чаты удаляются первыми).
         """
         self.golden_key: str = golden_key
         self.user_agent = user_agent
@@ -45,8 +56,85 @@ class Account:
         self.last_update: int | None = None
 
         self.saved_html_chats: str | None = None
+        # {никнейм собеседника: node_id чата}. Обновляется Runner'ом при каждом изменении списка чатов.
+        self.chats_by_username: state.StateStore = state.StateStore(chats_index_size)
         self.proxy = proxy if proxy is not None else {}
 
+        # Общая сессия для всех запросов аккаунта (и Runner'а): keep-alive + пул соединений,
+        # чтобы каждый запрос не проходил заново TCP + TLS рукопожатие.
+        self.session: requests.Session | None = self.make_session(pool_connections, pool_maxsize)
+
+        # Функция, вызываемая после каждого запроса: (HTTP метод, ссылка, статус-код или None при ошибке,
+        # длительность в секундах). Используется для сбора метрик.
+        self.request_hook: Callable[[str, str, int | None, float], None] | None = None
+
+    def make_session(self, pool_connections: int, pool_maxsize: int) -> requests.Session | None:
+        """
+        Создает общую сессию аккаунта.
+
+        :param pool_connections: кол-во пулов соединений (по одному на хост).
+
+        :param pool_maxsize: максимальное кол-во keep-alive соединений в одном пуле.
+
+        :return: сессия requests.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.proxies.update(self.proxy)
+        if self.user_agent:
+            session.headers["user-agent"] = self.user_agent
+        return session
+
+    def method(self, request_method: str, url: str, headers: dict, payload: dict | None = None,
+               timeout: float | int | None = None) -> requests.Response:
+        """
+        Отправляет запрос к FunPay через общую сессию аккаунта.
+
+        :param request_method: HTTP метод ("get" / "post").
+
+        :param url: ссылка.
+
+        :param headers: заголовки запроса (объединяются с заголовками сессии).
+
+        :param payload: данные запроса (form-data).
+
+        :param timeout: тайм-аут ожидания ответа. Если None - используется self.timeout.
+
+        :return: ответ FunPay.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        try:
+            response = self.session.request(request_method, url, headers=headers, data=payload, timeout=timeout,
+                                            proxies=self.proxy)
+        except:
+            self.on_request(request_method, url, None, time.monotonic() - start)
+            raise
+        self.on_request(request_method, url, response.status_code, time.monotonic() - start)
+        return response
+
+    def on_request(self, request_method: str, url: str, status: int | None, duration: float) -> None:
+        """
+        Передает данные о выполненном запросе в self.request_hook (если он установлен).
+
+        :param request_method: HTTP метод.
+
+        :param url: ссылка.
+
+        :param status: статус-код ответа или None, если запрос завершился ошибкой.
+
+        :param duration: длительность запроса в секундах.
+        """
+        if self.request_hook is None:
+            return
+        try:
+            self.request_hook(request_method, url, status, duration)
+        except:
+            logger.debug("Произошла ошибка в request_hook.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+
     def get(self, update_session_id: bool = False):
         """
         Получает / обновляет данные об аккаунте.
@@ -60,48 +148,41 @@ class Account:
         if self.session_id and not update_session_id:
             headers["cookie"] += f"; PHPSESSID={self.session_id}"
 
-        response = requests.get(types.Links.BASE_URL, headers=headers, timeout=self.timeout,
-                                proxies=self.proxy)
+        response = self.method("get", types.Links.BASE_URL, headers)
         logger.debug(f"Статус-код получения данных об аккаунте: {response.status_code}.")
         if response.status_code != 200:
             raise exceptions.StatusCodeIsNot200(response.status_code)
 
         html_response = response.content.decode()
         # logger.debug(f"HTML аккаунта: {html_response}")
-        soup = BeautifulSoup(html_response, "html.parser")
-
-        username = soup.find("div", {"class": "user-link-name"})
-        if username is None:
-            raise exceptions.AccountDataNotfound()
+        self.update_from_html(html_response, response.cookies.get_dict(), update_session_id)
+        return self
 
-        username = username.text
-        app_data = json.loads(soup.find("body")["data-app-data"])
-        userid = app_data["userId"]
-        csrf_token = app_data["csrf-token"]
+    def update_from_html(self, html_response: str, cookies: dict, update_session_id: bool = False) -> None:
+        """
+        Обновляет данные аккаунта по HTML главной страницы FunPay и полученным cookie.
+        Используется как Account.get(), так и AsyncAccount.get().
 
-        active_orders = soup.find("span", {"class": "badge badge-trade"})
-        active_orders = int(active_orders.text) if active_orders else 0
+        :param html_response: HTML главной страницы.
 
-        balance_badge = soup.find("span", {"class": "badge badge-balance"})
-        balance = float(balance_badge.text.split(" ")[0]) if balance_badge else 0
-        currency = balance_badge.text.split(" ")[1] if balance_badge else ""
+        :param cookies: cookie ответа.
 
-        cookies = response.cookies.get_dict()
+        :param update_session_id: обновить self.session_id или использовать старый.
+        """
+        data = parsers.parse_account_page(html_response)
         if (update_session_id and self.session_id) or not self.session_id:
-            session_id = cookies["PHPSESSID"]
-            self.session_id = session_id
+            self.session_id = cookies["PHPSESSID"]
 
         self.html = html_response
-        self.app_data = app_data
-        self.id = userid
-        self.username = username
-        self.balance = balance
-        self.currency = currency
-        self.active_orders = active_orders
-        self.csrf_token = csrf_token
+        self.app_data = data["app_data"]
+        self.id = data["id"]
+        self.username = data["username"]
+        self.balance = data["balance"]
+        self.currency = data["currency"]
+        self.active_orders = data["active_orders"]
+        self.csrf_token = data["csrf_token"]
         self.last_update = int(time.time())
         self.__authorized = True
-        return self
 
     def get_orders(self, include_outstanding: bool = True,
                    include_completed: bool = False,
@@ -120,64 +201,35 @@ class Account:
 
         :return: Список с заказами.
         """
+        html_response = self.get_orders_html()
+        orders_list = parsers.parse_orders(html_response, include_outstanding, include_completed, include_refund,
+                                           exclude)
+        orders_log = "".join(f"{i.id} | {i.price} | {i.buyer_username} | {i.status} | {i.title}" for i in orders_list)
+        logger.debug(f"Список полученных заказов: {orders_log}")
+        return orders_list
+
+    def get_orders_html(self) -> str:
+        """
+        Получает HTML страницы продаж (https://funpay.com/orders/trade) и проверяет, авторизован ли аккаунт.
+
+        :return: HTML страницы продаж.
+        """
         if not self.is_authorized():
             raise exceptions.NotAuthorized()
 
-        exclude = [] if not exclude else exclude
         headers = {"cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id};",
                    "user-agent": self.user_agent}
 
-        response = requests.get(types.Links.ORDERS, headers=headers, timeout=self.timeout,
-                                proxies=self.proxy)
+        response = self.method("get", types.Links.ORDERS, headers)
         logger.debug(f"Статус-код получения ордеров: {response.status_code}.")
         if response.status_code != 200:
             raise exceptions.StatusCodeIsNot200(response.status_code)
 
         html_response = response.content.decode()
         # logger.debug(f"Ответ от FunPay (информация об ордерах): {html_response}")
-        soup = BeautifulSoup(html_response, "html.parser")
-
-        check_user = soup.find("div", {"class": "user-link-name"})
-        if check_user is None:
+        if parsers.find_element(html_response, "div", "user-link-name") is None:
             raise exceptions.AccountDataNotfound()
-
-        order_divs = soup.find_all("a", {"class": "tc-item"})
-        if order_divs is None:
-            return []
-        orders_list = []
-
-        for div in order_divs:
-            classname = div.get("class")
-            if "warning" in classname:
-                if not include_refund:
-                    continue
-                status = types.OrderStatuses.REFUND
-            elif "info" in classname:
-                if not include_outstanding:
-                    continue
-                status = types.OrderStatuses.OUTSTANDING
-            else:
-                if not include_completed:
-                    continue
-                status = types.OrderStatuses.COMPLETED
-
-            order_id = div.find("div", {"class": "tc-order"}).text
-            if order_id in exclude:
-                continue
-
-            title = div.find("div", {"class": "order-desc"}).find("div").text
-            price = float(div.find("div", {"class": "tc-price"}).text.split(" ")[0])
-
-            buyer_div = div.find("div", {"class": "media-user-name"}).find("span")
-            buyer_username = buyer_div.text
-            buyer_id = int(buyer_div.get("data-href")[:-1].split("https://funpay.com/users/")[1])
-
-            order = types.Order(html=str(div), id_=order_id, title=title, price=price, buyer_username=buyer_username,
-                                buyer_id=buyer_id, status=status)
-            orders_list.append(order)
-        orders_log = "".join(f"{i.id} | {i.price} | {i.buyer_username} | {i.status} | {i.title}" for i in orders_list)
-        logger.debug(f"Список полученных заказов: {orders_log}")
-        return orders_list
+        return html_response
 
     def send_message(self, message_obj: types.Message) -> dict:
         """
@@ -193,8 +245,8 @@ class Account:
             "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
             "x-requested-with": "XMLHttpRequest",
             "user-agent": self.user_agent,
-            "referer": f"https://funpay.com/chat/?node={message_obj.node_id}",
-            "origin": f"https://funpay.com"
+            "referer": f"{types.Links.CHAT}?node={message_obj.node_id}",
+            "origin": types.Links.BASE_URL
         }
         request = {
             "action": "chat_message",
@@ -219,14 +271,25 @@ class Account:
             "request": json.dumps(request),
             "csrf_token": self.csrf_token
         }
-        response = requests.post(types.Links.RUNNER, headers=headers, data=payload, timeout=self.timeout,
-                                 proxies=self.proxy)
+        response = self.method("post", types.Links.RUNNER, headers, payload)
         logger.debug(f"Статус-код отправления сообщения: {response.status_code}.")
         if response.status_code != 200:
-            raise exceptions.StatusCodeIsNot200(response.status_code)
+            raise exceptions.StatusCodeIsNot200(response.status_code,
+                                                utils.parse_retry_after(response.headers.get("Retry-After")))
 
         json_response = response.json()
-        logger.debug(f"Ответ от FunPay (отправление сообщения): {json_response}")
+        logger.debug("Ответ от FunPay (отправление сообщения): %s", utils.LogPayload(json_response))
+        return self.check_message_response(json_response)
+
+    @staticmethod
+    def check_message_response(json_response: dict) -> dict:
+        """
+        Проверяет ответ FunPay на отправку сообщения.
+
+        :param json_response: ответ FunPay.
+
+        :return: ответ FunPay, если сообщение доставлено, иначе райзит MessageNotDelivered.
+        """
         if json_response.get("response"):
             if json_response.get("response").get("error") is not None:
                 raise exceptions.MessageNotDelivered(json_response)
@@ -234,24 +297,129 @@ class Account:
         else:
             raise exceptions.MessageNotDelivered(json_response)
 
+    def get_chats_histories(self, chats: dict[int, int | None]) -> dict[int, list[types.Message]]:
+        """
+        Получает новые сообщения нескольких чатов одним запросом к runner'у (объекты chat_node).
+
+        :param chats: {ID чата: ID последнего известного сообщения (None - получить последние сообщения чата)}.
+
+        :return: {ID чата: список новых сообщений от старых к новым}. Чаты, по которым FunPay не вернул данные,
+        в словарь не попадают.
+        """
+        headers, payload = self.make_chat_nodes_data(chats)
+        response = self.method("post", types.Links.RUNNER, headers, payload)
+        logger.debug(f"Статус-код получения истории чатов: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code,
+                                                utils.parse_retry_after(response.headers.get("Retry-After")))
+
+        json_response = response.json()
+        logger.debug("Ответ от FunPay (история чатов): %s", utils.LogPayload(json_response))
+        return self.parse_chat_nodes(json_response, chats)
+
+    def get_chat_history(self, node_id: int, since_id: int | None = None) -> list[types.Message]:
+        """
+        Получает новые сообщения чата.
+
+        :param node_id: ID чата.
+
+        :param since_id: ID последнего известного сообщения (None - получить последние сообщения чата).
+
+        :return: список сообщений с ID больше since_id от старых к новым.
+        """
+        return self.get_chats_histories({node_id: since_id}).get(node_id, [])
+
+    def make_chat_nodes_data(self, chats: dict[int, int | None]) -> tuple[dict, dict]:
+        """
+        Формирует заголовки и тело запроса к runner'у за историей чатов.
+
+        :param chats: {ID чата: ID последнего известного сообщения или None}.
+
+        :return: (заголовки, тело запроса).
+        """
+        headers = {
+            "accept": "*/*",
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest",
+            "user-agent": self.user_agent
+        }
+        objects = [
+            {"type": "chat_node",
+             "id": node_id,
+             "tag": "00000000",
+             "data": {
+                 "node": node_id,
+                 "last_message": since_id if since_id is not None else -1,
+                 "content": ""}
+             }
+            for node_id, since_id in chats.items()
+        ]
+        payload = {
+            "objects": json.dumps(objects),
+            "request": False,
+            "csrf_token": self.csrf_token
+        }
+        return headers, payload
+
+    @staticmethod
+    def parse_chat_nodes(json_response: dict, chats: dict[int, int | None]) -> dict[int, list[types.Message]]:
+        """
+        Парсит объекты chat_node из ответа runner'а.
+
+        :param json_response: ответ FunPay.
+
+        :param chats: {ID чата: ID последнего известного сообщения или None} (из запроса).
+
+        :return: {ID чата: список новых сообщений от старых к новым}.
+        """
+        result = {}
+        for obj in json_response.get("objects", []):
+            if obj.get("type") != "chat_node" or not obj.get("data"):
+                continue
+            node_id = int(obj.get("id"))
+            if node_id not in chats:
+                continue
+            result[node_id] = parsers.parse_chat_messages(obj["data"].get("messages") or [], node_id,
+                                                          chats[node_id])
+        return result
+
     def get_node_id_by_username(self, username: str, force_request: bool = False) -> int | None:
         """
-        Парсит self.chats_html и ищет node_id чата по username'у.
-        todo: Если self.chats_html is None -> делает запрос к FunPay.
+        Ищет node_id чата по username'у в индексе чатов (self.chats_by_username).
+        Запрос к FunPay отправляется только при force_request=True: метод вызывается из хэндлеров, и промах индекса
+        (например, у покупателя еще нет чата) не должен блокировать их запросом списка чатов.
 
         :param username: никнейм пользователя (искомого чата).
 
-        :param force_request: todo: пропустить ли поиск в self.chats_html и отправить ли сразу запрос к FunPay.
+        :param force_request: загрузить ли список чатов с FunPay (и обновить индекс) перед поиском.
 
         :return: node_id чата или None, если чат не найден.
         """
-        if not force_request and self.saved_html_chats is not None:
-            parser = BeautifulSoup(self.saved_html_chats, "html.parser")
-            user_box = parser.find("div", {"class": "media-user-name"}, text=username)
-            if user_box is not None:
-                node_id = user_box.parent["data-id"]
-                return int(node_id)
-        return None
+        if not force_request:
+            return self.chats_by_username.get(username)
+        try:
+            self.update_chats(self.get_chats_html())
+        except:
+            logger.error(f"Не удалось загрузить список чатов для поиска чата с пользователем {username}.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+        return self.chats_by_username.get(username)
+
+    def get_chats_html(self) -> str:
+        """
+        Загружает страницу чатов FunPay.
+
+        :return: HTML страницы чатов.
+        """
+        headers = {
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "user-agent": self.user_agent
+        }
+        response = self.method("get", types.Links.CHAT, headers)
+        logger.debug(f"Статус-код получения списка чатов: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+        return response.content.decode()
 
     def get_category_game_id(self, category: types.Category) -> int:
         """
@@ -268,8 +436,7 @@ class Account:
 
         headers = {"cookie": f"golden_key={self.golden_key}",
                    "user-agent": self.user_agent}
-        response = requests.get(link, headers=headers, timeout=self.timeout,
-                                proxies=self.proxy)
+        response = self.method("get", link, headers)
         logger.debug(f"Статус-код получения ордеров: {response.status_code}.")
         if response.status_code == 404:
             raise Exception("Категория не найдена.")  # todo: создать кастомное исключение: категория не найдена.
@@ -278,17 +445,7 @@ class Account:
 
         html_response = response.content.decode()
         # logger.debug(f"Ответ от FunPay (запрос game_id категории): {html_response}")
-        parser = BeautifulSoup(html_response, "html.parser")
-
-        if parser.find("div", {"class": "user-link-name"}) is None:
-            raise exceptions.AccountDataNotfound()
-
-        if category.type == types.CategoryTypes.LOT:
-            game_id = int(parser.find("div", {"class": "col-sm-6"}).find("button")["data-game"])
-        else:
-            game_id = int(parser.find("input", {"name": "game"})["value"])
-
-        return game_id
+        return parsers.parse_category_game_id(html_response, category.type)
 
     def get_lot_info(self, lot_id: int, game_id: int) -> dict[str, str]:
         """
@@ -315,40 +472,13 @@ class Account:
         }
         query = f"?tag={tag}&offer={lot_id}&node={game_id}"
 
-        response = requests.get(f"{types.Links.BASE_URL}/lots/offerEdit{query}", headers=headers, data=payload,
-                                proxies=self.proxy)
+        response = self.method("get", f"{types.Links.BASE_URL}/lots/offerEdit{query}", headers, payload)
         logger.debug(f"Статус-код получения данных о лоте: {response.status_code}")
         if not response.status_code == 200:
             raise exceptions.StatusCodeIsNot200(response.status_code)
         json_response = response.json()
         # logger.debug(f"Ответ от FunPay (получение данных о лоте): {json_response}")
-        parser = BeautifulSoup(json_response["html"], "html.parser")
-
-        input_fields = parser.find_all("input")
-        text_fields = parser.find_all("textarea")
-        selection_fields = parser.find_all("select")
-        result = {}
-
-        for field in input_fields:
-            name = field["name"]
-            value = field.get("value")
-            if value is None:
-                value = ""
-            result[name] = value
-
-        for field in text_fields:
-            name = field["name"]
-            value = field.text
-            if not value:
-                value = ""
-            result[name] = value
-
-        for field in selection_fields:
-            name = field["name"]
-            value = field.find("option", selected=True)["value"]
-            result[name] = value
-
-        return result
+        return parsers.parse_lot_fields(json_response["html"])
 
     def save_lot(self, lot_info: dict[str, str], active: bool = True) -> dict:
         """
@@ -374,8 +504,7 @@ class Account:
             "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
             "user-agent": self.user_agent
         }
-        response = requests.post(f"{types.Links.BASE_URL}/lots/offerSave", headers=headers, data=lot_info,
-                                 proxies=self.proxy)
+        response = self.method("post", f"{types.Links.BASE_URL}/lots/offerSave", headers, lot_info)
         logger.debug(f"Статус-код изменения состояния лота: {response.status_code}.")
         if response.status_code != 200:
             raise exceptions.StatusCodeIsNot200(response.status_code)
@@ -409,13 +538,12 @@ class Account:
             "node_id": category.id
         }
 
-        response = requests.post(types.Links.RAISE, headers=headers, data=payload, timeout=self.timeout,
-                                 proxies=self.proxy)
+        response = self.method("post", types.Links.RAISE, headers, payload)
         logger.debug(f"Статус-код получения данных для поднятия лотов: {response.status_code}.")
         if response.status_code != 200:
             raise exceptions.StatusCodeIsNot200(response.status_code)
         json_response = response.json()
-        logger.debug(f"Ответ от FunPay (запрос modal-формы поднятия лотов): {json_response}")
+        logger.debug("Ответ от FunPay (запрос modal-формы поднятия лотов): %s", utils.LogPayload(json_response))
         return json_response
 
     def raise_game_categories(self, category: types.Category, exclude: list[int] | None = None) -> types.RaiseResponse:
@@ -430,29 +558,14 @@ class Account:
         :return: ответ FunPay.
         """
         check = self.request_lots_raise(category)
-        if check.get("error") and check.get("msg") and "Подождите" in check.get("msg"):
-            wait_time = utils.get_wait_time_from_raise_response(check.get("msg"))
-            return types.RaiseResponse(False, wait_time, [], [], check)
-        elif check.get("error"):
-            # Если вернулся ответ с ошибкой и это не "Подождите n времени" - значит творится какая-то дичь.
-            return types.RaiseResponse(False, 10, [], [], check)
-        elif check.get("error") is not None and not check.get("error"):
-            # Если была всего 1 категория и FunPay ее поднял без отправки modal-окна
-            return types.RaiseResponse(True, 3600, [category.title], [category.id], check)
+        result = parsers.parse_raise_check(check, category)
+        if result is not None:
+            return result
         elif check.get("modal"):
             # Если же появилась модалка,
             # то парсим все чекбоксы и отправляем запрос на поднятие всех категорий, кроме тех,
             # которые в exclude.
-            parser = BeautifulSoup(check.get("modal"), "html.parser")
-            category_ids = []
-            category_names = []
-            checkboxes = parser.find_all("div", {"class": "checkbox"})
-            for cb in checkboxes:
-                category_id = int(cb.find("input")["value"])
-                if exclude is None or category_id not in exclude:
-                    category_ids.append(category_id)
-                    category_name = cb.find("label").text
-                    category_names.append(category_name)
+            category_ids, category_names = parsers.parse_raise_modal(check.get("modal"), exclude)
 
             headers = {
                 "accept": "*/*",
@@ -466,13 +579,12 @@ class Account:
                 "node_id": category.id,
                 "node_ids[]": category_ids
             }
-            response = requests.post(types.Links.RAISE, headers=headers, data=payload, timeout=self.timeout,
-                                     proxies=self.proxy)
+            response = self.method("post", types.Links.RAISE, headers, payload)
             logger.debug(f"Статус-код поднятия лотов: {response.status_code}.")
             if not response.status_code == 200:
                 raise exceptions.StatusCodeIsNot200(response.status_code)
             json_response = response.json()
-            logger.debug(f"Ответ FunPay (поднятие категорий): {json_response}.")
+            logger.debug("Ответ FunPay (поднятие категорий): %s.", utils.LogPayload(json_response))
             if not json_response.get("error"):
                 return types.RaiseResponse(True, 3600, category_names, category_ids, json_response)
             else:
@@ -497,8 +609,7 @@ class Account:
             "id": order_id,
             "csrf_token": self.csrf_token
         }
-        response = requests.post(types.Links.REFUND, headers=headers, data=payload, timeout=self.timeout,
-                                 proxies=self.proxy)
+        response = self.method("post", types.Links.REFUND, headers, payload)
         if response.json().get("error"):
             logger.debug(response.json().get("msg"))
             raise Exception(response.json().get("msg"))
@@ -520,8 +631,7 @@ class Account:
             "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
             "user-agent": self.user_agent
         }
-        response = requests.get(f"{types.Links.USER}/{user_id}/",
-                                headers=headers, proxies=self.proxy, timeout=self.timeout)
+        response = self.method("get", f"{types.Links.USER}/{user_id}/", headers)
 
         logger.debug(f"Статус-код получения страницы пользователя {user_id}: {response.status_code}.")
 
@@ -532,55 +642,25 @@ class Account:
             raise exceptions.StatusCodeIsNot200(response.status_code)
 
         html_response = response.content.decode()
-        logger.debug(html_response)
-        parser = BeautifulSoup(html_response, "html.parser")
-        categories = []
-        lots = []
-
-        # Если категорий не найдено - возвращаем пустые списки
-        category_divs = parser.find_all("div", {"class": "offer-list-title-container"})
-        if category_divs is None:
-            return types.UserInfo([], [])
-
-        # Парсим категории
-        for div in category_divs:
-            info_div = div.find("div", {"class": "offer-list-title"})
-            category_link = info_div.find("a")
-            public_link = category_link["href"]
-            if "chips" in public_link:
-                # 'chips' в ссылке означает, что данная категория - игровая валюта.
-                # Например: https://funpay.com/chips/125/ - Серебро Black Desert Mobile.
-                if not include_currency:
-                    continue
-                category_type = types.CategoryTypes.CURRENCY
-            else:
-                category_type = types.CategoryTypes.LOT
-
-            edit_lots_link = public_link + "trade"
-            title = category_link.text
-            category_id = int(public_link.split("/")[-2])
-            category_object = types.Category(id_=category_id, game_id=None, title=title, edit_lots_link=edit_lots_link,
-                                             public_link=public_link, type_=category_type)
-            categories.append(category_object)
-
-            # Парсим лоты внутри текущей категории
-            lot_divs = div.parent.find_all("a", {"class": "tc-item"})
-            for lot_div in lot_divs:
-                lot_id = int(lot_div["href"].split("id=")[1])
-                lot_title = lot_div.find("div", {"class": "tc-desc-text"}).text
-                price = lot_div.find("div", {"class": "tc-price"})["data-s"]
-
-                lot_obj = types.Lot(category_id, None, lot_id, lot_title, price)
-                lots.append(lot_obj)
-        return types.UserInfo(lots, categories)
+        logger.debug("HTML страницы пользователя %s: %s", user_id, utils.LogPayload(html_response))
+        return parsers.parse_user_page(html_response, include_currency)
 
     def is_authorized(self):
         return self.__authorized
 
-    def update_chats(self, chats_html: str):
+    def update_chats(self, chats_html: str, chats: list[tuple[int, str, str, bool]] | None = None):
         """
-        Обновляет сохраненный HTML чатов (для get_node_id_by_username)
+        Обновляет сохраненный HTML чатов и индекс {никнейм: node_id} (для get_node_id_by_username).
 
         :param chats_html: HTML чатов.
+
+        :param chats: уже распарсенный список чатов (parsers.parse_chat_bookmarks()). Если не передан,
+        HTML парсится заново.
         """
         self.saved_html_chats = chats_html
+        if chats is None:
+            chats = parsers.parse_chat_bookmarks(chats_html)
+        # Чаты на странице идут от новых к старым: самый новый чат добавляется в индекс последним
+        # (и удаляется из него последним).
+        for node_id, chat_with, *_ in reversed(chats):
+            self.chats_by_username[chat_with] = node_id
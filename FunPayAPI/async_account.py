@@ -0,0 +1,548 @@
+"""
+В данном модуле написан асинхронный класс аккаунта (на aiohttp).
+Методы AsyncAccount имеют те же названия, аргументы и возвращаемые значения, что и методы Account,
+но являются корутинами.
+"""
+
+import aiohttp
+import asyncio
+import logging
+import json
+import time
+
+from . import types
+from . import utils
+from . import parsers
+from . import account
+from . import exceptions
+
+
+logger = logging.getLogger("FunPayAPI.async_account")
+
+
+class AsyncResponse:
+    """
+    Прочитанный ответ aiohttp (тело ответа читается сразу, чтобы соединение вернулось в пул).
+    """
+    def __init__(self, status_code: int, content: bytes, cookies: dict[str, str],
+                 headers: dict[str, str] | None = None):
+        """
+        :param status_code: статус-код ответа.
+
+        :param content: тело ответа.
+
+        :param cookies: cookie ответа.
+
+        :param headers: заголовки ответа.
+        """
+        self.status_code = status_code
+        self.content = content
+        self.cookies = cookies
+        self.headers = headers or {}
+
+    def json(self) -> dict:
+        return json.loads(self.content.decode())
+
+
+class AsyncAccount(account.Account):
+    """
+    Асинхронный класс для работы с аккаунтом FunPay.
+    """
+    def __init__(self, golden_key: str, user_agent: str = "", timeout: float | int = 10.0,
+                 proxy: dict | None = None, pool_connections: int = 4, pool_maxsize: int = 16,
+                 chats_index_size: int = 1000):
+        """
+        :param golden_key: токен аккаунта.
+
+        :param user_agent: user-agent браузера, с которого был произведен вход в аккаунт.
+
+        :param timeout: тайм-аут ожидания ответа на запросы.
+
+        :param proxy: HTTP/S прокси.
+
+        :param pool_connections: кол-во пулов соединений (по одному на хост). Передается в Account; aiohttp-сессия
+        использует один общий пул, поэтому на нее не влияет.
+
+        :param pool_maxsize: максимальное кол-во одновременных соединений (все запросы идут на funpay.com,
+        поэтому это же ограничение действует и для одного хоста).
+
+        :param chats_index_size: максимальное кол-во чатов в индексе self.chats_by_username.
+        """
+        super(AsyncAccount, self).__init__(golden_key, user_agent, timeout, proxy, pool_connections, pool_maxsize,
+                                           chats_index_size)
+        self.pool_maxsize = pool_maxsize
+        # aiohttp.ClientSession должна создаваться внутри event loop'а, поэтому создается при первом запросе.
+        self.async_session: aiohttp.ClientSession | None = None
+
+    def make_session(self, pool_connections: int, pool_maxsize: int) -> None:
+        """
+        Запросы AsyncAccount отправляются через aiohttp-сессию (get_async_session()), сессия requests не создается.
+        """
+        return None
+
+    def get_async_session(self) -> aiohttp.ClientSession:
+        """
+        Возвращает общую aiohttp-сессию аккаунта (создает ее, если она еще не создана или была закрыта).
+
+        :return: aiohttp-сессия.
+        """
+        if self.async_session is None or self.async_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize)
+            headers = {"user-agent": self.user_agent} if self.user_agent else None
+            # Cookie (golden_key, PHPSESSID) передаются только заголовком cookie каждого запроса: cookie jar сессии
+            # не используется, иначе сохраненные в нем устаревшие значения подставлялись бы вместо актуальных.
+            self.async_session = aiohttp.ClientSession(connector=connector, headers=headers,
+                                                       cookie_jar=aiohttp.DummyCookieJar())
+        return self.async_session
+
+    async def close(self) -> None:
+        """
+        Закрывает aiohttp-сессию аккаунта.
+        """
+        if self.async_session is not None and not self.async_session.closed:
+            await self.async_session.close()
+        self.async_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def method(self, request_method: str, url: str, headers: dict, payload: dict | None = None,
+                     timeout: float | int | None = None) -> AsyncResponse:
+        """
+        Отправляет запрос к FunPay через общую aiohttp-сессию аккаунта.
+
+        :param request_method: HTTP метод ("get" / "post").
+
+        :param url: ссылка.
+
+        :param headers: заголовки запроса (объединяются с заголовками сессии).
+
+        :param payload: данные запроса (form-data).
+
+        :param timeout: тайм-аут ожидания ответа. Если None - используется self.timeout.
+
+        :return: прочитанный ответ FunPay.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        data = None
+        if payload is not None and request_method.lower() != "get":
+            # aiohttp не раскрывает списки в form-data (например, node_ids[]), поэтому делаем это сами.
+            data = []
+            for key, value in payload.items():
+                if isinstance(value, (list, tuple)):
+                    data.extend((key, str(i)) for i in value)
+                else:
+                    data.append((key, str(value)))
+        proxy = self.proxy.get("https") or self.proxy.get("http") if self.proxy else None
+
+        session = self.get_async_session()
+        start = time.monotonic()
+        try:
+            async with session.request(request_method.upper(), url, headers=headers, data=data, proxy=proxy,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                content = await response.read()
+                cookies = {key: morsel.value for key, morsel in response.cookies.items()}
+                result = AsyncResponse(response.status, content, cookies, dict(response.headers))
+        except:
+            self.on_request(request_method, url, None, time.monotonic() - start)
+            raise
+        self.on_request(request_method, url, result.status_code, time.monotonic() - start)
+        return result
+
+    async def get(self, update_session_id: bool = False):
+        """
+        Получает / обновляет данные об аккаунте.
+
+        :param update_session_id: обновить self.session_id или использовать старый.
+        """
+        headers = {
+            "cookie": f"golden_key={self.golden_key}",
+            "user-agent": self.user_agent
+        }
+        if self.session_id and not update_session_id:
+            headers["cookie"] += f"; PHPSESSID={self.session_id}"
+
+        response = await self.method("get", types.Links.BASE_URL, headers)
+        logger.debug(f"Статус-код получения данных об аккаунте: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+
+        self.update_from_html(response.content.decode(), response.cookies, update_session_id)
+        return self
+
+    async def get_orders(self, include_outstanding: bool = True,
+                         include_completed: bool = False,
+                         include_refund: bool = False,
+                         exclude: list[str] | None = None) -> list[types.Order]:
+        """
+        Получает список ордеров на аккаунте.
+
+        :param include_outstanding: включить в список оплаченные (но незавершенные) заказы.
+
+        :param include_completed: включить в список завершенные заказы.
+
+        :param include_refund: включить в список заказы, за которые оформлен возврат.
+
+        :param exclude: список ID заказов, которые нужно исключить из итогового списка.
+
+        :return: Список с заказами.
+        """
+        html_response = await self.get_orders_html()
+        orders_list = parsers.parse_orders(html_response, include_outstanding, include_completed, include_refund,
+                                           exclude)
+        orders_log = "".join(f"{i.id} | {i.price} | {i.buyer_username} | {i.status} | {i.title}" for i in orders_list)
+        logger.debug(f"Список полученных заказов: {orders_log}")
+        return orders_list
+
+    async def get_orders_html(self) -> str:
+        """
+        Получает HTML страницы продаж (https://funpay.com/orders/trade) и проверяет, авторизован ли аккаунт.
+
+        :return: HTML страницы продаж.
+        """
+        if not self.is_authorized():
+            raise exceptions.NotAuthorized()
+
+        headers = {"cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id};",
+                   "user-agent": self.user_agent}
+
+        response = await self.method("get", types.Links.ORDERS, headers)
+        logger.debug(f"Статус-код получения ордеров: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+
+        html_response = response.content.decode()
+        if parsers.find_element(html_response, "div", "user-link-name") is None:
+            raise exceptions.AccountDataNotfound()
+        return html_response
+
+    async def send_message(self, message_obj: types.Message) -> dict:
+        """
+        Отправляет сообщение.
+
+        :param message_obj: экземпляр класса, описывающий сообщение.
+
+        :return: ответ FunPay.
+        """
+        headers = {
+            "accept": "*/*",
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest",
+            "user-agent": self.user_agent,
+            "referer": f"{types.Links.CHAT}?node={message_obj.node_id}",
+            "origin": types.Links.BASE_URL
+        }
+        request = {
+            "action": "chat_message",
+            "data": {
+                "node": message_obj.node_id,
+                "last_message": -1,
+                "content": message_obj.text
+            }
+        }
+        objects = [
+            {"type": "chat_node",
+             "id": message_obj.node_id,
+             "tag": "00000000",
+             "data": {
+                 "node": message_obj.node_id,
+                 "last_message": -1,
+                 "content": ""}
+             }
+        ]
+        payload = {
+            "objects": json.dumps(objects),
+            "request": json.dumps(request),
+            "csrf_token": self.csrf_token
+        }
+        response = await self.method("post", types.Links.RUNNER, headers, payload)
+        logger.debug(f"Статус-код отправления сообщения: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code,
+                                                utils.parse_retry_after(response.headers.get("Retry-After")))
+
+        json_response = response.json()
+        logger.debug("Ответ от FunPay (отправление сообщения): %s", utils.LogPayload(json_response))
+        return self.check_message_response(json_response)
+
+    async def get_chats_histories(self, chats: dict[int, int | None]) -> dict[int, list[types.Message]]:
+        """
+        Получает новые сообщения нескольких чатов одним запросом к runner'у (объекты chat_node).
+
+        :param chats: {ID чата: ID последнего известного сообщения (None - получить последние сообщения чата)}.
+
+        :return: {ID чата: список новых сообщений от старых к новым}.
+        """
+        headers, payload = self.make_chat_nodes_data(chats)
+        response = await self.method("post", types.Links.RUNNER, headers, payload)
+        logger.debug(f"Статус-код получения истории чатов: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code,
+                                                utils.parse_retry_after(response.headers.get("Retry-After")))
+
+        json_response = response.json()
+        logger.debug("Ответ от FunPay (история чатов): %s", utils.LogPayload(json_response))
+        return self.parse_chat_nodes(json_response, chats)
+
+    async def get_chat_history(self, node_id: int, since_id: int | None = None) -> list[types.Message]:
+        """
+        Получает новые сообщения чата.
+
+        :param node_id: ID чата.
+
+        :param since_id: ID последнего известного сообщения (None - получить последние сообщения чата).
+
+        :return: список сообщений с ID больше since_id от старых к новым.
+        """
+        return (await self.get_chats_histories({node_id: since_id})).get(node_id, [])
+
+    async def get_node_id_by_username(self, username: str, force_request: bool = False) -> int | None:
+        """
+        Ищет node_id чата по username'у в индексе чатов (self.chats_by_username).
+        Запрос к FunPay отправляется только при force_request=True.
+
+        :param username: никнейм пользователя (искомого чата).
+
+        :param force_request: загрузить ли список чатов с FunPay (и обновить индекс) перед поиском.
+
+        :return: node_id чата или None, если чат не найден.
+        """
+        if not force_request:
+            return self.chats_by_username.get(username)
+        try:
+            self.update_chats(await self.get_chats_html())
+        except:
+            logger.error(f"Не удалось загрузить список чатов для поиска чата с пользователем {username}.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+        return self.chats_by_username.get(username)
+
+    async def get_chats_html(self) -> str:
+        """
+        Загружает страницу чатов FunPay.
+
+        :return: HTML страницы чатов.
+        """
+        headers = {
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "user-agent": self.user_agent
+        }
+        response = await self.method("get", types.Links.CHAT, headers)
+        logger.debug(f"Статус-код получения списка чатов: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+        return response.content.decode()
+
+    async def get_category_game_id(self, category: types.Category) -> int:
+        """
+        Получает ID игры, к которой относится категория.
+
+        :param category: экземпляр класса Category.
+
+        :return: ID игры, к которой относится категория.
+        """
+        if category.type == types.CategoryTypes.LOT:
+            link = f"{types.Links.BASE_URL}/lots/{category.id}/trade"
+        else:
+            link = f"{types.Links.BASE_URL}/chips/{category.id}/trade"
+
+        headers = {"cookie": f"golden_key={self.golden_key}",
+                   "user-agent": self.user_agent}
+        response = await self.method("get", link, headers)
+        logger.debug(f"Статус-код получения ордеров: {response.status_code}.")
+        if response.status_code == 404:
+            raise Exception("Категория не найдена.")  # todo: создать кастомное исключение: категория не найдена.
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+        return parsers.parse_category_game_id(response.content.decode(), category.type)
+
+    async def get_lot_info(self, lot_id: int, game_id: int) -> dict[str, str]:
+        """
+        Получает значения всех полей лота (в окне редактирования лота).
+
+        :param lot_id: ID лота.
+
+        :param game_id: ID игры, к которой относится лот.
+
+        :return: словарь {"название поля": "значение поля"}.
+        """
+        headers = {
+            "accept": "*/*",
+            "content-type": "application/json",
+            "x-requested-with": "XMLHttpRequest",
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "user-agent": self.user_agent
+        }
+        tag = utils.gen_random_tag()
+        query = f"?tag={tag}&offer={lot_id}&node={game_id}"
+
+        response = await self.method("get", f"{types.Links.BASE_URL}/lots/offerEdit{query}", headers)
+        logger.debug(f"Статус-код получения данных о лоте: {response.status_code}")
+        if not response.status_code == 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+        return parsers.parse_lot_fields(response.json()["html"])
+
+    async def save_lot(self, lot_info: dict[str, str], active: bool = True) -> dict:
+        """
+        Сохраняет лот.
+
+        :param lot_info: информация о полях лота, получаемая с помощью метода get_lot_info().
+
+        :param active: сделать ли лот активным.
+
+        :return: ответ FunPay.
+        """
+        lot_info["location"] = "trade"
+        if active:
+            lot_info["active"] = "on"
+        else:
+            if lot_info.get("active") is not None:
+                lot_info.pop("active")
+
+        headers = {
+            "accept": "*/*",
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest",
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "user-agent": self.user_agent
+        }
+        response = await self.method("post", f"{types.Links.BASE_URL}/lots/offerSave", headers, lot_info)
+        logger.debug(f"Статус-код изменения состояния лота: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+
+        json_response = response.json()
+        if json_response.get("error"):
+            raise exceptions.LotNotUpdated(json_response)
+        return json_response
+
+    async def request_lots_raise(self, category: types.Category) -> dict:
+        """
+        Отправляет запрос на получение modal-формы для поднятия лотов категории category.id.
+        !ВНИМЕНИЕ! Для отправки запроса необходимо, чтобы category.game_id != None.
+
+        :param category: экземпляр класса, описывающий поднимаемую категорию.
+
+        :return: ответ FunPay.
+        """
+        headers = {
+            "accept": "*/*",
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "cookie": f"locale=ru; golden_key={self.golden_key}",
+            "x-requested-with": "XMLHttpRequest",
+            "user-agent": self.user_agent
+        }
+        payload = {
+            "game_id": category.game_id,
+            "node_id": category.id
+        }
+
+        response = await self.method("post", types.Links.RAISE, headers, payload)
+        logger.debug(f"Статус-код получения данных для поднятия лотов: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+        json_response = response.json()
+        logger.debug("Ответ от FunPay (запрос modal-формы поднятия лотов): %s", utils.LogPayload(json_response))
+        return json_response
+
+    async def raise_game_categories(self, category: types.Category,
+                                    exclude: list[int] | None = None) -> types.RaiseResponse:
+        """
+        Поднимает лоты всех категорий игры category.game_id.
+        !ВНИМЕНИЕ! Для поднятия лотов необходимо, чтобы category.game_id != None.
+
+        :param category: экземпляр класса, описывающий поднимаемую категорию.
+
+        :param exclude: список ID категорий, которые не нужно поднимать.
+
+        :return: ответ FunPay.
+        """
+        check = await self.request_lots_raise(category)
+        result = parsers.parse_raise_check(check, category)
+        if result is not None:
+            return result
+        elif check.get("modal"):
+            category_ids, category_names = parsers.parse_raise_modal(check.get("modal"), exclude)
+
+            headers = {
+                "accept": "*/*",
+                "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+                "cookie": f"locale=ru; golden_key={self.golden_key}",
+                "x-requested-with": "XMLHttpRequest",
+                "user-agent": self.user_agent
+            }
+            payload = {
+                "game_id": category.game_id,
+                "node_id": category.id,
+                "node_ids[]": category_ids
+            }
+            response = await self.method("post", types.Links.RAISE, headers, payload)
+            logger.debug(f"Статус-код поднятия лотов: {response.status_code}.")
+            if not response.status_code == 200:
+                raise exceptions.StatusCodeIsNot200(response.status_code)
+            json_response = response.json()
+            logger.debug("Ответ FunPay (поднятие категорий): %s.", utils.LogPayload(json_response))
+            if not json_response.get("error"):
+                return types.RaiseResponse(True, 3600, category_names, category_ids, json_response)
+            else:
+                return types.RaiseResponse(False, 10, [], [], json_response)
+
+    async def refund_order(self, order_id: str) -> None:
+        """
+        Оформляет возврат средств за заказ.
+
+        :param order_id: ID заказа.
+        """
+        headers = {
+            "accept": "*/*",
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "x-requested-with": "XMLHttpRequest",
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "user-agent": self.user_agent
+        }
+        payload = {
+            "id": order_id,
+            "csrf_token": self.csrf_token
+        }
+        response = await self.method("post", types.Links.REFUND, headers, payload)
+        if response.json().get("error"):
+            logger.debug(response.json().get("msg"))
+            raise Exception(response.json().get("msg"))
+        if not response.status_code == 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+
+    async def get_user(self, user_id: int, include_currency: bool = False) -> types.UserInfo:
+        """
+        Получает полную информацию о лотах и категориях пользователя.
+
+        :param user_id: ID пользователя.
+
+        :param include_currency: включать ли в список категории / лоты, относящиеся к игровой валюте.
+
+        :return: экземпляр класса с информацией о пользователе.
+        """
+        headers = {
+            "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+            "cookie": f"golden_key={self.golden_key}; PHPSESSID={self.session_id}",
+            "user-agent": self.user_agent
+        }
+        response = await self.method("get", f"{types.Links.USER}/{user_id}/", headers)
+        logger.debug(f"Статус-код получения страницы пользователя {user_id}: {response.status_code}.")
+        if response.status_code == 404:
+            raise Exception("Пользователь не найден.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+        return parsers.parse_user_page(response.content.decode(), include_currency)
+
+    async def get_categories_game_ids(self, categories: list[types.Category]) -> list[int | Exception]:
+        """
+        Параллельно получает ID игр для нескольких категорий (через общий пул соединений).
+
+        :param categories: список категорий.
+
+        :return: список ID игр (или исключений) в том же порядке, что и categories.
+        """
+        return await asyncio.gather(*(self.get_category_game_id(i) for i in categories), return_exceptions=True)
@@ -0,0 +1,145 @@
+"""
+В данном модуле написан асинхронный класс Runner'а (на aiohttp).
+"""
+
+from typing import AsyncIterator
+import logging
+import asyncio
+import time
+
+from . import types
+from . import runner
+from . import exceptions
+from . import async_account
+
+
+logger = logging.getLogger("FunPayAPI.async_runner")
+
+
+class AsyncRunner(runner.Runner):
+    """
+    Асинхронный класс для получения новых событий с FunPay.
+    """
+    def __init__(self, account_instance: async_account.AsyncAccount, timeout: float | int = 10.0,
+                 orders_index_size: int = 2000, messages_cache_size: int = 1000,
+                 state_ttl: float | int | None = None, keep_orders_html: bool = False,
+                 state_path: str | None = None, history_size: int = 20):
+        """
+        :param account_instance: экземпляр класса асинхронного аккаунта.
+
+        :param timeout: тайм-аут ожидания ответа на запросы.
+
+        :param orders_index_size: максимальное кол-во заказов, хранящихся в self.saved_orders.
+
+        :param messages_cache_size: максимальное кол-во чатов, хранящихся в self.saved_messages.
+
+        :param state_ttl: время жизни неактуальных записей состояния в секундах (None - бессрочно).
+
+        :param keep_orders_html: хранить ли HTML заказов в self.saved_orders.
+
+        :param state_path: путь до файла, в котором сохраняется состояние Runner'а (None - не сохранять).
+
+        :param history_size: максимальное кол-во последних сообщений в кэше каждого чата
+        (0 - не загружать историю чатов).
+        """
+        super(AsyncRunner, self).__init__(account_instance, timeout, orders_index_size, messages_cache_size,
+                                          state_ttl, keep_orders_html, state_path, history_size)
+
+    async def get_updates(self) -> list[types.NewMessageEvent | types.NewOrderEvent | types.OrderStatusChangedEvent]:
+        """
+        Получает и парсит список событий FunPay (см. Runner.get_updates()).
+        Загрузка файла состояния выполняется в отдельном потоке, чтобы не блокировать event loop.
+
+        :return: список событий.
+        """
+        await asyncio.to_thread(self.warm_start)
+        tags, headers, payload = self.begin_updates()
+        started = time.time()
+        response = await self.account.method("post", types.Links.RUNNER, headers, payload, timeout=self.timeout)
+        json_response = self.read_response(response)
+        fetched = time.time()
+
+        events = []
+        for obj in json_response["objects"]:
+            if obj.get("type") == "chat_bookmarks":
+                events.extend(await self.parse_chat_bookmarks(obj))
+
+            elif obj.get("type") == "orders_counters":
+                if not self.on_orders_counters(obj, events):
+                    continue
+                orders_html = None
+                for _ in range(runner.ORDERS_FETCH_ATTEMPTS):
+                    try:
+                        orders_html = await self.account.get_orders_html()
+                        break
+                    except Exception as e:
+                        self.on_orders_fetch_error(e)
+                        await asyncio.sleep(1)
+                if orders_html is None:
+                    self.on_orders_fetch_failed()
+                    return []
+                events.extend(self.make_order_events(orders_html, {"poll": started, "runner": fetched,
+                                                                   "orders": time.time()}))
+
+        self.finish_updates(events, tags)
+        return events
+
+    async def parse_chat_bookmarks(self, obj: dict) -> list[types.Event]:
+        """
+        Обрабатывает объект chat_bookmarks из ответа runner'а.
+
+        :param obj: объект chat_bookmarks.
+
+        :return: список событий, связанных с сообщениями.
+        """
+        events, changed = self.diff_chat_bookmarks(obj)
+        histories = None
+        request = self.make_history_request(changed)
+        if request:
+            try:
+                histories = await self.account.get_chats_histories(request)
+            except:
+                logger.warning("Не удалось получить историю измененных чатов. "
+                               "События будут сгенерированы по списку чатов.")
+                logger.debug("------TRACEBACK------", exc_info=True)
+        events.extend(self.make_message_events(changed, histories))
+        return events
+
+    async def listen(self, delay: float | int = 6.0, ignore_exceptions: bool = True,
+                     min_delay: float | int | None = None) -> AsyncIterator[types.Event]:
+        """
+        "Слушает" FunPay в ожидании новых событий.
+
+        :param delay: задержка между запросами (если передан min_delay - максимальная задержка при простое).
+
+        :param ignore_exceptions: игнорировать ошибки при выполнении запросов.
+
+        :param min_delay: минимальная задержка между запросами (адаптивная задержка, см. Runner.listen()).
+        """
+        if not self.account.is_authorized():
+            raise exceptions.NotAuthorized()
+
+        interval = self.make_interval(delay, min_delay)
+        while True:
+            start = time.monotonic()
+            try:
+                updates = await self.get_updates()
+                self.on_poll(time.monotonic() - start, len(updates))
+                if updates:
+                    interval.on_activity()
+                else:
+                    interval.on_idle()
+                for event in updates:
+                    yield event
+            except Exception as e:
+                self.on_poll(time.monotonic() - start, None)
+                if not ignore_exceptions:
+                    raise e
+                else:
+                    interval.on_error()
+                    logger.error("Произошла ошибка при получении событий "
+                                 "(ничего страшного, если это сообщение появляется нечасто).")
+                    logger.debug("------TRACEBACK------", exc_info=True)
+            await asyncio.to_thread(self.flush_state)
+            self.poll_interval = interval.current
+            await asyncio.sleep(interval.next_delay())
@@ -7,11 +7,14 @@ class StatusCodeIsNot200(Exception):
     """
     Исключение, которое райзится, если код ответа от FunPay != 200
     """
-    def __init__(self, status_code: int):
+    def __init__(self, status_code: int, retry_after: float | None = None):
         """
         :param status_code: полученный статус код.
+
+        :param retry_after: значение заголовка Retry-After в секундах (если FunPay его прислал).
         """
         self.status_code = status_code
+        self.retry_after = retry_after
 
     def __str__(self):
         return f"Не удалось получить ответ от FunPay (статус-код: {self.status_code})."
@@ -0,0 +1,552 @@
+"""
+В данном модуле написаны функции для парсинга HTML-страниц / ответов FunPay.
+Используются как синхронными (Account, Runner), так и асинхронными (AsyncAccount, AsyncRunner) классами.
+
+Самые "горячие" страницы (runner, заказы, главная страница, страница пользователя) парсятся без BeautifulSoup:
+iter_elements() находит нужные элементы токенизатором на регулярных выражениях (комментарии, содержимое
+<script> / <style> и кавычки в значениях атрибутов учитываются так же, как в html.parser), а нужные поля
+извлекаются из HTML найденных элементов.
+"""
+
+from functools import lru_cache
+from typing import Iterator
+from bs4 import BeautifulSoup
+import importlib.util
+import html as html_lib
+import json
+import re
+
+from . import types
+from . import utils
+from . import exceptions
+
+
+PARSER_BACKEND = "html.parser"
+
+# Атрибуты тега: значения в кавычках могут содержать ">".
+ATTRS = r"""(?:"[^"]*"|'[^']*'|[^'">])*"""
+# Фрагменты, внутри которых не ищутся теги: комментарии, <script> / <style> (их содержимое - не HTML), <!...>, <?...>.
+SKIPPED = rf"""<!--.*?(?:-->|\Z)|<(script|style)\b{ATTRS}>.*?(?:</\1\s*>|\Z)|<![^>]*>|<\?[^>]*>"""
+MARKUP_RE = re.compile(rf"""{SKIPPED}|</?[a-zA-Z][^\s/>]*{ATTRS}>""", re.DOTALL | re.IGNORECASE)
+ATTR_RE = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+# Теги, у которых не бывает закрывающего тега.
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track",
+             "wbr"}
+
+
+@lru_cache(maxsize=None)
+def tag_regex(tag: str) -> re.Pattern:
+    """
+    :param tag: название тега.
+
+    :return: регулярное выражение, находящее открывающие / закрывающие теги tag, пропускаемые фрагменты (SKIPPED)
+    и остальные теги (чтобы их атрибуты не разбирались как разметка). Для тегов tag заполнены группы close ("/" или
+    "") и attrs.
+    """
+    return re.compile(rf"""{SKIPPED}|<(?P<close>/?){re.escape(tag)}(?=[\s/>])(?P<attrs>{ATTRS})>|"""
+                      rf"""</?[a-zA-Z][^\s/>]*{ATTRS}>""", re.DOTALL | re.IGNORECASE)
+
+
+def set_parser_backend(backend: str) -> None:
+    """
+    Устанавливает бэкенд BeautifulSoup, используемый парсерами модуля, которые строят дерево документа.
+
+    :param backend: название бэкенда ("lxml" или "html.parser").
+    """
+    global PARSER_BACKEND
+    if backend not in ("lxml", "html.parser"):
+        raise ValueError(f"Неизвестный бэкенд парсера: {backend}.")
+    if backend == "lxml" and importlib.util.find_spec("lxml") is None:
+        raise ImportError("Бэкенд lxml не установлен.")
+    PARSER_BACKEND = backend
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    """
+    Создает объект BeautifulSoup с текущим бэкендом.
+
+    :param html: HTML.
+
+    :return: объект BeautifulSoup.
+    """
+    return BeautifulSoup(html, PARSER_BACKEND)
+
+
+def class_matches(class_attr: str, class_name: str) -> bool:
+    """
+    Проверяет, подходит ли значение атрибута class под class_name (так же, как это делает BeautifulSoup:
+    если class_name содержит пробел - сравнивается вся строка, иначе - ищется отдельный класс).
+
+    :param class_attr: значение атрибута class.
+
+    :param class_name: искомый класс.
+
+    :return: True, если подходит, иначе False.
+    """
+    if " " in class_name:
+        return class_attr.strip() == class_name
+    return class_name in class_attr.split()
+
+
+def parse_attrs(attrs: str) -> dict[str, str]:
+    """
+    Парсит атрибуты тега.
+
+    :param attrs: строка с атрибутами (все, что между названием тега и ">").
+
+    :return: словарь {"название атрибута": "значение атрибута"} (HTML-сущности в значениях раскодированы).
+    """
+    result = {}
+    for name, double, single, bare in ATTR_RE.findall(attrs):
+        result[name.lower()] = html_lib.unescape(double or single or bare)
+    return result
+
+
+def get_text(html: str) -> str:
+    """
+    Возвращает текст HTML-фрагмента (аналог Tag.text BeautifulSoup): теги, комментарии и содержимое
+    <script> / <style> удаляются, HTML-сущности раскодируются.
+
+    :param html: HTML-фрагмент.
+
+    :return: текст.
+    """
+    return html_lib.unescape(MARKUP_RE.sub("", html))
+
+
+class Element:
+    """
+    Элемент, найденный iter_elements().
+    """
+    __slots__ = ("start", "end", "inner_start", "inner_end", "attrs", "source")
+
+    def __init__(self, source: str, start: int, end: int, inner_start: int, inner_end: int, attrs: dict[str, str]):
+        self.source = source
+        """HTML документа."""
+        self.start = start
+        """Позиция начала элемента в документе."""
+        self.end = end
+        """Позиция конца элемента в документе."""
+        self.inner_start = inner_start
+        """Позиция начала содержимого элемента в документе."""
+        self.inner_end = inner_end
+        """Позиция конца содержимого элемента в документе."""
+        self.attrs = attrs
+        """Атрибуты элемента."""
+
+    @property
+    def html(self) -> str:
+        """HTML элемента."""
+        return self.source[self.start:self.end]
+
+    @property
+    def inner_html(self) -> str:
+        """HTML содержимого элемента."""
+        return self.source[self.inner_start:self.inner_end]
+
+    @property
+    def text(self) -> str:
+        """Текст элемента."""
+        return get_text(self.inner_html)
+
+    def get(self, attr: str, default=None):
+        return self.attrs.get(attr, default)
+
+    def __getitem__(self, attr: str) -> str:
+        return self.attrs[attr]
+
+    def find(self, tag: str, class_name: str | None = None):
+        """
+        Находит первый потомок <tag class="... class_name ...">.
+
+        :return: объект Element или None, если элемент не найден.
+        """
+        return find_element(self.source, tag, class_name, self.inner_start, self.inner_end)
+
+
+def iter_elements(html: str, tag: str, class_name: str | None = None, start: int = 0,
+                  end: int | None = None) -> Iterator[Element]:
+    """
+    Находит в HTML элементы <tag class="... class_name ..."> (без построения дерева документа).
+    Вложенные одноименные теги учитываются, элементы внутри найденного элемента не возвращаются.
+
+    :param html: HTML документа.
+
+    :param tag: название тега.
+
+    :param class_name: искомый класс (None - любой элемент tag).
+
+    :param start: позиция, с которой начинается поиск.
+
+    :param end: позиция, на которой заканчивается поиск (None - до конца документа).
+
+    :return: генератор найденных элементов.
+    """
+    end = len(html) if end is None else end
+    regex = tag_regex(tag)
+    void = tag.lower() in VOID_TAGS
+    position = start
+    while True:
+        match = regex.search(html, position, end)
+        if match is None:
+            return
+        position = match.end()
+        attrs_str = match.group("attrs")
+        if attrs_str is None or match.group("close"):
+            continue
+        attrs = parse_attrs(attrs_str)
+        if class_name is not None and not class_matches(attrs.get("class", ""), class_name):
+            continue
+        if void or attrs_str.rstrip().endswith("/"):
+            yield Element(html, match.start(), position, position, position, attrs)
+            continue
+
+        depth = 1
+        inner_end = element_end = end
+        for edge in regex.finditer(html, position, end):
+            if edge.group("attrs") is None:
+                continue
+            if edge.group("close"):
+                depth -= 1
+            elif not edge.group("attrs").rstrip().endswith("/"):
+                depth += 1
+            if not depth:
+                inner_end, element_end = edge.start(), edge.end()
+                break
+        yield Element(html, match.start(), element_end, position, inner_end, attrs)
+        position = element_end
+
+
+def find_element(html: str, tag: str, class_name: str | None = None, start: int = 0,
+                 end: int | None = None) -> Element | None:
+    """
+    Находит первый элемент <tag class="... class_name ..."> (см. iter_elements()).
+
+    :return: объект Element или None, если элемент не найден.
+    """
+    for element in iter_elements(html, tag, class_name, start, end):
+        return element
+    return None
+
+
+def parse_account_page(html: str) -> dict:
+    """
+    Парсит главную страницу FunPay (данные об аккаунте).
+
+    :param html: HTML главной страницы.
+
+    :return: словарь с данными аккаунта (username, app_data, id, csrf_token, active_orders, balance, currency).
+    """
+    username = find_element(html, "div", "user-link-name")
+    if username is None:
+        raise exceptions.AccountDataNotfound()
+
+    app_data = json.loads(find_element(html, "body")["data-app-data"])
+
+    active_orders = find_element(html, "span", "badge badge-trade")
+    active_orders = int(active_orders.text) if active_orders else 0
+
+    balance_badge = find_element(html, "span", "badge badge-balance")
+    balance = float(balance_badge.text.split(" ")[0]) if balance_badge else 0
+    currency = balance_badge.text.split(" ")[1] if balance_badge else ""
+
+    return {
+        "username": username.text,
+        "app_data": app_data,
+        "id": app_data["userId"],
+        "csrf_token": app_data["csrf-token"],
+        "active_orders": active_orders,
+        "balance": balance,
+        "currency": currency
+    }
+
+
+def parse_orders(html: str, include_outstanding: bool = True, include_completed: bool = False,
+                 include_refund: bool = False, exclude: list[str] | None = None) -> list[types.Order]:
+    """
+    Парсит страницу с продажами (https://funpay.com/orders/trade).
+
+    :param html: HTML страницы продаж.
+
+    :param include_outstanding: включить в список оплаченные (но незавершенные) заказы.
+
+    :param include_completed: включить в список завершенные заказы.
+
+    :param include_refund: включить в список заказы, за которые оформлен возврат.
+
+    :param exclude: список ID заказов, которые нужно исключить из итогового списка.
+
+    :return: список с заказами.
+    """
+    if find_element(html, "div", "user-link-name") is None:
+        raise exceptions.AccountDataNotfound()
+    return list(iter_orders(html, include_outstanding, include_completed, include_refund, exclude))
+
+
+def iter_orders(html: str, include_outstanding: bool = True, include_completed: bool = False,
+                include_refund: bool = False, exclude: list[str] | None = None) -> Iterator[types.Order]:
+    """
+    Лениво парсит заказы со страницы продаж (сверху вниз, т.е. от новых к старым).
+    Если прервать итерацию, оставшаяся часть страницы не парсится.
+    !ВНИМАНИЕ! Не проверяет, авторизован ли аккаунт (см. parse_orders()).
+
+    :param html: HTML страницы продаж.
+
+    :param include_outstanding: включать оплаченные (но незавершенные) заказы.
+
+    :param include_completed: включать завершенные заказы.
+
+    :param include_refund: включать заказы, за которые оформлен возврат.
+
+    :param exclude: список ID заказов, которые нужно пропустить.
+
+    :return: генератор заказов.
+    """
+    exclude = [] if not exclude else exclude
+    for div in iter_elements(html, "a", "tc-item"):
+        classname = div.get("class").split()
+        if "warning" in classname:
+            if not include_refund:
+                continue
+            status = types.OrderStatuses.REFUND
+        elif "info" in classname:
+            if not include_outstanding:
+                continue
+            status = types.OrderStatuses.OUTSTANDING
+        else:
+            if not include_completed:
+                continue
+            status = types.OrderStatuses.COMPLETED
+
+        order_id = div.find("div", "tc-order").text
+        if order_id in exclude:
+            continue
+
+        title = div.find("div", "order-desc").find("div").text
+        price = float(div.find("div", "tc-price").text.split(" ")[0])
+
+        buyer_div = div.find("div", "media-user-name").find("span")
+        buyer_username = buyer_div.text
+        buyer_id = int(buyer_div.get("data-href")[:-1].split("https://funpay.com/users/")[1])
+
+        yield types.Order(html=div.html, id_=order_id, title=title, price=price, buyer_username=buyer_username,
+                          buyer_id=buyer_id, status=status)
+
+
+def parse_chat_bookmarks(html: str) -> list[tuple[int, str, str, bool]]:
+    """
+    Парсит HTML списка чатов (объект chat_bookmarks runner'а).
+
+    :param html: HTML списка чатов.
+
+    :return: список кортежей (node_id, никнейм собеседника, текст последнего сообщения, флаг unread).
+    """
+    result = []
+    for msg in iter_elements(html, "a", "contact-item"):
+        unread = True if "unread" in msg.get("class").split() else False
+        node_id = int(msg["data-id"])
+        message_text = msg.find("div", "contact-item-message").text
+        chat_with = msg.find("div", "media-user-name").text
+        result.append((node_id, chat_with, message_text, unread))
+    return result
+
+
+def parse_chat_messages(messages: list[dict], node_id: int, since_id: int | None = None) -> list[types.Message]:
+    """
+    Парсит сообщения объекта chat_node runner'а (objects -> chat_node -> data -> messages).
+
+    :param messages: список сообщений ({"id": ..., "author": ..., "html": ...}).
+
+    :param node_id: ID чата.
+
+    :param since_id: ID последнего известного сообщения (более старые сообщения пропускаются).
+
+    :return: список сообщений от старых к новым.
+    """
+    result = []
+    for i in messages:
+        message_id = int(i["id"])
+        if since_id is not None and message_id <= since_id:
+            continue
+        soup = make_soup(i.get("html") or "")
+        text_div = soup.find("div", {"class": "chat-msg-text"})
+        if text_div is not None:
+            text = text_div.text
+        elif soup.find("a", {"class": "chat-img-link"}) is not None:
+            text = "Изображение"
+        else:
+            text = soup.get_text().strip()
+        author_id = int(i["author"]) if i.get("author") is not None else None
+        result.append(types.Message(text, node_id, None, set_sys_type=True, id_=message_id, author_id=author_id))
+    result.sort(key=lambda msg: msg.id)
+    return result
+
+
+def parse_category_game_id(html: str, category_type: types.CategoryTypes) -> int:
+    """
+    Парсит ID игры со страницы редактирования лотов категории.
+
+    :param html: HTML страницы категории.
+
+    :param category_type: тип категории.
+
+    :return: ID игры, к которой относится категория.
+    """
+    parser = make_soup(html)
+
+    if parser.find("div", {"class": "user-link-name"}) is None:
+        raise exceptions.AccountDataNotfound()
+
+    if category_type == types.CategoryTypes.LOT:
+        return int(parser.find("div", {"class": "col-sm-6"}).find("button")["data-game"])
+    return int(parser.find("input", {"name": "game"})["value"])
+
+
+def parse_lot_fields(html: str) -> dict[str, str]:
+    """
+    Парсит значения всех полей формы редактирования лота.
+
+    :param html: HTML формы редактирования лота.
+
+    :return: словарь {"название поля": "значение поля"}.
+    """
+    parser = make_soup(html)
+
+    input_fields = parser.find_all("input")
+    text_fields = parser.find_all("textarea")
+    selection_fields = parser.find_all("select")
+    result = {}
+
+    for field in input_fields:
+        name = field["name"]
+        value = field.get("value")
+        if value is None:
+            value = ""
+        result[name] = value
+
+    for field in text_fields:
+        name = field["name"]
+        value = field.text
+        if not value:
+            value = ""
+        result[name] = value
+
+    for field in selection_fields:
+        name = field["name"]
+        value = field.find("option", selected=True)["value"]
+        result[name] = value
+
+    return result
+
+
+def parse_raise_modal(html: str, exclude: list[int] | None = None) -> tuple[list[int], list[str]]:
+    """
+    Парсит modal-форму поднятия лотов.
+
+    :param html: HTML modal-формы.
+
+    :param exclude: список ID категорий, которые не нужно поднимать.
+
+    :return: (список ID категорий, список названий категорий).
+    """
+    parser = make_soup(html)
+    category_ids = []
+    category_names = []
+    checkboxes = parser.find_all("div", {"class": "checkbox"})
+    for cb in checkboxes:
+        category_id = int(cb.find("input")["value"])
+        if exclude is None or category_id not in exclude:
+            category_ids.append(category_id)
+            category_name = cb.find("label").text
+            category_names.append(category_name)
+    return category_ids, category_names
+
+
+def parse_user_page(html: str, include_currency: bool = False) -> types.UserInfo:
+    """
+    Парсит страницу пользователя (категории и лоты).
+
+    :param html: HTML страницы пользователя.
+
+    :param include_currency: включать ли в список категории / лоты, относящиеся к игровой валюте.
+
+    :return: экземпляр класса с информацией о пользователе.
+    """
+    categories = []
+    lots = []
+
+    # Лоты относятся к последней категории перед ними (заголовок категории и ее лоты - соседи в div.offer).
+    # Лоты категорий игровой валюты (если include_currency=False) и лоты без категории пропускаются.
+    titles = iter_elements(html, "div", "offer-list-title-container")
+    category_object = None
+    next_title = next(titles, None)
+    for lot_div in iter_elements(html, "a", "tc-item"):
+        while next_title is not None and next_title.start < lot_div.start:
+            category_object = parse_user_category(next_title, include_currency)
+            if category_object is not None:
+                categories.append(category_object)
+            next_title = next(titles, None)
+        if category_object is None:
+            continue
+
+        lot_id = int(lot_div["href"].split("id=")[1])
+        lot_title = lot_div.find("div", "tc-desc-text").text
+        price = lot_div.find("div", "tc-price")["data-s"]
+        lots.append(types.Lot(category_object.id, None, lot_id, lot_title, price))
+
+    while next_title is not None:
+        category_object = parse_user_category(next_title, include_currency)
+        if category_object is not None:
+            categories.append(category_object)
+        next_title = next(titles, None)
+    return types.UserInfo(lots, categories)
+
+
+def parse_user_category(div: Element, include_currency: bool) -> types.Category | None:
+    """
+    Парсит заголовок категории на странице пользователя (div.offer-list-title-container).
+
+    :param div: заголовок категории.
+
+    :param include_currency: включать ли категории игровой валюты.
+
+    :return: экземпляр класса категории или None, если категория пропускается.
+    """
+    category_link = div.find("div", "offer-list-title").find("a")
+    public_link = category_link["href"]
+    if "chips" in public_link:
+        # 'chips' в ссылке означает, что данная категория - игровая валюта.
+        # Например: https://funpay.com/chips/125/ - Серебро Black Desert Mobile.
+        if not include_currency:
+            return None
+        category_type = types.CategoryTypes.CURRENCY
+    else:
+        category_type = types.CategoryTypes.LOT
+
+    edit_lots_link = public_link + "trade"
+    title = category_link.text
+    category_id = int(public_link.split("/")[-2])
+    return types.Category(id_=category_id, game_id=None, title=title, edit_lots_link=edit_lots_link,
+                          public_link=public_link, type_=category_type)
+
+
+def parse_raise_check(check: dict, category: types.Category) -> types.RaiseResponse | None:
+    """
+    Обрабатывает ответ FunPay на запрос modal-формы поднятия лотов.
+
+    :param check: ответ FunPay (Account.request_lots_raise()).
+
+    :param category: экземпляр класса, описывающий поднимаемую категорию.
+
+    :return: RaiseResponse, если поднятие завершено (успешно или нет) без modal-формы, иначе None.
+    """
+    if check.get("error") and check.get("msg") and "Подождите" in check.get("msg"):
+        wait_time = utils.get_wait_time_from_raise_response(check.get("msg"))
+        return types.RaiseResponse(False, wait_time, [], [], check)
+    elif check.get("error"):
+        # Если вернулся ответ с ошибкой и это не "Подождите n времени" - значит творится какая-то дичь.
+        return types.RaiseResponse(False, 10, [], [], check)
+    elif check.get("error") is not None and not check.get("error"):
+        # Если была всего 1 категория и FunPay ее поднял без отправки modal-окна
+        return types.RaiseResponse(True, 3600, [category.title], [category.id], check)
+    return None
@@ -0,0 +1,59 @@
+"""
+В данном модуле написан адаптивный интервал опроса FunPay для Runner.listen().
+"""
+
+import random
+
+
+class AdaptiveInterval:
+    """
+    Интервал между запросами к FunPay, подстраивающийся под активность:
+    после событий интервал сбрасывается до min_delay, при простое плавно растет до max_delay,
+    при ошибках - быстро растет до max_error_delay. К каждой задержке добавляется случайный разброс (jitter).
+    """
+    def __init__(self, min_delay: float | int = 1.0, max_delay: float | int = 6.0, relax_factor: float = 1.5,
+                 error_factor: float = 2.0, max_error_delay: float | int = 60.0, jitter: float = 0.1):
+        """
+        :param min_delay: минимальный интервал (сразу после событий).
+
+        :param max_delay: максимальный интервал при простое.
+
+        :param relax_factor: во сколько раз увеличивается интервал после каждого запроса без событий.
+
+        :param error_factor: во сколько раз увеличивается интервал после каждой ошибки.
+
+        :param max_error_delay: максимальный интервал при ошибках.
+
+        :param jitter: относительный случайный разброс задержки (0.1 = ±10%).
+        """
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+        self.relax_factor = relax_factor
+        self.error_factor = error_factor
+        self.max_error_delay = max(max_error_delay, self.max_delay)
+        self.jitter = jitter
+        self.current = self.max_delay
+
+    def on_activity(self) -> None:
+        """
+        Вызывается, если запрос вернул события.
+        """
+        self.current = self.min_delay
+
+    def on_idle(self) -> None:
+        """
+        Вызывается, если запрос не вернул событий.
+        """
+        self.current = min(self.max_delay, self.current * self.relax_factor)
+
+    def on_error(self) -> None:
+        """
+        Вызывается, если запрос завершился ошибкой.
+        """
+        self.current = min(self.max_error_delay, max(self.max_delay, self.current * self.error_factor))
+
+    def next_delay(self) -> float:
+        """
+        :return: задержка перед следующим запросом (текущий интервал со случайным разбросом).
+        """
+        return max(0.0, self.current * (1 + random.uniform(-self.jitter, self.jitter)))
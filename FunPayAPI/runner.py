@@ -2,33 +2,59 @@
 В данном модуле написан класс Runner'а.
 """
 
-from bs4 import BeautifulSoup
-from typing import Iterator
-from copy import deepcopy
+from typing import Iterator, Iterable, Callable
 import traceback
-import requests
+import threading
 import logging
 import json
+import os
 import time
 
 from . import utils
 from . import types
 from . import account
+from . import state
+from . import parsers
+from . import polling
 from . import exceptions
 
 
 logger = logging.getLogger("FunPayAPI.runner")
 
+# Кол-во попыток загрузить страницу продаж за один вызов get_updates().
+ORDERS_FETCH_ATTEMPTS = 3
+
 
 class Runner:
     """
     Класс для получения новых событий с FunPay.
     """
-    def __init__(self, account_instance: account.Account, timeout: float | int = 10.0):
+    def __init__(self, account_instance: account.Account, timeout: float | int = 10.0,
+                 orders_index_size: int = 2000, messages_cache_size: int = 1000,
+                 state_ttl: float | int | None = None, keep_orders_html: bool = False,
+                 state_path: str | None = None, history_size: int = 20):
         """
         :param account_instance: экземпляр класса аккаунта.
 
         :param timeout: тайм-аут ожидания ответа на запросы.
+
+        :param orders_index_size: максимальное кол-во заказов, хранящихся в self.saved_orders
+        (незавершенные заказы не удаляются).
+
+        :param messages_cache_size: максимальное кол-во чатов, хранящихся в self.saved_messages.
+
+        :param state_ttl: время (в секундах), через которое неактуальные записи удаляются из self.saved_messages и
+        self.saved_orders (None - не удалять по времени).
+
+        :param keep_orders_html: хранить ли HTML заказов в self.saved_orders.
+
+        :param state_path: путь до файла, в котором сохраняется состояние Runner'а (теги, последние сообщения,
+        состояния заказов). Если файл существует, при первом запросе состояние загружается из него, и Initial-события
+        не генерируются. None - не сохранять состояние.
+
+        :param history_size: максимальное кол-во последних сообщений, хранящихся в кэше каждого чата. Если больше 0,
+        при изменении списка чатов Runner загружает новые сообщения измененных чатов (одним запросом) и генерирует
+        событие на каждое сообщение. 0 - событие генерируется только на последнее сообщение из списка чатов.
         """
         self.account = account_instance
         self.timeout = timeout
@@ -36,21 +62,168 @@ class Runner:
         self.last_message_event_tag = utils.gen_random_tag()
         self.last_order_event_tag = utils.gen_random_tag()
 
-        self.saved_messages: dict[int, types.Message] = {}
-        self.saved_orders: dict[str, types.Order] = {}
+        # Чаты удаляются в порядке давности последней активности (LRU), заказы - в порядке появления
+        # (кроме незавершенных).
+        self.saved_messages: state.StateStore = state.StateStore(messages_cache_size, state_ttl)
+        self.saved_orders: state.StateStore = state.StateStore(
+            orders_index_size, state_ttl, move_on_update=False,
+            can_evict=lambda order: order.status != types.OrderStatuses.OUTSTANDING)
+        self.keep_orders_html = keep_orders_html
+        self.history_size = history_size
+        # Последние значения счетчиков заказов (покупки, продажи).
+        self.last_orders_counters: tuple[int, int] | None = None
 
         self.first_request = True
-        self.session = requests.session()
+        self.state_path = state_path
+        self.state_loaded = False
+        # Изменилось ли состояние с момента последнего сохранения (см. flush_state()).
+        self.state_dirty = False
+        self.state_lock = threading.RLock()
+        # Запись файла состояния (выполняется без self.state_lock, чтобы не блокировать обновление состояния).
+        self.state_file_lock = threading.Lock()
+        # Runner использует общую сессию аккаунта (общий пул keep-alive соединений).
+        self.session = self.account.session
+        # {node_id чата: timestamp последнего изменения чата в списке чатов}.
+        self.chats_activity: dict[int, float] = {}
+        # Текущий интервал между запросами в listen() (в секундах).
+        self.poll_interval: float | None = None
+        # Функция, вызываемая после каждого опроса в listen(): (длительность get_updates() в секундах,
+        # кол-во событий или None при ошибке). Используется для сбора метрик.
+        self.poll_hook: Callable[[float, int | None], None] | None = None
 
     def get_updates(self) -> list[types.NewMessageEvent | types.NewOrderEvent | types.OrderStatusChangedEvent]:
         """
         Получает и парсит список событий FunPay.
+        Логика разбора ответа вынесена в методы begin_updates() / read_response() / on_orders_counters() /
+        make_order_events() / finish_updates(), общие с AsyncRunner: здесь выполняются только запросы.
+        Состояние не сохраняется, а помечается измененным: listen() сохраняет его после обработки событий,
+        при вызове get_updates() напрямую нужно вызывать flush_state().
 
         :return: список событий.
         """
+        self.warm_start()
+        tags, headers, payload = self.begin_updates()
+        started = time.time()
+        response = self.account.method("post", types.Links.RUNNER, headers, payload, timeout=self.timeout)
+        json_response = self.read_response(response)
+        fetched = time.time()
+
+        events = []
+        for obj in json_response["objects"]:
+            if obj.get("type") == "chat_bookmarks":
+                events.extend(self.parse_chat_bookmarks(obj))
+
+            elif obj.get("type") == "orders_counters":
+                if not self.on_orders_counters(obj, events):
+                    continue
+                orders_html = None
+                for _ in range(ORDERS_FETCH_ATTEMPTS):
+                    try:
+                        orders_html = self.account.get_orders_html()
+                        break
+                    except Exception as e:
+                        self.on_orders_fetch_error(e)
+                        time.sleep(1)
+                if orders_html is None:
+                    self.on_orders_fetch_failed()
+                    return []
+                events.extend(self.make_order_events(orders_html, {"poll": started, "runner": fetched,
+                                                                   "orders": time.time()}))
+
+        self.finish_updates(events, tags)
+        return events
+
+    def begin_updates(self) -> tuple[tuple[str, str], dict, dict]:
+        """
+        Проверяет авторизацию и формирует запрос к runner'у (первый шаг get_updates()).
+
+        :return: (текущие теги (сообщений, заказов), заголовки запроса, тело запроса).
+        """
         if not self.account.is_authorized():
             raise exceptions.NotAuthorized()
+        headers, payload = self.make_request_data()
+        return (self.last_message_event_tag, self.last_order_event_tag), headers, payload
+
+    @staticmethod
+    def read_response(response) -> dict:
+        """
+        Проверяет статус-код ответа runner'а и возвращает его содержимое.
+
+        :param response: ответ FunPay (requests.Response или AsyncResponse).
+
+        :return: ответ runner'а.
+        """
+        logger.debug(f"Статус-код получения данных о событиях: {response.status_code}.")
+        if response.status_code != 200:
+            raise exceptions.StatusCodeIsNot200(response.status_code)
+        json_response = response.json()
+        logger.debug("Получены данные о событиях: %s", utils.LogPayload(json_response))
+        return json_response
+
+    def on_orders_counters(self, obj: dict, events: list[types.Event]) -> bool:
+        """
+        Обрабатывает объект orders_counters из ответа runner'а.
+
+        :param obj: объект orders_counters.
+
+        :param events: список событий, в который добавляется OrdersListChangedEvent.
+
+        :return: True, если нужно загрузить страницу продаж, иначе False.
+        """
+        tag_changed = obj.get("tag") != self.last_order_event_tag
+        self.last_order_event_tag = obj.get("tag")
+        if not self.first_request:
+            events.append(types.OrdersListChangedEvent(obj["data"]["buyer"], obj["data"]["seller"],
+                                                       self.last_order_event_tag))
+        return self.orders_fetch_needed(obj["data"], tag_changed)
+
+    @staticmethod
+    def on_orders_fetch_error(error: Exception) -> None:
+        if isinstance(error, exceptions.StatusCodeIsNot200):
+            logger.error(error)
+        else:
+            logger.error("Не удалось обновить список ордеров.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+
+    def on_orders_fetch_failed(self) -> None:
+        logger.error("Не удалось обновить список ордеров: превышено кол-во попыток.")
+        # Счетчики сбрасываются, чтобы при следующем запросе страница продаж точно была загружена.
+        self.last_orders_counters = None
+
+    def make_order_events(self, orders_html: str, timings: dict[str, float]) -> list[types.Event]:
+        """
+        Парсит страницу продаж и генерирует события заказов.
 
+        :param orders_html: HTML страницы продаж.
+
+        :param timings: временные метки получения (без "parsed", см. types.Event.timings).
+
+        :return: список событий, связанных с заказами.
+        """
+        events = self.parse_orders(parsers.iter_orders(orders_html, include_completed=True, include_refund=True))
+        self.set_timings(events, {**timings, "parsed": time.time()})
+        return events
+
+    def finish_updates(self, events: list[types.Event], tags: tuple[str, str]) -> None:
+        """
+        Завершает обработку ответа runner'а (последний шаг get_updates()): помечает состояние измененным,
+        если получены события или изменились теги.
+
+        :param events: полученные события.
+
+        :param tags: теги (сообщений, заказов) до запроса (см. begin_updates()).
+        """
+        if self.first_request:
+            self.first_request = False
+        if events or tags != (self.last_message_event_tag, self.last_order_event_tag):
+            self.state_dirty = True
+
+    def make_request_data(self) -> tuple[dict, dict]:
+        """
+        Формирует заголовки и тело запроса к runner'у FunPay.
+
+        :return: (заголовки, тело запроса).
+        """
         orders = {
             "type": "orders_counters",
             "id": self.account.id,
@@ -75,89 +248,254 @@ class Runner:
             "x-requested-with": "XMLHttpRequest",
             "user-agent": self.account.user_agent
         }
-        response = self.session.post(types.Links.RUNNER, headers=headers, data=payload, timeout=self.timeout,
-                                     proxies=self.account.proxy)
-        logger.debug(f"Статус-код получения данных о событиях: {response.status_code}.")
-        if response.status_code != 200:
-            raise exceptions.StatusCodeIsNot200(response.status_code)
+        return headers, payload
 
-        json_response = response.json()
-        logger.debug(f"Получены данные о событиях: {json_response}")
+    def parse_chat_bookmarks(self, obj: dict) -> list[types.Event]:
+        """
+        Обрабатывает объект chat_bookmarks из ответа runner'а.
+
+        :param obj: объект chat_bookmarks.
 
+        :return: список событий, связанных с сообщениями.
+        """
+        events, changed = self.diff_chat_bookmarks(obj)
+        histories = None
+        request = self.make_history_request(changed)
+        if request:
+            try:
+                histories = self.account.get_chats_histories(request)
+            except:
+                logger.warning("Не удалось получить историю измененных чатов. "
+                               "События будут сгенерированы по списку чатов.")
+                logger.debug("------TRACEBACK------", exc_info=True)
+        events.extend(self.make_message_events(changed, histories))
+        return events
+
+    def diff_chat_bookmarks(self, obj: dict) -> tuple[list[types.Event], list[tuple[int, str, str, bool]]]:
+        """
+        Сравнивает список чатов из объекта chat_bookmarks с сохраненными последними сообщениями.
+
+        :param obj: объект chat_bookmarks.
+
+        :return: (список событий MessagesListChangedEvent, список измененных чатов
+        (node_id, никнейм собеседника, текст последнего сообщения, флаг unread)).
+        """
         events = []
+        if not self.first_request:
+            events.append(types.MessagesListChangedEvent(self.last_message_event_tag))
+        self.last_message_event_tag = obj.get("tag")
+        # Список чатов парсится один раз: он же обновляет индекс {никнейм: node_id} аккаунта.
+        chats = parsers.parse_chat_bookmarks(obj["data"]["html"])
+        self.account.update_chats(obj["data"]["html"], chats)
 
-        for obj in json_response["objects"]:
-            if obj.get("type") == "chat_bookmarks":
-                if not self.first_request:
-                    events.append(types.MessagesListChangedEvent(self.last_message_event_tag))
-                self.last_message_event_tag = obj.get("tag")
-                self.account.update_chats(obj["data"]["html"])
-                soup = BeautifulSoup(obj["data"]["html"], "html.parser")
-                messages = soup.find_all("a", {"class": "contact-item"})
-
-                for msg in messages:
-                    unread = True if "unread" in msg.get("class") else False
-                    node_id = int(msg["data-id"])
-                    message_text = msg.find("div", {"class": "contact-item-message"}).text
-                    # Если это старое сообщение (сохранено в self.last_messages) -> пропускаем.
-                    if node_id in self.saved_messages:
-                        last_msg = self.saved_messages[node_id]
-                        if last_msg.text == message_text:
-                            continue
-
-                    chat_with = msg.find("div", {"class": "media-user-name"}).text
-                    message_obj = types.Message(message_text, node_id, chat_with, unread, True)
-                    if self.first_request:
-                        event = types.InitialMessageEvent(message_obj, self.last_message_event_tag)
-                    else:
-                        event = types.NewMessageEvent(message_obj, self.last_message_event_tag)
-                    events.append(event)
-                    self.saved_messages[message_obj.node_id] = message_obj
+        changed = []
+        now = time.time()
+        for node_id, chat_with, message_text, unread in chats:
+            # Если это старое сообщение (сохранено в self.last_messages) -> пропускаем.
+            if node_id in self.saved_messages:
+                last_msg = self.saved_messages[node_id]
+                if last_msg.text == message_text:
+                    with self.state_lock:
+                        self.saved_messages.touch(node_id)
+                    continue
+            changed.append((node_id, chat_with, message_text, unread))
+            self.chats_activity[node_id] = now
+        return events, changed
 
-            elif obj.get("type") == "orders_counters":
-                self.last_order_event_tag = obj.get("tag")
-                if not self.first_request:
-                    events.append(types.OrdersListChangedEvent(obj["data"]["buyer"], obj["data"]["seller"],
-                                                               self.last_order_event_tag))
-                attempts = 3
-                while attempts:
-                    try:
-                        orders_list = self.account.get_orders(include_outstanding=True, include_refund=True,
-                                                              include_completed=True)
-                        break
-                    except exceptions.StatusCodeIsNot200 as e:
-                        logger.error(e)
-                        attempts -= 1
-                        time.sleep(1)
-                    except:
-                        logger.error("Не удалось обновить список ордеров.")
-                        logger.debug("------TRACEBACK------", exc_info=True)
-                        attempts -= 1
-                        time.sleep(1)
-                if not attempts:
-                    logger.error("Не удалось обновить список ордеров: превышено кол-во попыток.")
-                    return []
+    def make_history_request(self, changed: list[tuple[int, str, str, bool]]) -> dict[int, int | None]:
+        """
+        Формирует запрос истории измененных чатов (при первом запросе история не загружается).
 
-                for order in orders_list:
-                    if order.id not in self.saved_orders:
-                        if self.first_request:
-                            event = types.InitialOrderEvent(order, self.last_order_event_tag)
-                            events.append(event)
-                        else:
-                            event = types.NewOrderEvent(order, self.last_order_event_tag)
-                            events.append(event)
-                            if order.status == types.OrderStatuses.COMPLETED:
-                                event2 = types.OrderStatusChangedEvent(order, self.last_order_event_tag)
-                                events.append(event2)
-                        self.update_saved_order(order)
-                    elif order.status != self.saved_orders[order.id].status:
-                        event = types.OrderStatusChangedEvent(order_obj=order, tag=self.last_order_event_tag)
-                        events.append(event)
-                        self.update_saved_order(order)
+        :param changed: список измененных чатов (см. diff_chat_bookmarks()).
 
-        if self.first_request:
-            self.first_request = False
+        :return: {ID чата: ID последнего известного сообщения или None}.
+        """
+        if not self.history_size or self.first_request:
+            return {}
+        result = {}
+        for node_id, *_ in changed:
+            saved = self.saved_messages.get(node_id)
+            result[node_id] = saved.last_id if saved is not None else None
+        return result
+
+    def make_message_events(self, changed: list[tuple[int, str, str, bool]],
+                            histories: dict[int, list[types.Message]] | None) -> list[types.Event]:
+        """
+        Генерирует события новых сообщений измененных чатов: по событию на каждое новое сообщение из истории чата,
+        а если история чата не получена - одно событие по последнему сообщению из списка чатов.
+
+        :param changed: список измененных чатов (см. diff_chat_bookmarks()).
+
+        :param histories: новые сообщения чатов (Account.get_chats_histories()) или None.
+
+        :return: список событий.
+        """
+        events = []
+        for node_id, chat_with, message_text, unread in changed:
+            history = histories.get(node_id) if histories is not None else None
+            with self.state_lock:
+                saved = self.saved_messages.get(node_id)
+                if history is None:
+                    messages = [types.Message(message_text, node_id, chat_with, unread, True)]
+                else:
+                    messages = self.select_new_messages(saved, history)
+                    for msg in messages:
+                        msg.chat_with = chat_with
+                        msg.unread = unread
+
+                if saved is None:
+                    saved = state.SavedMessage(node_id, message_text, chat_with)
+                saved.text = message_text
+                saved.chat_with = chat_with
+                if history:
+                    saved.remember(history, self.history_size)
+                self.saved_messages[node_id] = saved
+
+            for msg in messages:
+                if self.first_request:
+                    events.append(types.InitialMessageEvent(msg, self.last_message_event_tag))
+                else:
+                    events.append(types.NewMessageEvent(msg, self.last_message_event_tag))
+        return events
+
+    def select_new_messages(self, saved: state.SavedMessage | None, history: list[types.Message]) \
+            -> list[types.Message]:
+        """
+        Выбирает из истории чата сообщения, на которые нужно сгенерировать события.
+        Если ID последнего известного сообщения есть - все сообщения после него; если чат известен, но ID нет
+        (например, после первого запуска) - сообщения после последнего сохраненного; если чат новый - сообщения
+        после последнего своего сообщения. Сообщения, отправленные ботом, пропускаются.
+
+        :param saved: сохраненное последнее сообщение чата (None, если чат новый).
+
+        :param history: новые сообщения чата от старых к новым.
+
+        :return: список сообщений.
+        """
+        if not history:
+            return []
+        if saved is not None and saved.last_id is not None:
+            messages = [msg for msg in history if msg.id > saved.last_id]
+        elif saved is not None and saved.text:
+            key = self.message_key(saved.text)
+            for index in range(len(history) - 1, -1, -1):
+                if self.message_key(history[index].text).startswith(key):
+                    messages = history[index + 1:]
+                    break
+            else:
+                messages = history[-1:]
+        else:
+            index = len(history)
+            while index and history[index - 1].author_id != self.account.id:
+                index -= 1
+            messages = history[index:][-self.history_size:]
+
+        if saved is not None:
+            messages = [msg for msg in messages if not (msg.author_id in (self.account.id, None)
+                                                        and saved.pop_sent(self.message_key(msg.text)))]
+        return messages
+
+    @staticmethod
+    def message_key(text: str) -> str:
+        """
+        Приводит текст сообщения к виду, в котором он хранится в кэше (для сравнения отправленных и полученных
+        сообщений).
+        """
+        return text.replace("[a][/a]", "").strip()[:250]
+
+    def get_cached_messages(self, node_id: int) -> list[tuple[int, int | None, str]]:
+        """
+        Возвращает закэшированные последние сообщения чата.
+
+        :param node_id: ID чата.
+
+        :return: список (ID сообщения, ID автора, текст) от старых к новым.
+        """
+        with self.state_lock:
+            saved = self.saved_messages.get(node_id)
+            return list(saved.history) if saved is not None and saved.history is not None else []
+
+    def orders_fetch_needed(self, counters: dict, tag_changed: bool = True) -> bool:
+        """
+        Решает по объекту orders_counters, нужно ли загружать страницу продаж.
+        По счетчикам нельзя понять, что продажи не менялись (новый заказ и закрытие другого оставляют счетчик продаж
+        прежним), поэтому загрузка пропускается, только если не изменились ни тег, ни оба счетчика (повтор объекта).
+
+        :param counters: счетчики заказов (objects -> orders_counters -> data) {"buyer": ..., "seller": ...}.
+
+        :param tag_changed: изменился ли тег объекта orders_counters.
+
+        :return: True, если страницу продаж нужно загрузить, иначе False.
+        """
+        new_counters = (int(counters.get("buyer", 0)), int(counters.get("seller", 0)))
+        old_counters = self.last_orders_counters
+        self.last_orders_counters = new_counters
+        if self.first_request or old_counters is None or tag_changed or new_counters != old_counters:
+            return True
+        logger.debug("Тег и счетчики заказов не изменились - страница продаж не загружается.")
+        return False
+
+    @staticmethod
+    def set_timings(events: list[types.Event], timings: dict[str, float]) -> None:
+        """
+        Записывает временные метки этапов получения в события (для трассировки задержки обработки заказов).
+
+        :param events: события.
+
+        :param timings: временные метки (см. types.Event.timings).
+        """
+        for event in events:
+            event.timings = timings
+
+    def parse_orders(self, orders_list: Iterable[types.Order]) -> list[types.Event]:
+        """
+        Сравнивает полученные заказы с сохраненными и генерирует события.
+        Заказы идут от новых к старым, поэтому, если первый известный заказ на странице - самый новый из сохраненных
+        (порядок не изменился), сравнение прекращается на первом известном заказе с неизменным статусом, когда
+        встречены все сохраненные незавершенные заказы (только у них может измениться статус). Если orders_list -
+        генератор (parsers.iter_orders()), то оставшаяся часть страницы не парсится. Иначе просматривается весь список.
+
+        :param orders_list: заказы (Account.get_orders() или parsers.iter_orders()).
 
+        :return: список событий, связанных с заказами.
+        """
+        events = []
+        new_orders = []
+        known_found = False
+        ordered = False
+        newest = next(reversed(self.saved_orders.keys()), None)
+        pending = {i for i, order in self.saved_orders.items() if order.status == types.OrderStatuses.OUTSTANDING}
+        for order in orders_list:
+            pending.discard(order.id)
+            if order.id not in self.saved_orders:
+                if known_found and (ordered or order.status != types.OrderStatuses.OUTSTANDING):
+                    # Неизвестный заказ ниже известного - старый заказ, вытесненный из self.saved_orders
+                    # (незавершенные заказы не вытесняются, поэтому при измененном порядке они считаются новыми).
+                    continue
+                if self.first_request:
+                    event = types.InitialOrderEvent(order, self.last_order_event_tag)
+                    events.append(event)
+                else:
+                    event = types.NewOrderEvent(order, self.last_order_event_tag)
+                    events.append(event)
+                    if order.status == types.OrderStatuses.COMPLETED:
+                        event2 = types.OrderStatusChangedEvent(order, self.last_order_event_tag)
+                        events.append(event2)
+                new_orders.append(order)
+                continue
+
+            if not known_found:
+                known_found = True
+                ordered = order.id == newest
+            if order.status != self.saved_orders[order.id].status:
+                event = types.OrderStatusChangedEvent(order_obj=order, tag=self.last_order_event_tag)
+                events.append(event)
+                self.update_saved_order(order)
+            elif ordered and not pending:
+                break
+        # Сохраняем новые заказы от старых к новым, чтобы порядок self.saved_orders был хронологическим.
+        for order in reversed(new_orders):
+            self.update_saved_order(order)
         return events
 
     def update_saved_message(self, message_obj: types.Message) -> None:
@@ -166,10 +504,19 @@ class Runner:
 
         :param message_obj: экземпляр класса, описывающего сообщение.
         """
-        message_copy = deepcopy(message_obj)
-        message_copy.text = message_copy.text.replace("[a][/a]", "")
-        message_copy.text = message_copy.text[:250]
-        self.saved_messages[message_copy.node_id] = message_copy
+        text = message_obj.text.replace("[a][/a]", "")[:250]
+        with self.state_lock:
+            saved = self.saved_messages.get(message_obj.node_id)
+            if saved is None:
+                saved = state.SavedMessage(message_obj.node_id, text, message_obj.chat_with)
+            saved.text = text
+            if message_obj.chat_with is not None:
+                saved.chat_with = message_obj.chat_with
+            if self.history_size:
+                saved.remember_sent(self.message_key(message_obj.text), self.history_size)
+            self.saved_messages[message_obj.node_id] = saved
+            # Сохраняется в конце цикла listen(), чтобы после перезапуска свое сообщение не было принято за новое.
+            self.state_dirty = True
 
     def update_saved_order(self, order: types.Order) -> None:
         """
@@ -177,30 +524,178 @@ class Runner:
 
         :param order: экземпляр класса, описывающего заказа.
         """
-        self.saved_orders[order.id] = order
+        with self.state_lock:
+            self.saved_orders[order.id] = state.SavedOrder.from_order(order, self.keep_orders_html)
 
-    def listen(self, delay: float | int = 6.0, ignore_exceptions: bool = True) \
+    def warm_start(self) -> bool:
+        """
+        Один раз (перед первым запросом) загружает сохраненное состояние из self.state_path.
+
+        :return: True, если состояние загружено, иначе False.
+        """
+        if self.state_loaded or not self.first_request or not self.state_path:
+            return False
+        self.state_loaded = True
+        try:
+            loaded = self.load_state()
+        except:
+            logger.error(f"Не удалось загрузить состояние Runner'а из файла {self.state_path}.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            return False
+        if loaded:
+            self.first_request = False
+            logger.info(f"Загружено состояние Runner'а: {len(self.saved_messages)} чатов, "
+                        f"{len(self.saved_orders)} заказов.")
+        return loaded
+
+    def load_state(self) -> bool:
+        """
+        Загружает состояние Runner'а из self.state_path.
+
+        :return: True, если состояние загружено, False, если файла нет или он относится к другому аккаунту.
+        """
+        if not self.state_path or not os.path.exists(self.state_path):
+            return False
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            data = json.loads(f.read())
+        if data.get("account_id") != self.account.id:
+            return False
+
+        self.last_message_event_tag = data["last_message_event_tag"]
+        self.last_order_event_tag = data["last_order_event_tag"]
+        counters = data.get("last_orders_counters")
+        self.last_orders_counters = tuple(counters) if counters else None
+        self.saved_messages.clear()
+        for i in data["messages"]:
+            self.saved_messages[int(i[0])] = state.SavedMessage.from_list(i)
+        self.saved_orders.clear()
+        for i in data["orders"]:
+            self.saved_orders[i[0]] = state.SavedOrder.from_list(i)
+        return True
+
+    def flush_state(self) -> bool:
+        """
+        Сохраняет состояние Runner'а, если оно изменилось с момента последнего сохранения.
+        Вызывается listen() после обработки событий каждого опроса; при завершении работы нужно вызвать вручную.
+
+        :return: True, если состояние было сохранено, иначе False.
+        """
+        with self.state_lock:
+            if not self.state_dirty:
+                return False
+            self.state_dirty = False
+        self.save_state()
+        return True
+
+    def save_state(self) -> None:
+        """
+        Атомарно сохраняет состояние Runner'а в self.state_path (если задан).
+        Под self.state_lock собирается только снимок состояния, запись в файл выполняется без этой блокировки.
+        """
+        if not self.state_path:
+            return
+        with self.state_file_lock:
+            with self.state_lock:
+                data = {
+                    "account_id": self.account.id,
+                    "saved_at": int(time.time()),
+                    "last_message_event_tag": self.last_message_event_tag,
+                    "last_order_event_tag": self.last_order_event_tag,
+                    "last_orders_counters": self.last_orders_counters,
+                    "messages": [i.to_list() for i in self.saved_messages.values()],
+                    "orders": [i.to_list() for i in self.saved_orders.values()]
+                }
+            try:
+                folder = os.path.dirname(self.state_path)
+                if folder and not os.path.exists(folder):
+                    os.makedirs(folder)
+                # Как Utils.storage.atomic_write (FunPayAPI не зависит от Utils): временный файл и запись каталога
+                # сбрасываются на диск, чтобы после сбоя питания файл состояния не оказался пустым или обрезанным.
+                with open(f"{self.state_path}.tmp", "w", encoding="utf-8") as f:
+                    f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(f"{self.state_path}.tmp", self.state_path)
+                if os.name != "nt":
+                    fd = os.open(folder or ".", os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+            except:
+                logger.error(f"Не удалось сохранить состояние Runner'а в файл {self.state_path}.")
+                logger.debug("------TRACEBACK------", exc_info=True)
+
+    def memory_report(self) -> dict:
+        """
+        Возвращает кол-во записей и примерный объем памяти, занимаемый сохраненным состоянием Runner'а.
+
+        :return: {"saved_messages": {...}, "saved_orders": {...}} (см. StateStore.memory_report()).
+        """
+        return {"saved_messages": self.saved_messages.memory_report(),
+                "saved_orders": self.saved_orders.memory_report()}
+
+    def make_interval(self, delay: float | int, min_delay: float | int | None) -> polling.AdaptiveInterval:
+        """
+        Создает интервал опроса для listen(). Если min_delay не указан (или не меньше delay), интервал постоянный.
+        """
+        if min_delay is None or min_delay >= delay:
+            return polling.AdaptiveInterval(delay, delay, max_error_delay=delay, jitter=0)
+        return polling.AdaptiveInterval(min_delay, delay)
+
+    def listen(self, delay: float | int = 6.0, ignore_exceptions: bool = True, min_delay: float | int | None = None) \
             -> Iterator[types.Event]:
         """
         "Слушает" FunPay в ожидании новых событий.
 
-        :param delay: задержка между запросами.
+        :param delay: задержка между запросами (если передан min_delay - максимальная задержка при простое).
 
         :param ignore_exceptions: игнорировать ошибки при выполнении запросов.
+
+        :param min_delay: минимальная задержка между запросами. Если передан, задержка адаптивная: сразу после
+        событий - min_delay, при простое плавно растет до delay, при ошибках - быстро растет до 60 секунд.
         """
         if not self.account.is_authorized():
             raise exceptions.NotAuthorized()
 
+        interval = self.make_interval(delay, min_delay)
         while True:
+            start = time.monotonic()
             try:
                 updates = self.get_updates()
+                self.on_poll(time.monotonic() - start, len(updates))
+                if updates:
+                    interval.on_activity()
+                else:
+                    interval.on_idle()
                 for event in updates:
                     yield event
             except Exception as e:
+                self.on_poll(time.monotonic() - start, None)
                 if not ignore_exceptions:
                     raise e
                 else:
+                    interval.on_error()
                     logger.error("Произошла ошибка при получении событий "
                                  "(ничего страшного, если это сообщение появляется нечасто).")
                     logger.debug("------TRACEBACK------", exc_info=True)
-            time.sleep(delay)
+            # Состояние сохраняется раз за опрос и только после передачи всех его событий обработчику.
+            self.flush_state()
+            self.poll_interval = interval.current
+            time.sleep(interval.next_delay())
+
+    def on_poll(self, duration: float, events_count: int | None) -> None:
+        """
+        Передает данные об опросе FunPay в self.poll_hook (если он установлен).
+
+        :param duration: длительность get_updates() в секундах.
+
+        :param events_count: кол-во полученных событий или None, если опрос завершился ошибкой.
+        """
+        if self.poll_hook is None:
+            return
+        try:
+            self.poll_hook(duration, events_count)
+        except:
+            logger.debug("Произошла ошибка в poll_hook.")
+            logger.debug("------TRACEBACK------", exc_info=True)
@@ -0,0 +1,268 @@
+"""
+В данном модуле написано ограниченное по размеру хранилище состояния Runner'а (последние сообщения чатов и
+состояния заказов).
+"""
+
+from collections import OrderedDict, deque
+from typing import Callable, Any, Iterator
+import time
+import sys
+
+from . import types
+
+
+class SavedMessage:
+    """
+    Компактная запись о последнем сообщении чата и кэш его последних сообщений.
+    """
+    __slots__ = ("node_id", "text", "chat_with", "last_id", "history", "sent", "saved_at")
+
+    def __init__(self, node_id: int, text: str, chat_with: str | None, last_id: int | None = None):
+        """
+        :param node_id: ID чата.
+
+        :param text: текст последнего сообщения (как в списке чатов).
+
+        :param chat_with: никнейм собеседника.
+
+        :param last_id: ID последнего известного сообщения чата (None - неизвестен).
+        """
+        self.node_id = node_id
+        self.text = text
+        self.chat_with = chat_with
+        self.last_id = last_id
+        # Последние сообщения чата (ID, ID автора, текст) и тексты последних сообщений, отправленных ботом.
+        # Создаются при первом использовании, чтобы не занимать память для неактивных чатов.
+        self.history: deque[tuple[int, int | None, str]] | None = None
+        self.sent: deque[str] | None = None
+        self.saved_at = time.time()
+
+    def remember(self, messages: list[types.Message], max_size: int) -> None:
+        """
+        Добавляет сообщения в кэш чата и обновляет ID последнего известного сообщения.
+
+        :param messages: сообщения от старых к новым.
+
+        :param max_size: максимальное кол-во сообщений в кэше чата.
+        """
+        if not messages:
+            return
+        if self.history is None:
+            self.history = deque(maxlen=max_size)
+        for msg in messages:
+            self.history.append((msg.id, msg.author_id, msg.text))
+        self.last_id = max(self.last_id or 0, messages[-1].id)
+
+    def remember_sent(self, text: str, max_size: int) -> None:
+        """
+        Запоминает текст сообщения, отправленного ботом (чтобы не генерировать для него событие).
+
+        :param text: текст сообщения.
+
+        :param max_size: максимальное кол-во запоминаемых текстов.
+        """
+        if self.sent is None:
+            self.sent = deque(maxlen=max_size)
+        self.sent.append(text)
+
+    def pop_sent(self, text: str) -> bool:
+        """
+        Проверяет, было ли сообщение с таким текстом отправлено ботом, и забывает его.
+
+        :param text: текст сообщения.
+
+        :return: True, если сообщение было отправлено ботом, иначе False.
+        """
+        if not self.sent or text not in self.sent:
+            return False
+        self.sent.remove(text)
+        return True
+
+    @staticmethod
+    def from_message(message_obj: types.Message) -> "SavedMessage":
+        return SavedMessage(message_obj.node_id, message_obj.text, message_obj.chat_with)
+
+    def to_list(self) -> list:
+        return [self.node_id, self.text, self.chat_with, self.last_id]
+
+    @staticmethod
+    def from_list(data: list) -> "SavedMessage":
+        return SavedMessage(int(data[0]), data[1], data[2], data[3] if len(data) > 3 else None)
+
+
+class SavedOrder:
+    """
+    Компактная запись о состоянии заказа (по умолчанию без HTML).
+    """
+    __slots__ = ("id", "title", "price", "buyer_username", "buyer_id", "status", "html", "saved_at")
+
+    def __init__(self, id_: str, title: str, price: float, buyer_username: str, buyer_id: int,
+                 status: types.OrderStatuses, html: str | None = None):
+        """
+        :param id_: ID заказа.
+
+        :param title: краткое описание заказа.
+
+        :param price: оплаченная сумма за заказ.
+
+        :param buyer_username: никнейм покупателя.
+
+        :param buyer_id: ID покупателя.
+
+        :param status: статус заказа.
+
+        :param html: HTML код заказа (None, если не сохраняется).
+        """
+        self.id = id_
+        self.title = title
+        self.price = price
+        self.buyer_username = buyer_username
+        self.buyer_id = buyer_id
+        self.status = status
+        self.html = html
+        self.saved_at = time.time()
+
+    @staticmethod
+    def from_order(order: types.Order, keep_html: bool = False) -> "SavedOrder":
+        return SavedOrder(order.id, order.title, order.price, order.buyer_username, order.buyer_id, order.status,
+                          order.html if keep_html else None)
+
+    def to_list(self) -> list:
+        return [self.id, self.status.name, self.title, self.price, self.buyer_username, self.buyer_id]
+
+    @staticmethod
+    def from_list(data: list) -> "SavedOrder":
+        return SavedOrder(data[0], data[2], data[3], data[4], data[5], types.OrderStatuses[data[1]])
+
+
+class StateStore:
+    """
+    Словарь с ограничением по кол-ву записей и времени жизни записей.
+    Записи хранятся в порядке последнего изменения (если move_on_update=True) или добавления (если False);
+    при переполнении удаляются самые старые записи. Самая новая запись никогда не удаляется по TTL.
+    """
+    def __init__(self, max_size: int | None = None, ttl: float | int | None = None, move_on_update: bool = True,
+                 can_evict: Callable[[Any], bool] | None = None):
+        """
+        :param max_size: максимальное кол-во записей (None - без ограничения).
+
+        :param ttl: время жизни записи в секундах с момента последнего изменения / touch() (None - бессрочно).
+
+        :param move_on_update: переносить ли запись в конец очереди на удаление при перезаписи (LRU).
+        Если False - записи удаляются в порядке добавления.
+
+        :param can_evict: функция, принимающая запись и возвращающая False, если запись удалять нельзя
+        (например, незавершенный заказ).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.move_on_update = move_on_update
+        self.can_evict = can_evict
+        self.__data: OrderedDict = OrderedDict()
+        self.evicted = 0
+        self.__last_ttl_check = 0.0
+
+    def __contains__(self, key) -> bool:
+        return key in self.__data
+
+    def __getitem__(self, key):
+        return self.__data[key]
+
+    def __setitem__(self, key, value) -> None:
+        exists = key in self.__data
+        self.__data[key] = value
+        if exists and self.move_on_update:
+            self.__data.move_to_end(key)
+        self.evict()
+
+    def __delitem__(self, key) -> None:
+        del self.__data[key]
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.__data)
+
+    def get(self, key, default=None):
+        return self.__data.get(key, default)
+
+    def pop(self, key, default=None):
+        return self.__data.pop(key, default)
+
+    def keys(self):
+        return self.__data.keys()
+
+    def values(self):
+        return self.__data.values()
+
+    def items(self):
+        return self.__data.items()
+
+    def clear(self) -> None:
+        self.__data.clear()
+
+    def touch(self, key) -> None:
+        """
+        Обновляет время жизни записи (и ее место в очереди на удаление, если move_on_update=True).
+
+        :param key: ключ записи.
+        """
+        value = self.__data.get(key)
+        if value is None:
+            return
+        if hasattr(value, "saved_at"):
+            value.saved_at = time.time()
+        if self.move_on_update:
+            self.__data.move_to_end(key)
+
+    def evict(self) -> int:
+        """
+        Удаляет просроченные записи и самые старые записи сверх max_size.
+
+        :return: кол-во удаленных записей.
+        """
+        removed = 0
+        now = time.time()
+        # Проверка TTL проходит по всем записям, поэтому выполняется не чаще раза в секунду.
+        if self.ttl is not None and len(self.__data) > 1 and now - self.__last_ttl_check >= 1:
+            self.__last_ttl_check = now
+            deadline = now - self.ttl
+            last_key = next(reversed(self.__data))
+            expired = [k for k, v in self.__data.items()
+                       if k != last_key and getattr(v, "saved_at", now) < deadline
+                       and (self.can_evict is None or self.can_evict(v))]
+            for key in expired:
+                del self.__data[key]
+            removed += len(expired)
+
+        if self.max_size is not None and len(self.__data) > self.max_size:
+            overflow = len(self.__data) - self.max_size
+            oldest = []
+            for key, value in self.__data.items():
+                if len(oldest) >= overflow:
+                    break
+                if self.can_evict is None or self.can_evict(value):
+                    oldest.append(key)
+            for key in oldest:
+                del self.__data[key]
+            removed += len(oldest)
+        self.evicted += removed
+        return removed
+
+    def memory_report(self) -> dict:
+        """
+        Возвращает кол-во записей и примерный объем занимаемой ими памяти.
+
+        :return: {"entries": кол-во записей, "bytes": примерный объем в байтах, "evicted": кол-во удаленных записей}.
+        """
+        total = sys.getsizeof(self.__data)
+        for key, value in self.__data.items():
+            total += sys.getsizeof(key) + sys.getsizeof(value)
+            for slot in getattr(value, "__slots__", ()):
+                attr = getattr(value, slot, None)
+                if isinstance(attr, str):
+                    total += sys.getsizeof(attr)
+                elif isinstance(attr, deque):
+                    total += sys.getsizeof(attr) + sum(sys.getsizeof(i) for i in attr)
+        return {"entries": len(self.__data), "bytes": total, "evicted": self.evicted}
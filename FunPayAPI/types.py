@@ -17,8 +17,22 @@ class Links:
     USER = "https://funpay.com/users"
     RAISE = "https://funpay.com/lots/raise"
     RUNNER = "https://funpay.com/runner/"
+    CHAT = "https://funpay.com/chat/"
     REFUND = "https://funpay.com/orders/refund"
 
+    @classmethod
+    def set_base_url(cls, base_url: str) -> None:
+        """
+        Заменяет адрес FunPay во всех ссылках (например, на адрес локального эмулятора Utils/funpay_emulator.py).
+        Должен вызываться до создания экземпляров Account / Runner.
+
+        :param base_url: новый адрес (например, http://127.0.0.1:8080).
+        """
+        base_url = base_url.rstrip("/")
+        for name in ("ORDERS", "USER", "RAISE", "RUNNER", "CHAT", "REFUND"):
+            setattr(cls, name, base_url + getattr(cls, name)[len(cls.BASE_URL):])
+        cls.BASE_URL = base_url
+
 
 class EventTypes(Enum):
     """
@@ -203,7 +217,7 @@ class Message:
     Класс, хранящий информацию о сообщении.
     """
     def __init__(self, text: str, node_id: int, chat_with: str | None, unread: bool = False,
-                 set_sys_type: bool = False):
+                 set_sys_type: bool = False, id_: int | None = None, author_id: int | None = None):
         """
         :param text: текст сообщения.
 
@@ -214,7 +228,13 @@ class Message:
         :param unread: установлен ли флаг "unread" у чата, в котором получено сообщение (на момент получения сообщения)
 
         :param set_sys_type: устанавливать ли тип системного сообщения (не нужно, если сообщение отправляется ботом)
+
+        :param id_: ID сообщения (None, если сообщение получено из списка чатов или еще не отправлено).
+
+        :param author_id: ID автора сообщения (0 - системное сообщение FunPay, None - неизвестен).
         """
+        self.id: int | None = id_
+        self.author_id: int | None = author_id
         self.node_id: int = node_id
         self.text: str = text
         self.chat_with: str = chat_with
@@ -328,6 +348,10 @@ class Event:
         self.type = event_type
         self.time = event_time
         self.tag = tag
+        # Временные метки (time.time()) этапов получения события Runner'ом: {"poll": начало запроса,
+        # "runner": получен ответ runner'а, "orders": загружена страница продаж, "parsed": событие создано}.
+        # Заполняются только для событий заказов, полученных через Runner.get_updates().
+        self.timings: dict[str, float] = {}
 
 
 class InitialMessageEvent(Event):
@@ -2,8 +2,50 @@
 В данном модуле написаны вспомогательные функции.
 """
 
+from urllib.parse import urlsplit
 import string
 import random
+import re
+
+
+class LogPayload:
+    """
+    Обертка для логирования больших ответов FunPay: приводится к строке только при форматировании записи лога
+    (в потоке логгера) и обрезается до limit символов.
+    """
+    __slots__ = ("payload", "limit")
+
+    def __init__(self, payload, limit: int = 2000):
+        """
+        :param payload: ответ FunPay (строка, словарь и т.д.).
+
+        :param limit: максимальное кол-во символов в логе.
+        """
+        self.payload = payload
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = str(self.payload)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... (обрезано, всего {len(text)} симв.)"
+
+
+ID_SEGMENT_RE = re.compile(r"^(?=.*\d)[\w-]+$|^[A-Z0-9]{8}$")
+
+
+def get_endpoint(url: str) -> str:
+    """
+    Приводит ссылку запроса к названию эндпоинта для метрик: отбрасывает хост и query-параметры и заменяет
+    ID (части пути с цифрами и ID заказов) на {id}.
+    Пример: https://funpay.com/orders/ABCD1234/ -> /orders/{id}/
+
+    :param url: ссылка.
+
+    :return: название эндпоинта.
+    """
+    path = urlsplit(url).path or "/"
+    return "/".join("{id}" if ID_SEGMENT_RE.match(i) else i for i in path.split("/"))
 
 
 def gen_random_tag() -> str:
@@ -43,3 +85,19 @@ def get_wait_time_from_raise_response(response: str) -> int:
         return (int(response[1])) * 3600
     else:
         return 10
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Парсит значение заголовка Retry-After (кол-во секунд).
+
+    :param value: значение заголовка.
+
+    :return: кол-во секунд или None, если заголовка нет или он в другом формате (дата).
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,405 @@
+"""
+В данном модуле написаны бенчмарки парсеров FunPayAPI и горячих участков FPC: обработка ответа Runner'а
+(10 / 100 / 1000 чатов), страница продаж, страница пользователя, определение типа системного сообщения,
+выдача / подсчет товаров из файла на 100 000 строк и подстановка переменных в шаблоны ответов.
+
+Страницы FunPay генерируются детерминированно функциями эмулятора (Utils/funpay_emulator.py) и отдаются
+FunPayAPI через FixtureSession вместо requests.Session, поэтому измеряется весь путь от ответа сервера до событий
+без обращений к сети.
+
+Запуск:
+    python main.py --bench                  - запустить бенчмарки и сравнить с сохраненными результатами.
+    python main.py --bench --save-baseline  - запустить бенчмарки и сохранить результаты как базовые.
+    python main.py --bench --filter runner  - запустить только бенчмарки, в названии которых есть "runner".
+
+Если время бенчмарка больше базового более чем в --threshold раз, бенчмарк считается регрессией, и программа
+завершается с кодом 1. Базовые результаты (BASELINE_PATH) хранятся в репозитории вместе с версией Python и
+платформой, на которых они сняты. На другой машине сравнение ориентировочное: перед поиском регрессий стоит снять
+свои базовые результаты (--save-baseline) на исходной версии кода.
+"""
+
+from __future__ import annotations
+from typing import Callable, Iterator, Any
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests.cookies
+import requests
+import statistics
+import platform
+import tempfile
+import argparse
+import shutil
+import timeit
+import json
+import time
+import sys
+import os
+
+import FunPayAPI
+import FunPayAPI.users
+import Utils.cardinal_tools
+import Utils.products
+from Utils import funpay_emulator
+from Utils import storage
+
+
+BASELINE_PATH = "storage/benchmarks/baseline.json"
+# Во сколько раз время бенчмарка может превышать базовое без признания регрессии.
+DEFAULT_THRESHOLD = 1.25
+
+USER_ID = 1000000
+USERNAME = "BenchSeller"
+
+
+def make_response(body: str, status_code: int = 200, cookies: dict[str, str] | None = None) -> requests.Response:
+    """
+    :return: объект ответа requests с переданным телом.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body.encode("utf-8")
+    response.encoding = "utf-8"
+    response.cookies = requests.cookies.cookiejar_from_dict(cookies or {})
+    return response
+
+
+class FixtureSession:
+    """
+    Заменяет requests.Session аккаунта: отвечает заранее сгенерированными страницами по пути ссылки
+    (без домена), на неизвестные пути - 404.
+    """
+    def __init__(self, routes: dict[str, str]):
+        """
+        :param routes: {путь (например, /orders/trade): тело ответа}.
+        """
+        self.routes = routes
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        path = urlsplit(url).path or "/"
+        if path not in self.routes:
+            return make_response("Not found", 404)
+        cookies = {"PHPSESSID": "benchsessionid"} if path == "/" else None
+        return make_response(self.routes[path], cookies=cookies)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("get", url, **kwargs)
+
+
+# Фикстуры
+def make_bookmarks(chats: int, message: str = "Сообщение") -> str:
+    """
+    :param chats: кол-во чатов.
+
+    :param message: текст последнего сообщения каждого чата (к нему добавляется номер чата).
+
+    :return: HTML списка чатов.
+    """
+    return funpay_emulator.make_chat_bookmarks([
+        funpay_emulator.make_chat_bookmark(50000000 + i, f"Buyer{i}", f"{message} {i}", unread=i % 3 == 0)
+        for i in range(chats)
+    ])
+
+
+def make_runner_response(chats: int) -> str:
+    """
+    :return: ответ runner'а с объектом chat_bookmarks на chats чатов.
+    """
+    return json.dumps({"objects": [{"type": "chat_bookmarks", "id": USER_ID, "tag": "benchtag",
+                                    "data": {"html": make_bookmarks(chats)}}],
+                       "response": False}, ensure_ascii=False)
+
+
+def make_orders(amount: int) -> str:
+    """
+    :return: HTML страницы продаж на amount заказов (оплаченные, закрытые и возвраты).
+    """
+    statuses = ("paid", "closed", "closed", "refund")
+    return funpay_emulator.make_orders_page(USERNAME, [
+        funpay_emulator.make_order_item(f"{i:08d}", f"Тестовый лот {i}, аккаунт с почтой и гарантией", 100 + i,
+                                        f"Buyer{i % 500}", 2000000 + i % 500, statuses[i % len(statuses)])
+        for i in range(amount)
+    ])
+
+
+def make_profile(categories: int, lots_per_category: int) -> str:
+    """
+    :return: HTML страницы пользователя с categories категориями по lots_per_category лотов.
+    """
+    category_list = [(100 + i, f"Тестовая игра {i}, Аккаунты", i % 5 == 4) for i in range(categories)]
+    lots = [(100 + i, 10000 + i * lots_per_category + j, f"Тестовый лот {j}, быстрая выдача", 10 + j)
+            for i in range(categories) for j in range(lots_per_category)]
+    return funpay_emulator.make_user_page(USERNAME, category_list, lots)
+
+
+def make_account(routes: dict[str, str]) -> FunPayAPI.Account:
+    """
+    :param routes: страницы, кроме главной (см. FixtureSession).
+
+    :return: авторизованный аккаунт, отправляющий запросы в FixtureSession.
+    """
+    account = FunPayAPI.Account("0" * 32)
+    account.session = FixtureSession({"/": funpay_emulator.make_main_page(USER_ID, USERNAME, "benchcsrftoken"),
+                                      **routes})
+    return account.get()
+
+
+SYSTEM_MESSAGES = [
+    "Привет! Когда будет выдача?",
+    "Здравствуйте, подскажите, пожалуйста, есть ли в наличии аккаунты с почтой? " * 5,
+    "Покупатель Buyer1 оплатил заказ #ABCD1234. Тестовый лот. Buyer1, не забудьте потом нажать кнопку "
+    "«Подтвердить выполнение заказа».",
+    "Покупатель Buyer1 подтвердил успешное выполнение заказа #ABCD1234 и отправил деньги продавцу BenchSeller.",
+    "Покупатель Buyer1 написал отзыв к заказу #ABCD1234.",
+    "Продавец BenchSeller ответил на отзыв к заказу #ABCD1234.",
+    "Продавец BenchSeller вернул деньги покупателю Buyer1 по заказу #ABCD1234.",
+    "Заказ #ABCD1234 открыт повторно.",
+    "Номер заказа #ABCD1234, посмотрите, пожалуйста."
+]
+
+MESSAGE_TEMPLATE = "Привет, $username! Ваше сообщение: \"$message_text\" ($node_id), $full_date_text $time."
+ORDER_TEMPLATE = "Спасибо за покупку, $username (ID $buyer_id)! Заказ $order_id ($order_desc) за $order_price ₽.\n" \
+                 "Ваш товар ($product_amount шт.):\n$product\nДата: $date $full_time."
+
+
+# Бенчмарки
+BENCHMARKS: dict[str, Callable[[], Any]] = {}
+
+
+def benchmark(name: str):
+    """
+    Регистрирует бенчмарк. Декорируемая функция - генератор: код до yield подготавливает данные, yield возвращает
+    измеряемую функцию (без аргументов), код после yield освобождает ресурсы.
+
+    :param name: название бенчмарка.
+    """
+    def decorator(func: Callable[[], Iterator[Callable[[], Any]]]):
+        BENCHMARKS[name] = contextmanager(func)
+        return func
+    return decorator
+
+
+def register_runner_benchmarks(chats: int) -> None:
+    @benchmark(f"runner.get_updates[{chats} chats, first request]")
+    def first_request():
+        account = make_account({"/runner/": make_runner_response(chats)})
+        yield lambda: FunPayAPI.Runner(account).get_updates()
+
+    @benchmark(f"runner.get_updates[{chats} chats, no changes]")
+    def no_changes():
+        account = make_account({"/runner/": make_runner_response(chats)})
+        runner = FunPayAPI.Runner(account)
+        runner.get_updates()
+        yield runner.get_updates
+
+
+register_runner_benchmarks(10)
+register_runner_benchmarks(100)
+register_runner_benchmarks(1000)
+
+
+@benchmark("account.get_orders[100 orders]")
+def get_orders_100():
+    account = make_account({"/orders/trade": make_orders(100)})
+    yield lambda: account.get_orders(include_completed=True, include_refund=True)
+
+
+@benchmark("account.get_orders[1000 orders]")
+def get_orders_1000():
+    account = make_account({"/orders/trade": make_orders(1000)})
+    yield lambda: account.get_orders(include_completed=True, include_refund=True)
+
+
+@benchmark("users.get_user[50 categories x 40 lots]")
+def get_user():
+    session = FixtureSession({f"/users/{USER_ID}/": make_profile(50, 40)})
+    yield lambda: FunPayAPI.users.get_user(USER_ID, include_currency=True, session=session)
+
+
+@benchmark(f"types.Message.get_system_type[{len(SYSTEM_MESSAGES)} messages]")
+def get_system_type():
+    messages = [FunPayAPI.types.Message(text, 1, "Buyer1") for text in SYSTEM_MESSAGES]
+
+    def run():
+        for message in messages:
+            message.get_system_type()
+    yield run
+
+
+@contextmanager
+def products_file(lines: int) -> Iterator[str]:
+    """
+    Создает файл с товарами во временной папке и делает ее рабочей (состояние хранилища товаров пишется
+    в storage/cache/products относительно рабочей папки).
+
+    :return: путь до файла с товарами.
+    """
+    cwd = os.getcwd()
+    folder = tempfile.mkdtemp(prefix="fpc_bench_")
+    os.chdir(folder)
+    try:
+        os.makedirs("storage/products")
+        path = "storage/products/bench.txt"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(f"login{i}:password{i}:mail{i}@example.com" for i in range(lines)))
+        yield path
+        Utils.products.forget(path)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+@benchmark("cardinal_tools.get_product[100000 lines]")
+def get_product():
+    with products_file(100000) as path:
+        Utils.cardinal_tools.count_products(path)
+        yield lambda: Utils.cardinal_tools.get_product(path, 1)
+
+
+@benchmark("cardinal_tools.count_products[100000 lines, cached]")
+def count_products_cached():
+    with products_file(100000) as path:
+        # Файл не изменялся: кол-во товаров берется из состояния хранилища без чтения файла.
+        Utils.cardinal_tools.count_products(path)
+        yield lambda: Utils.cardinal_tools.count_products(path)
+
+
+@benchmark("cardinal_tools.count_products[100000 lines, cold]")
+def count_products_cold():
+    with products_file(100000) as path:
+        # Каждый раз считается файл без состояния (как после ручного редактирования или первого запуска).
+        def run():
+            Utils.products.forget(path)
+            Utils.cardinal_tools.count_products(path)
+        yield run
+
+
+@benchmark("cardinal_tools.format_msg_text")
+def format_msg_text():
+    message = FunPayAPI.types.Message("Привет, есть в наличии?", 50000000, "Buyer1")
+    yield lambda: Utils.cardinal_tools.format_msg_text(MESSAGE_TEMPLATE, message)
+
+
+@benchmark("cardinal_tools.format_order_text")
+def format_order_text():
+    order = FunPayAPI.parsers.parse_orders(make_orders(1))[0]
+    extra = {"$product": "login:password", "$product_amount": "1"}
+    yield lambda: Utils.cardinal_tools.format_order_text(ORDER_TEMPLATE, order, extra)
+
+
+# Запуск
+def measure(func: Callable[[], Any], rounds: int) -> dict[str, float | int]:
+    """
+    Измеряет время выполнения функции: кол-во вызовов в раунде подбирается так, чтобы раунд длился не меньше 0.2
+    секунды, затем выполняется rounds раундов.
+
+    :return: {"min": лучшее время одного вызова, "median": медиана, "number": вызовов в раунде} (время - в секундах).
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [i / number for i in timer.repeat(rounds, number)]
+    return {"min": min(times), "median": statistics.median(times), "number": number}
+
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f} с"
+    if seconds >= 0.001:
+        return f"{seconds * 1000:.3f} мс"
+    return f"{seconds * 1000000:.2f} мкс"
+
+
+def load_baseline(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.read())
+
+
+def run(names: list[str], rounds: int, baseline: dict | None, threshold: float) -> tuple[dict, list[str]]:
+    """
+    Запускает бенчмарки и сравнивает результаты с базовыми.
+
+    :param names: названия бенчмарков.
+
+    :param rounds: кол-во раундов каждого бенчмарка.
+
+    :param baseline: базовые результаты ({название: результат measure()}) или None.
+
+    :param threshold: допустимое отношение времени к базовому.
+
+    :return: (результаты, названия бенчмарков с регрессией).
+    """
+    results = {}
+    regressions = []
+    for name in names:
+        with BENCHMARKS[name]() as func:
+            result = measure(func, rounds)
+        results[name] = result
+        line = f"{name:<52} {format_time(result['min']):>12} (медиана {format_time(result['median'])})"
+        base = (baseline or {}).get(name)
+        if base:
+            ratio = result["min"] / base["min"]
+            line += f"  x{ratio:.2f}"
+            if ratio > threshold:
+                line += "  РЕГРЕССИЯ"
+                regressions.append(name)
+        print(line, flush=True)
+    return results, regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Точка входа (python main.py --bench / python -m Utils.benchmarks).
+
+    :return: код завершения (1 - есть регрессии).
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарки парсеров FunPayAPI и горячих участков FPC.")
+    parser.add_argument("--filter", default="", help="запускать только бенчмарки, в названии которых есть строка")
+    parser.add_argument("--rounds", type=int, default=5, help="кол-во раундов каждого бенчмарка")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="путь до файла с базовыми результатами")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое отношение времени к базовому")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="сохранить результаты как базовые (без сравнения)")
+    parser.add_argument("--list", action="store_true", help="вывести список бенчмарков")
+    args = parser.parse_args(argv)
+
+    names = [i for i in BENCHMARKS if args.filter.lower() in i.lower()]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        print(f"Нет бенчмарков, подходящих под фильтр \"{args.filter}\".")
+        return 1
+
+    baseline_path = os.path.abspath(args.baseline)
+    baseline = None if args.save_baseline else load_baseline(baseline_path)
+    if baseline is not None:
+        print(f"Сравнение с {baseline_path} (Python {baseline.get('python')}, {baseline.get('platform')}), "
+              f"порог: x{args.threshold}.")
+        baseline = baseline.get("results", {})
+    elif not args.save_baseline:
+        print(f"Базовые результаты не найдены ({baseline_path}). Сохранить: --save-baseline.")
+
+    results, regressions = run(names, args.rounds, baseline, args.threshold)
+
+    if args.save_baseline:
+        saved = load_baseline(baseline_path) or {}
+        # При запуске с --filter результаты остальных бенчмарков сохраняются.
+        data = {"created": int(time.time()), "python": platform.python_version(), "platform": platform.platform(),
+                "results": {**saved.get("results", {}), **results}}
+        folder = os.path.dirname(baseline_path)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        storage.atomic_write(baseline_path, json.dumps(data, indent=4, ensure_ascii=False))
+        print(f"Базовые результаты сохранены в {baseline_path}.")
+        return 0
+
+    if regressions:
+        print(f"Регрессии ({len(regressions)}): {', '.join(regressions)}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,12 +6,17 @@ if TYPE_CHECKING:
 
 from datetime import datetime
 import Utils.exceptions
-import itertools
-import psutil
+import Utils.logger
+import Utils.products
+import Utils.storage
+import Utils.templates
+from Utils.lazy import LazyModule
 import json
 import sys
 import os
 
+psutil = LazyModule("psutil")
+
 
 def count_products(products_file_path: str) -> int:
     """
@@ -21,13 +26,7 @@ def count_products(products_file_path: str) -> int:
 
     :return: кол-во товара в указанном файле.
     """
-    if not os.path.exists(products_file_path):
-        return 0
-    with open(products_file_path, "r", encoding="utf-8") as f:
-        products = f.read()
-    products = products.split("\n")
-    products = list(itertools.filterfalse(lambda el: not el, products))
-    return len(products)
+    return Utils.products.get_store(products_file_path).count()
 
 
 def cache_categories(category_list: list[FunPayAPI.types.Category], cached_categories: dict | None = None) -> None:
@@ -58,13 +57,8 @@ def cache_categories(category_list: list[FunPayAPI.types.Category], cached_categ
     if cached_categories:
         result.update(cached_categories)
 
-    # Создаем папку для хранения кэшированных данных.
-    if not os.path.exists("storage/cache"):
-        os.makedirs("storage/cache")
-
-    # Записываем данные в кэш.
-    with open("storage/cache/categories.json", "w", encoding="utf-8") as f:
-        f.write(json.dumps(result, indent=4))
+    # Записываем данные в кэш атомарно (папка storage/cache создается при необходимости).
+    Utils.storage.atomic_write("storage/cache/categories.json", json.dumps(result, indent=4))
 
 
 def load_cached_categories() -> dict:
@@ -225,7 +219,7 @@ def get_month_name(month_number: int) -> str:
     return months[month_number-1]
 
 
-def get_product(path: str, amount: int = 1) -> list[list[str] | int] | None:
+def get_product(path: str, amount: int = 1, token: str | None = None) -> list[list[str] | int] | None:
     """
     Берет из товарного файла товар/-ы, удаляет их из товарного файла.
 
@@ -233,30 +227,37 @@ def get_product(path: str, amount: int = 1) -> list[list[str] | int] | None:
 
     :param amount: кол-во товара.
 
+    :param token: токен выдачи (ID заказа). Если передан, товары резервируются за ним до вызова
+    confirm_products() / return_products(), а повторный вызов с тем же токеном вернет те же товары.
+
     :return: [[Товар/-ы], оставшееся кол-во товара]
     """
-    with open(path, "r", encoding="utf-8") as f:
-        products = f.read()
+    store = Utils.products.get_store(path)
+    with store.locked():
+        got_products = store.take(amount, token)
+        return [got_products, store.amount]
 
-    products = products.split("\n")
 
-    # Убираем пустые элементы
-    products = list(itertools.filterfalse(lambda el: not el, products))
+def confirm_products(path: str, token: str) -> None:
+    """
+    Подтверждает доставку товаров, взятых из товарного файла с токеном token.
 
-    if not products:
-        raise Utils.exceptions.NoProductsError(path)
+    :param path: путь до файла с товарами.
 
-    elif len(products) < amount:
-        raise Utils.exceptions.NotEnoughProductsError(path, len(products), amount)
+    :param token: токен выдачи (ID заказа).
+    """
+    Utils.products.get_store(path).confirm(token)
 
-    got_products = products[:amount]
-    save_products = products[amount:]
-    amount = len(save_products)
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("\n".join(save_products))
+def return_products(path: str, token: str) -> None:
+    """
+    Возвращает в товарный файл товары, взятые с токеном token (например, если их не удалось отправить).
 
-    return [got_products, amount]
+    :param path: путь до файла с товарами.
+
+    :param token: токен выдачи (ID заказа).
+    """
+    Utils.products.get_store(path).release(token)
 
 
 def add_products(path: str, products: list[str]) -> None:
@@ -269,14 +270,7 @@ def add_products(path: str, products: list[str]) -> None:
 
     :return:
     """
-    with open(path, "r", encoding="utf-8") as f:
-        old_products = f.read()
-
-    old_products = old_products.split("\n")
-    old_products.extend(products)
-
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("\n".join(old_products))
+    Utils.products.get_store(path).add(products)
 
 
 def format_msg_text(text: str, msg: FunPayAPI.types.Message) -> str:
@@ -289,32 +283,10 @@ def format_msg_text(text: str, msg: FunPayAPI.types.Message) -> str:
 
     :return: форматированый текст.
     """
-    date_obj = datetime.now()
-    month_name = get_month_name(date_obj.month)
-    date = date_obj.strftime("%d.%m.%Y")
-    str_date = f"{date_obj.day} {month_name}"
-    str_full_date = str_date + f" {date_obj.year} года"
-
-    time_ = date_obj.strftime("%H:%M")
-    time_full = date_obj.strftime("%H:%M:%S")
-
-    variables = {
-        "$full_date_text": str_full_date,
-        "$date_text": str_date,
-        "$date": date,
-        "$time": time_,
-        "$full_time": time_full,
-        "$username": msg.chat_with,
-        "$message_text": msg.text,
-        "$node_id": str(msg.node_id)
-    }
+    return Utils.templates.render(text, "message", msg)
 
-    for var in variables:
-        text = text.replace(var, variables[var])
-    return text
 
-
-def format_order_text(text: str, order: FunPayAPI.types.Order) -> str:
+def format_order_text(text: str, order: FunPayAPI.types.Order, extra: dict[str, str] | None = None) -> str:
     """
     Форматирует текст, подставляя значения переменных, доступных для Order.
 
@@ -322,31 +294,12 @@ def format_order_text(text: str, order: FunPayAPI.types.Order) -> str:
 
     :param order: экземпляр Order.
 
+    :param extra: значения переменных, не относящихся к заказу ($product, $product_amount).
+    Переменные без значений остаются в тексте как есть.
+
     :return: форматированый текст.
     """
-    date_obj = datetime.now()
-    month_name = get_month_name(date_obj.month)
-    date = date_obj.strftime("%d.%m.%Y")
-    str_date = f"{date_obj.day} {month_name}"
-    str_full_date = str_date + f" {date_obj.year} года"
-
-    time_ = date_obj.strftime("%H:%M")
-    time_full = date_obj.strftime("%H:%M:%S")
-
-    variables = {
-        "$full_date_text": str_full_date,
-        "$date_text": str_date,
-        "$date": date,
-        "$time": time_,
-        "$full_time": time_full,
-        "$username": order.buyer_username,
-        "$order_desc": order.title,
-        "$order_id": order.id
-    }
-
-    for var in variables:
-        text = text.replace(var, variables[var])
-    return text
+    return Utils.templates.render(text, "order", order, extra)
 
 
 def restart_program():
@@ -354,6 +307,8 @@ def restart_program():
     Полный перезапуск FPC.
     """
     python = sys.executable
+    # os.execl не вызывает atexit, поэтому записи из очереди логов дописываются вручную.
+    Utils.logger.stop_queue_logging()
     os.execl(python, python, *sys.argv)
     try:
         process = psutil.Process()
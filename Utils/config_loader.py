@@ -3,6 +3,7 @@
 """
 import configparser
 from configparser import ConfigParser, SectionProxy
+from dataclasses import dataclass
 import codecs
 import os
 
@@ -45,6 +46,40 @@ def check_param(param_name: str, section: SectionProxy, valid_values: list[str |
     return value
 
 
+def check_number_param(param_name: str, section: SectionProxy, number_type: type[int] | type[float],
+                       min_value: int | float, max_value: int | float, raise_if_not_exists: bool = True) -> str | None:
+    """
+    Проверяет, существует ли в переданной секции указанный параметр и если да, является ли его значение числом
+    в диапазоне [min_value, max_value].
+
+    :param param_name: название параметра.
+
+    :param section: объект секции.
+
+    :param number_type: тип числа (int или float).
+
+    :param min_value: минимальное допустимое значение.
+
+    :param max_value: максимальное допустимое значение.
+
+    :param raise_if_not_exists: райзить ли исключение, если параметр не найден.
+
+    :return: Значение ключа, если ключ найден и его значение валидно. Если ключ не найден и
+    raise_if_not_exists == False - возвращает None. В любом другом случае райзит исключения.
+    """
+    value = check_param(param_name, section, raise_if_not_exists=raise_if_not_exists)
+    if value is None:
+        return None
+    try:
+        number = number_type(value)
+    except ValueError:
+        number = None
+    if number is None or not min_value <= number <= max_value:
+        kind = "целое число" if number_type is int else "число"
+        raise ValueNotValidError(param_name, value, [f"{kind} от {min_value} до {max_value}"])
+    return value
+
+
 def create_config_obj(config_path: str) -> ConfigParser:
     """
     Создает объект конфига с нужными настройками.
@@ -124,6 +159,30 @@ def load_main_config(config_path: str):
             except (ParamNotFoundError, EmptyValueError, ValueNotValidError) as e:
                 raise ConfigParseError(config_path, section_name, e)
 
+    # Необязательные параметры (если параметра нет, используется значение по умолчанию).
+    # Числовые параметры задаются кортежем (тип числа, минимум, максимум).
+    optional_values = {
+        "Other": {
+            "handlerWorkers": [str(i) for i in range(0, 33)],
+            "handlerTimeout": [str(i) for i in range(1, 601)],
+            "requestsDelayMin": (float, 0.1, 100),
+            "configsWatchInterval": [str(i) for i in range(0, 601)],
+            "metricsPort": (int, 0, 65535)
+        }
+    }
+
+    for section_name in optional_values:
+        for param_name in optional_values[section_name]:
+            valid_values = optional_values[section_name][param_name]
+            try:
+                if isinstance(valid_values, tuple):
+                    check_number_param(param_name, config[section_name], *valid_values, raise_if_not_exists=False)
+                else:
+                    check_param(param_name, config[section_name], valid_values=valid_values,
+                                raise_if_not_exists=False)
+            except (EmptyValueError, ValueNotValidError) as e:
+                raise ConfigParseError(config_path, section_name, e)
+
     return config
 
 
@@ -215,3 +274,102 @@ def load_auto_delivery_config(config_path: str):
         if "$product" not in lot_response:
             raise ConfigParseError(config_path, lot_title, NoProductVarError())
     return config
+
+
+@dataclass(frozen=True, slots=True)
+class FunPaySettings:
+    """
+    Переключатели секции [FunPay] основного конфига.
+    """
+    auto_raise: bool
+    auto_response: bool
+    auto_delivery: bool
+    multi_delivery: bool
+    auto_restore: bool
+    auto_disable: bool
+
+
+@dataclass(frozen=True, slots=True)
+class BlockListSettings:
+    """
+    Переключатели секции [BlockList] основного конфига.
+    """
+    block_delivery: bool
+    block_response: bool
+    block_new_message_notification: bool
+    block_new_order_notification: bool
+    block_command_notification: bool
+
+
+@dataclass(frozen=True, slots=True)
+class OtherSettings:
+    """
+    Параметры секции [Other] основного конфига (с учетом значений по умолчанию необязательных параметров).
+    """
+    watermark: str
+    requests_delay: int
+    requests_delay_min: float
+    handler_workers: int
+    handler_timeout: int
+    # Интервал проверки изменений файлов конфигов в секундах (0 - не отслеживать).
+    configs_watch_interval: int
+    # Порт локального сервера метрик (0 - сервер не запускается).
+    metrics_port: int
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """
+    Неизменяемый снимок настроек, читаемых при обработке каждого события. Создается build_settings() и целиком
+    заменяется новым снимком при изменении конфигов, поэтому потоки-обработчики никогда не видят частично
+    измененные настройки.
+    """
+    funpay: FunPaySettings
+    block_list: BlockListSettings
+    other: OtherSettings
+    telegram_enabled: bool
+    # Команды автоответчика (секции конфига автоответчика).
+    commands: frozenset[str]
+
+
+def build_settings(main_config: ConfigParser, auto_response_config: ConfigParser | None = None) -> Settings:
+    """
+    Создает снимок настроек по проверенным конфигам.
+
+    :param main_config: основной конфиг.
+
+    :param auto_response_config: конфиг автоответчика (с разделенными командами).
+
+    :return: снимок настроек.
+    """
+    funpay = main_config["FunPay"]
+    block_list = main_config["BlockList"]
+    other = main_config["Other"]
+    return Settings(
+        funpay=FunPaySettings(
+            auto_raise=funpay.getboolean("autoRaise"),
+            auto_response=funpay.getboolean("autoResponse"),
+            auto_delivery=funpay.getboolean("autoDelivery"),
+            multi_delivery=funpay.getboolean("multiDelivery"),
+            auto_restore=funpay.getboolean("autoRestore"),
+            auto_disable=funpay.getboolean("autoDisable")
+        ),
+        block_list=BlockListSettings(
+            block_delivery=block_list.getboolean("blockDelivery"),
+            block_response=block_list.getboolean("blockResponse"),
+            block_new_message_notification=block_list.getboolean("blockNewMessageNotification"),
+            block_new_order_notification=block_list.getboolean("blockNewOrderNotification"),
+            block_command_notification=block_list.getboolean("blockCommandNotification")
+        ),
+        other=OtherSettings(
+            watermark=other.get("watermark", ""),
+            requests_delay=int(other["requestsDelay"]),
+            requests_delay_min=float(other.get("requestsDelayMin", "0.5")),
+            handler_workers=int(other.get("handlerWorkers", "4")),
+            handler_timeout=int(other.get("handlerTimeout", "60")),
+            configs_watch_interval=int(other.get("configsWatchInterval", "5")),
+            metrics_port=int(other.get("metricsPort", "0"))
+        ),
+        telegram_enabled=main_config["Telegram"].getboolean("enabled"),
+        commands=frozenset(auto_response_config.sections()) if auto_response_config is not None else frozenset()
+    )
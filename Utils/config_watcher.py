@@ -0,0 +1,100 @@
+"""
+В данном модуле написано отслеживание изменений файлов конфигов (опрос mtime / размера файлов) для их применения
+без перезапуска FPC.
+"""
+
+from typing import Callable
+from threading import Lock
+import logging
+import time
+import os
+
+
+logger = logging.getLogger("FPC.config_watcher")
+
+
+def get_stamp(path: str) -> tuple[int, int] | None:
+    """
+    :return: (mtime в наносекундах, размер) файла или None, если файла нет.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ConfigWatcher:
+    """
+    Следит за файлами конфигов. Измененный файл передается в функцию перезагрузки, только когда он перестал
+    меняться (два опроса подряд с одинаковыми mtime и размером), чтобы не читать файл, который еще записывается.
+    """
+    def __init__(self, files: dict[str, Callable[[str], bool]], interval: float | int = 5.0):
+        """
+        :param files: {путь до конфига: функция, перечитывающая конфиг и возвращающая True, если он применен}.
+
+        :param interval: интервал опроса файлов в секундах.
+        """
+        self.files = files
+        self.interval = interval
+        self.lock = Lock()
+        # {путь: (mtime, размер) последней примененной (или отклоненной) версии файла}.
+        self.stamps: dict[str, tuple[int, int] | None] = {path: get_stamp(path) for path in files}
+        # {путь: (mtime, размер), замеченные на прошлом опросе, но еще не обработанные}.
+        self.pending: dict[str, tuple[int, int] | None] = {}
+        self.reloads = 0
+        self.rejected = 0
+
+    def remember(self, path: str) -> None:
+        """
+        Запоминает текущую версию файла как уже примененную (вызывается после сохранения конфига самим FPC).
+
+        :param path: путь до конфига.
+        """
+        if path not in self.files:
+            return
+        with self.lock:
+            self.stamps[path] = get_stamp(path)
+            self.pending.pop(path, None)
+
+    def check(self) -> list[str]:
+        """
+        Проверяет все файлы один раз и перезагружает изменившиеся.
+
+        :return: список путей конфигов, которые были перезагружены и применены.
+        """
+        applied = []
+        for path, reload_func in self.files.items():
+            stamp = get_stamp(path)
+            with self.lock:
+                if stamp == self.stamps.get(path) or stamp is None:
+                    self.pending.pop(path, None)
+                    continue
+                if self.pending.get(path) != stamp:
+                    # Файл изменился с прошлого опроса (возможно, еще записывается) - ждем следующего опроса.
+                    self.pending[path] = stamp
+                    continue
+                self.pending.pop(path, None)
+                self.stamps[path] = stamp
+
+            try:
+                result = reload_func(path)
+            except:
+                logger.error(f"Произошла непредвиденная ошибка при перезагрузке конфига {path}.")
+                logger.debug("------TRACEBACK------", exc_info=True)
+                result = False
+            if result:
+                self.reloads += 1
+                applied.append(path)
+            else:
+                self.rejected += 1
+        return applied
+
+    def loop(self) -> None:
+        """
+        Бесконечный цикл опроса файлов.
+        """
+        logger.info(f"$CYANОтслеживание изменений конфигов запущено (интервал: {self.interval} сек.).")
+        while True:
+            time.sleep(self.interval)
+            self.check()
@@ -0,0 +1,192 @@
+"""
+В данном модуле написан диспетчер событий: выполняет хэндлеры в пуле потоков, сохраняя порядок событий внутри
+одного ключа (чата / заказа) и параллельно обрабатывая события разных ключей.
+"""
+
+from typing import Callable, Hashable, Any
+from collections import deque
+from threading import Thread, Lock, Condition, get_ident
+import logging
+import time
+
+
+logger = logging.getLogger("FPC.dispatcher")
+
+
+class EventDispatcher:
+    """
+    Пул потоков с очередями по ключам.
+    События одного ключа выполняются строго по очереди (FIFO), события разных ключей - параллельно.
+    """
+    def __init__(self, workers: int = 4, max_pending: int = 1000, handler_timeout: float | int = 60.0):
+        """
+        :param workers: кол-во потоков-обработчиков.
+
+        :param max_pending: максимальное кол-во ожидающих выполнения событий. При переполнении submit() блокируется
+        (back-pressure), пока очередь не освободится.
+
+        :param handler_timeout: время (в секундах), после которого хэндлер считается зависшим. Поток Python нельзя
+        прервать, поэтому зависший хэндлер продолжает выполняться, а пул получает дополнительный поток, чтобы
+        остальные ключи не простаивали. События того же ключа ждут завершения зависшего хэндлера.
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.handler_timeout = handler_timeout
+
+        self.lock = Lock()
+        self.ready = Condition(self.lock)
+        self.not_full = Condition(self.lock)
+
+        # {ключ: очередь задач}. Ключ находится в self.ready_keys, если у него есть задачи и он не выполняется.
+        self.queues: dict[Hashable, deque] = {}
+        self.ready_keys: deque = deque()
+        self.busy_keys: set = set()
+        # {ID потока: [ключ, название хэндлера, время начала]}
+        self.running: dict[int, list] = {}
+        # ID потоков, хэндлеры которых превысили handler_timeout.
+        self.stuck_threads: set[int] = set()
+
+        self.threads_count = 0
+        self.pending = 0
+        self.started = False
+        self.stopped = False
+
+        self.processed = 0
+        self.timeouts = 0
+        self.max_queue_wait = 0.0
+        self.total_queue_wait = 0.0
+        self.backpressure_waits = 0
+        self.backpressure_time = 0.0
+
+    def start(self) -> None:
+        """
+        Запускает потоки-обработчики и сторожевой поток (повторный вызов ничего не делает).
+        """
+        if self.started:
+            return
+        self.started = True
+        for _ in range(self.workers):
+            self.spawn_worker()
+        Thread(target=self.watchdog_loop, daemon=True, name="dispatcher-watchdog").start()
+
+    def spawn_worker(self) -> None:
+        with self.lock:
+            self.threads_count += 1
+            number = self.threads_count
+        Thread(target=self.worker_loop, daemon=True, name=f"dispatcher-{number}").start()
+
+    def submit(self, key: Hashable, handlers_list: list[Callable], args: tuple,
+               call: Callable[[Callable, tuple], Any]) -> None:
+        """
+        Ставит событие в очередь ключа key.
+
+        :param key: ключ очереди (например, ("node", node_id) или ("order", order_id)).
+
+        :param handlers_list: список хэндлеров события (выполняются по порядку).
+
+        :param args: аргументы хэндлеров.
+
+        :param call: функция, вызывающая один хэндлер: call(handler, args).
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.backpressure_waits += 1
+                started = time.time()
+                while self.pending >= self.max_pending and not self.stopped:
+                    self.not_full.wait()
+                self.backpressure_time += time.time() - started
+
+            self.pending += 1
+            if key not in self.queues:
+                self.queues[key] = deque()
+            self.queues[key].append((time.time(), handlers_list, args, call))
+            if key not in self.busy_keys and len(self.queues[key]) == 1:
+                self.ready_keys.append(key)
+                self.ready.notify()
+
+    def worker_loop(self) -> None:
+        thread_id = get_ident()
+        while True:
+            with self.lock:
+                while not self.ready_keys and not self.stopped:
+                    self.ready.wait()
+                if self.stopped:
+                    return
+                key = self.ready_keys.popleft()
+                queued_at, handlers_list, args, call = self.queues[key].popleft()
+                self.busy_keys.add(key)
+                wait = time.time() - queued_at
+                self.total_queue_wait += wait
+                self.max_queue_wait = max(self.max_queue_wait, wait)
+
+            for func in handlers_list:
+                with self.lock:
+                    self.running[thread_id] = [key, getattr(func, "__name__", str(func)), time.time()]
+                call(func, args)
+
+            with self.lock:
+                self.running.pop(thread_id, None)
+                self.busy_keys.discard(key)
+                self.pending -= 1
+                self.processed += 1
+                self.not_full.notify()
+                if self.queues[key]:
+                    # Ключ встает в конец очереди, чтобы один активный чат не занимал поток целиком.
+                    self.ready_keys.append(key)
+                    self.ready.notify()
+                else:
+                    del self.queues[key]
+
+                # Взамен зависшего потока был запущен дополнительный. Теперь, когда хэндлер завершился,
+                # лишний поток (этот) выходит.
+                if thread_id in self.stuck_threads:
+                    self.stuck_threads.discard(thread_id)
+                    self.threads_count -= 1
+                    return
+
+    def watchdog_loop(self) -> None:
+        while not self.stopped:
+            time.sleep(1)
+            now = time.time()
+            spawn = 0
+            with self.lock:
+                for thread_id, (key, name, started) in self.running.items():
+                    if thread_id not in self.stuck_threads and now - started > self.handler_timeout:
+                        self.stuck_threads.add(thread_id)
+                        self.timeouts += 1
+                        spawn += 1
+                        logger.warning(f"Хэндлер {name} (ключ {key}) выполняется дольше "
+                                       f"{self.handler_timeout} с. Запускаю дополнительный поток.")
+            for _ in range(spawn):
+                self.spawn_worker()
+
+    def stop(self) -> None:
+        """
+        Останавливает потоки-обработчики (ожидающие события отбрасываются).
+        """
+        with self.lock:
+            self.stopped = True
+            self.ready.notify_all()
+            self.not_full.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Возвращает метрики диспетчера.
+
+        :return: словарь с метриками.
+        """
+        with self.lock:
+            processed = self.processed
+            return {
+                "workers": self.threads_count,
+                "pending": self.pending,
+                "active": len(self.running),
+                "stuck": len(self.stuck_threads),
+                "keys": len(self.queues),
+                "processed": processed,
+                "timeouts": self.timeouts,
+                "avg_queue_wait": self.total_queue_wait / processed if processed else 0.0,
+                "max_queue_wait": self.max_queue_wait,
+                "backpressure_waits": self.backpressure_waits,
+                "backpressure_time": self.backpressure_time
+            }
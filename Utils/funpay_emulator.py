@@ -0,0 +1,700 @@
+"""
+В данном модуле написан эмулятор FunPay: локальный HTTP-сервер, отвечающий на те же запросы, что отправляют
+FunPayAPI.Account и FunPayAPI.Runner (главная страница, runner (orders_counters, chat_bookmarks, chat_node,
+отправка сообщений), orders/trade, страница чатов, страница пользователя, lots/offerEdit, lots/offerSave,
+lots/raise, orders/refund), и отдающий HTML той же структуры, что и FunPay.
+
+Эмулятор нужен для нагрузочного и интеграционного тестирования FPC без обращения к FunPay: сценарии
+(SCENARIOS) генерируют пачки заказов / сообщений, отвечают 429 на часть запросов и добавляют задержку ответов.
+Эмулятор считает время от появления заказа до первого сообщения продавца в чате с покупателем (выдачи товара).
+
+Запуск:
+    python -m Utils.funpay_emulator --port 8080 --scenario orders_burst
+
+Запуск FPC с эмулятором:
+    FUNPAY_BASE_URL=http://127.0.0.1:8080 python main.py
+
+Названия лотов эмулятора: "Тестовый лот N" (их можно добавить в конфиг автовыдачи).
+"""
+
+from __future__ import annotations
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dataclasses import dataclass, replace
+from urllib.parse import urlsplit, parse_qs
+from threading import Lock, Thread, Event
+from html import escape
+import argparse
+import logging
+import random
+import string
+import json
+import time
+
+
+logger = logging.getLogger("FPC.funpay_emulator")
+
+# Ссылки внутри HTML остаются ссылками на funpay.com: парсеры FunPayAPI завязаны на них (например, ID покупателя
+# берется из https://funpay.com/users/<id>/).
+FUNPAY_URL = "https://funpay.com"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    Сценарий нагрузки эмулятора.
+    """
+    name: str
+    # Кол-во новых заказов в каждой пачке.
+    orders_per_burst: int = 0
+    # Кол-во новых сообщений от покупателей в каждой пачке.
+    messages_per_burst: int = 0
+    # Интервал между пачками в секундах.
+    burst_interval: float = 10.0
+    # Кол-во пачек (None - бесконечно).
+    bursts: int | None = None
+    # Задержка каждого ответа в секундах (+ случайная добавка от 0 до latency_jitter).
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Доля запросов к runner'у (включая отправку сообщений), на которые эмулятор отвечает 429.
+    throttle_rate: float = 0.0
+    # Значение заголовка Retry-After в ответах 429.
+    retry_after: int = 1
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "idle": Scenario("idle"),
+    "orders_burst": Scenario("orders_burst", orders_per_burst=20, burst_interval=15.0),
+    "messages_burst": Scenario("messages_burst", messages_per_burst=50, burst_interval=10.0),
+    "throttled": Scenario("throttled", orders_per_burst=10, burst_interval=10.0, throttle_rate=0.3),
+    "slow": Scenario("slow", orders_per_burst=5, burst_interval=10.0, latency=1.5, latency_jitter=1.0),
+    "mixed": Scenario("mixed", orders_per_burst=10, messages_per_burst=20, burst_interval=10.0, latency=0.2,
+                      latency_jitter=0.3, throttle_rate=0.05)
+}
+
+
+def gen_tag(rnd: random.Random, length: int = 8) -> str:
+    return "".join(rnd.choice(string.digits + string.ascii_lowercase) for _ in range(length))
+
+
+def gen_order_id(rnd: random.Random) -> str:
+    return "".join(rnd.choice(string.digits + string.ascii_uppercase) for _ in range(8))
+
+
+# HTML страниц FunPay. Функции используются как эмулятором, так и бенчмарками (для генерации больших страниц).
+def make_header(username: str) -> str:
+    return f"""<header><nav class="navbar navbar-default navbar-fixed-top"><div class="container">
+<ul class="nav navbar-nav navbar-right logged">
+<li><a href="{FUNPAY_URL}/orders/trade" class="menu-item-trade">Продажи</a></li>
+<li class="dropdown"><a href="#" class="dropdown-toggle user-link">
+<div class="user-link-photo" style="background-image: url(/img/layout/avatar.png);"></div>
+<div class="user-link-name">{escape(username)}</div></a></li>
+</ul></div></nav></header>"""
+
+
+def make_main_page(user_id: int, username: str, csrf_token: str, active_orders: int = 0,
+                   balance: float = 0.0) -> str:
+    """
+    :return: HTML главной страницы FunPay (данные аккаунта).
+    """
+    app_data = escape(json.dumps({"locale": "ru", "csrf-token": csrf_token, "userId": user_id}), quote=True)
+    badges = f'<span class="badge badge-trade">{active_orders}</span>' if active_orders else ""
+    return f"""<!DOCTYPE html><html lang="ru"><head><title>FunPay</title></head>
+<body data-app-data="{app_data}">{make_header(username)}
+<div class="wrapper"><div class="content">
+<a href="{FUNPAY_URL}/orders/trade" class="menu-item-orders">Продажи {badges}</a>
+<a href="{FUNPAY_URL}/account/balance" class="menu-item-balance">Баланс
+<span class="badge badge-balance">{balance:.2f} ₽</span></a>
+<div class="promo-games">{"".join(f'<div class="promo-game-item"><a href="{FUNPAY_URL}/lots/{i}/">Игра {i}</a></div>'
+                                  for i in range(1, 51))}</div>
+</div></div></body></html>"""
+
+
+def make_order_item(order_id: str, title: str, price: float, buyer_username: str, buyer_id: int,
+                    status: str = "paid") -> str:
+    """
+    :param status: "paid" (оплачен), "closed" (закрыт) или "refund" (возврат).
+
+    :return: HTML заказа на странице продаж.
+    """
+    css, status_text = {"paid": ("tc-item info", "Оплачен"), "closed": ("tc-item", "Закрыт"),
+                        "refund": ("tc-item warning", "Возврат")}[status]
+    return f"""<a href="{FUNPAY_URL}/orders/{order_id}/" class="{css}">
+    <div class="tc-date">
+        <div class="tc-date-time">сегодня, 12:00</div><div class="tc-date-left">1 минуту назад</div>
+    </div>
+    <div class="tc-order">#{order_id}</div>
+    <div class="order-desc"><div>{escape(title)}</div><div class="text-muted">Тестовая игра, Аккаунты</div></div>
+    <div class="tc-user"><div class="media media-user offline">
+        <div class="media-left">
+            <div class="avatar-photo pseudo-a" data-href="{FUNPAY_URL}/users/{buyer_id}/"></div>
+        </div>
+        <div class="media-body">
+            <div class="media-user-name">
+                <span class="pseudo-a" data-href="{FUNPAY_URL}/users/{buyer_id}/">{escape(buyer_username)}</span>
+            </div>
+            <div class="media-user-status">был 1 минуту назад</div>
+        </div>
+    </div></div>
+    <div class="tc-status text-primary">{status_text}</div>
+    <div class="tc-price text-nowrap tc-seller-sum">{price:.2f} <span class="unit">₽</span></div>
+</a>"""
+
+
+def make_orders_page(username: str, items: list[str]) -> str:
+    """
+    :param items: HTML заказов (make_order_item()) от новых к старым.
+
+    :return: HTML страницы продаж.
+    """
+    return f"""<!DOCTYPE html><html lang="ru"><body>{make_header(username)}
+<div class="wrapper"><div class="content"><h1>Продажи</h1>
+<div class="tc table-hover table-clickable tc-selling">
+<div class="tc-header"><div class="tc-date">Дата</div><div class="tc-order">Заказ</div></div>
+{"".join(items)}
+</div></div></div></body></html>"""
+
+
+def make_chat_bookmark(node_id: int, username: str, text: str, unread: bool = False) -> str:
+    """
+    :return: HTML чата в списке чатов.
+    """
+    css = "contact-item unread" if unread else "contact-item"
+    return f"""<a href="{FUNPAY_URL}/chat/?node={node_id}" class="{css}" data-id="{node_id}"
+    data-node-msg="1" data-user-msg="1">
+    <div class="contact-item-photo"><div class="avatar-photo"></div></div>
+    <div class="media-user-name">{escape(username)}</div>
+    <div class="contact-item-message">{escape(text)}</div>
+    <div class="contact-item-time">12:00</div>
+</a>"""
+
+
+def make_chat_bookmarks(items: list[str]) -> str:
+    """
+    :param items: HTML чатов (make_chat_bookmark()).
+
+    :return: HTML списка чатов (objects -> chat_bookmarks -> data -> html).
+    """
+    return f'<div class="contact-list custom-scroll" data-content-id="0">{"".join(items)}</div>'
+
+
+def make_chats_page(username: str, bookmarks_html: str) -> str:
+    return f"""<!DOCTYPE html><html lang="ru"><body>{make_header(username)}
+<div class="wrapper"><div class="content chat-full">{bookmarks_html}</div></div></body></html>"""
+
+
+def make_chat_message(message_id: int, author_id: int, author: str, text: str) -> str:
+    """
+    :return: HTML сообщения чата (objects -> chat_node -> data -> messages -> html).
+    """
+    return f"""<div class="chat-msg-item" id="message-{message_id}"><div class="chat-message">
+<div class="chat-msg-head">
+<span class="chat-msg-author-link"><a href="{FUNPAY_URL}/users/{author_id}/">{escape(author)}</a></span>
+<div class="chat-msg-date">12:00:00</div></div>
+<div class="chat-msg-body"><div class="chat-msg-text">{escape(text)}</div></div></div></div>"""
+
+
+def make_user_page(username: str, categories: list[tuple[int, str, bool]],
+                   lots: list[tuple[int, int, str, float]]) -> str:
+    """
+    :param categories: [(ID категории, название, True - игровая валюта)].
+
+    :param lots: [(ID категории, ID лота, название, цена)].
+
+    :return: HTML страницы пользователя.
+    """
+    blocks = []
+    for category_id, title, currency in categories:
+        kind = "chips" if currency else "lots"
+        items = "".join(f"""<a href="{FUNPAY_URL}/{kind}/offer?id={lot_id}" class="tc-item">
+    <div class="tc-desc"><div class="tc-desc-text">{escape(lot_title)}</div></div>
+    <div class="tc-price" data-s="{price:.2f}"><div>{price:.2f} <span class="unit">₽</span></div></div>
+</a>""" for cat_id, lot_id, lot_title, price in lots if cat_id == category_id)
+        blocks.append(f"""<div class="offer">
+<div class="offer-list-title-container"><div class="offer-list-title">
+<h3><a href="{FUNPAY_URL}/{kind}/{category_id}/">{escape(title)}</a></h3></div></div>
+<div class="tc offer-tc-container">{items}</div></div>""")
+    return f"""<!DOCTYPE html><html lang="ru"><body>{make_header(username)}
+<div class="wrapper"><div class="content"><div class="profile-header"><h1>{escape(username)}</h1></div>
+<div class="mb20">{"".join(blocks)}</div>
+<div class="offer-list-title-container-reviews"><div class="review-container">{"".join(
+        f'<div class="review-item"><div class="review-item-text">Отзыв {i}</div></div>' for i in range(25))}</div></div>
+</div></div></body></html>"""
+
+
+def make_category_page(username: str, game_id: int, currency: bool) -> str:
+    """
+    :return: HTML страницы редактирования лотов категории (lots/<id>/trade или chips/<id>/trade).
+    """
+    if currency:
+        form = f'<form><input type="hidden" name="game" value="{game_id}"></form>'
+    else:
+        form = f'<div class="col-sm-6"><button class="btn btn-default js-lot-raise" data-game="{game_id}">' \
+               f'Поднять предложения</button></div>'
+    return f"""<!DOCTYPE html><html lang="ru"><body>{make_header(username)}
+<div class="wrapper"><div class="content"><div class="row">{form}</div></div></div></body></html>"""
+
+
+def make_lot_form(lot_id: int, category_id: int, title: str, price: float, active: bool, csrf_token: str) -> str:
+    """
+    :return: HTML формы редактирования лота (ответ lots/offerEdit -> html).
+    """
+    active_field = '<input type="checkbox" name="active" checked>' if active else ""
+    return f"""<form class="form-offer-editor">
+<input type="hidden" name="csrf_token" value="{csrf_token}">
+<input type="hidden" name="offer_id" value="{lot_id}">
+<input type="hidden" name="node_id" value="{category_id}">
+<input type="hidden" name="deleted" value="">
+<input type="text" name="fields[summary][ru]" value="{escape(title, quote=True)}">
+<textarea name="fields[desc][ru]">Описание лота {lot_id}</textarea>
+<select name="fields[type]"><option value="">-</option><option value="1" selected>Аккаунт</option></select>
+<input type="text" name="price" value="{price:.2f}">
+<input type="text" name="amount" value="">
+{active_field}
+</form>"""
+
+
+def make_raise_modal(categories: list[tuple[int, str]]) -> str:
+    """
+    :return: HTML modal-формы поднятия лотов.
+    """
+    return "<form>" + "".join(f'<div class="checkbox"><label><input type="checkbox" name="node_ids[]" '
+                              f'value="{i}" checked>{escape(title)}</label></div>' for i, title in categories) \
+        + "</form>"
+
+
+class FunPayEmulator:
+    """
+    Состояние эмулятора (аккаунт, лоты, заказы, чаты) и HTTP-сервер.
+    Все изменения состояния выполняются под self.lock.
+    """
+    def __init__(self, scenario: Scenario | None = None, seed: int = 0, user_id: int = 1000000,
+                 username: str = "EmulatorSeller", games: int = 3, categories_per_game: int = 2,
+                 lots_per_category: int = 5, buyers: int = 50):
+        """
+        :param scenario: сценарий нагрузки (по умолчанию - SCENARIOS["idle"]).
+
+        :param seed: seed генератора случайных чисел (для воспроизводимости сценариев).
+
+        :param user_id: ID аккаунта продавца.
+
+        :param username: никнейм продавца.
+
+        :param games: кол-во игр.
+
+        :param categories_per_game: кол-во категорий в каждой игре.
+
+        :param lots_per_category: кол-во лотов в каждой категории.
+
+        :param buyers: кол-во покупателей (собеседников).
+        """
+        self.scenario = scenario or SCENARIOS["idle"]
+        self.random = random.Random(seed)
+        self.lock = Lock()
+        self.user_id = user_id
+        self.username = username
+        self.csrf_token = gen_tag(self.random, 32)
+        self.balance = 0.0
+
+        # {ID категории: (ID игры, название, игровая валюта)}
+        self.categories: dict[int, tuple[int, str, bool]] = {}
+        # {ID лота: [ID категории, название, цена, активен]}
+        self.lots: dict[int, list] = {}
+        lot_number = 1
+        for game in range(1, games + 1):
+            for n in range(categories_per_game):
+                category_id = game * 100 + n
+                self.categories[category_id] = (game, f"Тестовая игра {game}, категория {n}", False)
+                for _ in range(lots_per_category):
+                    self.lots[10000 + lot_number] = [category_id, f"Тестовый лот {lot_number}",
+                                                     round(self.random.uniform(10, 1000), 2), True]
+                    lot_number += 1
+        self.buyers = [(f"Buyer{i}", 2000000 + i) for i in range(buyers)]
+
+        # Заказы от новых к старым: [ID, название, цена, никнейм покупателя, ID покупателя, статус, время].
+        self.orders: list[list] = []
+        self.orders_by_id: dict[str, list] = {}
+        # {node_id: {"username", "user_id", "messages": [(ID, ID автора, автор, текст)], "unread"}}
+        self.chats: dict[int, dict] = {}
+        self.chats_order: list[int] = []
+        self.next_message_id = 1
+        self.orders_tag = gen_tag(self.random)
+        self.chats_tag = gen_tag(self.random)
+        self.seller_counter = 0
+        # {ID игры: время последнего поднятия}
+        self.raise_times: dict[int, float] = {}
+
+        # Статистика: {путь: кол-во запросов}, выдачи {ID заказа: секунды до выдачи}.
+        self.requests: dict[str, int] = {}
+        self.throttled = 0
+        self.messages_received = 0
+        self.delivery_times: dict[str, float] = {}
+        self.created_at: dict[str, float] = {}
+
+        self.server: ThreadingHTTPServer | None = None
+        self.stop_event = Event()
+
+    # Изменение состояния
+    def get_chat(self, username: str, user_id: int) -> int:
+        """
+        :return: node_id чата с пользователем (создает чат, если его нет). Вызывается под self.lock.
+        """
+        for node_id, chat in self.chats.items():
+            if chat["user_id"] == user_id:
+                return node_id
+        node_id = 50000000 + len(self.chats)
+        self.chats[node_id] = {"username": username, "user_id": user_id, "messages": [], "unread": False}
+        return node_id
+
+    def add_chat_message(self, node_id: int, author_id: int, author: str, text: str) -> int:
+        """
+        Добавляет сообщение в чат и поднимает чат наверх списка. Вызывается под self.lock.
+
+        :return: ID сообщения.
+        """
+        message_id = self.next_message_id
+        self.next_message_id += 1
+        chat = self.chats[node_id]
+        chat["messages"].append((message_id, author_id, author, text))
+        del chat["messages"][:-100]
+        chat["unread"] = author_id != self.user_id
+        if node_id in self.chats_order:
+            self.chats_order.remove(node_id)
+        self.chats_order.insert(0, node_id)
+        self.chats_tag = gen_tag(self.random)
+        return message_id
+
+    def add_order(self, lot_id: int | None = None, buyer: tuple[str, int] | None = None) -> str:
+        """
+        Создает новый оплаченный заказ и системное сообщение об оплате в чате с покупателем.
+
+        :param lot_id: ID лота (по умолчанию - случайный).
+
+        :param buyer: (никнейм, ID) покупателя (по умолчанию - случайный).
+
+        :return: ID заказа.
+        """
+        with self.lock:
+            lot_id = lot_id if lot_id is not None else self.random.choice(list(self.lots))
+            username, user_id = buyer if buyer is not None else self.random.choice(self.buyers)
+            category_id, title, price, _ = self.lots[lot_id]
+            order_id = gen_order_id(self.random)
+            while order_id in self.orders_by_id:
+                order_id = gen_order_id(self.random)
+            order = [order_id, title, price, username, user_id, "paid", time.time()]
+            self.orders.insert(0, order)
+            self.orders_by_id[order_id] = order
+            self.created_at[order_id] = order[6]
+            self.seller_counter += 1
+            self.orders_tag = gen_tag(self.random)
+            node_id = self.get_chat(username, user_id)
+            self.add_chat_message(node_id, 0, "FunPay",
+                                  f"Покупатель {username} оплатил заказ #{order_id}. {title}. {username}, "
+                                  f"не забудьте потом нажать кнопку «Подтвердить выполнение заказа».")
+            return order_id
+
+    def add_buyer_message(self, buyer: tuple[str, int] | None = None, text: str | None = None) -> int:
+        """
+        Добавляет сообщение от покупателя.
+
+        :return: ID сообщения.
+        """
+        with self.lock:
+            username, user_id = buyer if buyer is not None else self.random.choice(self.buyers)
+            node_id = self.get_chat(username, user_id)
+            text = text if text is not None else self.random.choice(["Привет", "!автоответ", "Когда выдача?",
+                                                                     "Спасибо!", "Здравствуйте, есть в наличии?"])
+            return self.add_chat_message(node_id, user_id, username, text)
+
+    def on_seller_message(self, node_id: int, text: str) -> None:
+        """
+        Записывает сообщение продавца (отправленное FPC) и время выдачи неоплаченных выдачей заказов покупателя.
+        Вызывается под self.lock.
+        """
+        chat = self.chats.get(node_id)
+        if chat is None:
+            return
+        self.add_chat_message(node_id, self.user_id, self.username, text)
+        self.messages_received += 1
+        now = time.time()
+        for order in self.orders:
+            if order[4] == chat["user_id"] and order[0] not in self.delivery_times:
+                self.delivery_times[order[0]] = now - order[6]
+
+    # HTML / JSON ответы
+    def bookmarks_html(self) -> str:
+        items = []
+        for node_id in self.chats_order[:50]:
+            chat = self.chats[node_id]
+            text = chat["messages"][-1][3] if chat["messages"] else ""
+            items.append(make_chat_bookmark(node_id, chat["username"], text, chat["unread"]))
+        return make_chat_bookmarks(items)
+
+    def orders_html(self) -> str:
+        return make_orders_page(self.username, [make_order_item(i[0], i[1], i[2], i[3], i[4], i[5])
+                                                for i in self.orders[:200]])
+
+    def user_html(self) -> str:
+        categories = [(i, title, currency) for i, (_, title, currency) in self.categories.items()]
+        lots = [(cat, lot_id, title, price) for lot_id, (cat, title, price, active) in self.lots.items() if active]
+        return make_user_page(self.username, categories, lots)
+
+    def runner_response(self, form: dict[str, str]) -> dict:
+        """
+        Обрабатывает запрос к runner'у: отправку сообщения (request) и объекты orders_counters / chat_bookmarks /
+        chat_node. Объекты orders_counters и chat_bookmarks возвращаются, только если их тег изменился.
+        """
+        objects = json.loads(form.get("objects") or "[]")
+        request = form.get("request")
+        request = json.loads(request) if request and request != "False" else None
+        result = {"objects": [], "response": False}
+        with self.lock:
+            if request and request.get("action") == "chat_message":
+                data = request["data"]
+                self.on_seller_message(int(data["node"]), data["content"])
+                result["response"] = {"error": None}
+
+            for obj in objects:
+                if obj["type"] == "orders_counters" and obj.get("tag") != self.orders_tag:
+                    result["objects"].append({"type": "orders_counters", "id": self.user_id, "tag": self.orders_tag,
+                                              "data": {"buyer": 0, "seller": self.seller_counter}})
+                elif obj["type"] == "chat_bookmarks" and obj.get("tag") != self.chats_tag:
+                    result["objects"].append({"type": "chat_bookmarks", "id": self.user_id, "tag": self.chats_tag,
+                                              "data": {"html": self.bookmarks_html()}})
+                elif obj["type"] == "chat_node":
+                    node_id = int(obj["id"])
+                    chat = self.chats.get(node_id)
+                    if chat is None:
+                        continue
+                    last = int((obj.get("data") or {}).get("last_message", -1))
+                    messages = [i for i in chat["messages"] if i[0] > last][-50:]
+                    result["objects"].append({
+                        "type": "chat_node", "id": node_id, "tag": gen_tag(self.random),
+                        "data": {"node": {"id": node_id, "name": f"users-{self.user_id}-{chat['user_id']}"},
+                                 "messages": [{"id": i[0], "author": i[1], "html": make_chat_message(*i)}
+                                              for i in messages]}})
+        return result
+
+    def raise_response(self, form: dict[str, list[str]]) -> dict:
+        game_id = int(form["game_id"][0])
+        with self.lock:
+            last = self.raise_times.get(game_id)
+            if last is not None and time.time() - last < 3600:
+                minutes = max(1, int((3600 - (time.time() - last)) // 60))
+                return {"error": True, "msg": f"Подождите {minutes} минут."}
+            categories = [(i, title) for i, (game, title, _) in self.categories.items() if game == game_id]
+            if len(categories) > 1 and "node_ids[]" not in form:
+                return {"modal": make_raise_modal(categories)}
+            self.raise_times[game_id] = time.time()
+            return {"error": False, "msg": "Предложения подняты."}
+
+    def handle(self, method: str, path: str, query: dict[str, list[str]], form: dict[str, list[str]],
+               authorized: bool) -> tuple[int, str, str, dict[str, str]]:
+        """
+        Формирует ответ на запрос.
+
+        :return: (статус-код, Content-Type, тело ответа, дополнительные заголовки).
+        """
+        html_type, json_type = "text/html; charset=utf-8", "application/json"
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+        if path == "/__emulator/stats":
+            return 200, json_type, json.dumps(self.stats(), ensure_ascii=False), {}
+        if path == "/__emulator/order" and method == "POST":
+            return 200, json_type, json.dumps({"id": self.add_order()}), {}
+
+        if path in ("/runner/", "/lots/raise", "/lots/offerSave", "/orders/refund") and \
+                self.random.random() < self.scenario.throttle_rate:
+            with self.lock:
+                self.throttled += 1
+            return 429, html_type, "Too Many Requests", {"Retry-After": str(self.scenario.retry_after)}
+
+        if not authorized:
+            return 200, html_type, "<html><body><a href=\"/account/login\">Войти</a></body></html>", {}
+
+        if path == "/" and method == "GET":
+            with self.lock:
+                active = sum(1 for i in self.orders if i[5] == "paid")
+            return 200, html_type, make_main_page(self.user_id, self.username, self.csrf_token, active,
+                                                  self.balance), {}
+        if path == "/orders/trade":
+            with self.lock:
+                return 200, html_type, self.orders_html(), {}
+        if path == "/chat/":
+            with self.lock:
+                return 200, html_type, make_chats_page(self.username, self.bookmarks_html()), {}
+        if path == "/runner/":
+            data = {k: v[0] for k, v in form.items()}
+            return 200, json_type, json.dumps(self.runner_response(data), ensure_ascii=False), {}
+        if path.startswith("/users/"):
+            if path.strip("/").split("/")[-1] != str(self.user_id):
+                return 404, html_type, "Not found", {}
+            with self.lock:
+                return 200, html_type, self.user_html(), {}
+        if path.endswith("/trade") and path.startswith(("/lots/", "/chips/")):
+            category = self.categories.get(int(path.split("/")[2]))
+            if category is None:
+                return 404, html_type, "Not found", {}
+            return 200, html_type, make_category_page(self.username, category[0], category[2]), {}
+        if path == "/lots/offerEdit":
+            lot_id = int(query["offer"][0])
+            with self.lock:
+                category_id, title, price, active = self.lots[lot_id]
+            html = make_lot_form(lot_id, category_id, title, price, active, self.csrf_token)
+            return 200, json_type, json.dumps({"html": html}, ensure_ascii=False), {}
+        if path == "/lots/offerSave":
+            with self.lock:
+                lot = self.lots.get(int(form["offer_id"][0]))
+                if lot is None:
+                    return 200, json_type, json.dumps({"error": True, "msg": "Лот не найден."}), {}
+                lot[3] = "active" in form
+            return 200, json_type, json.dumps({"done": True, "error": False}), {}
+        if path == "/lots/raise":
+            return 200, json_type, json.dumps(self.raise_response(form), ensure_ascii=False), {}
+        if path == "/orders/refund":
+            with self.lock:
+                order = self.orders_by_id.get(form["id"][0])
+                if order is None:
+                    return 200, json_type, json.dumps({"error": True, "msg": "Заказ не найден."}), {}
+                order[5] = "refund"
+                self.orders_tag = gen_tag(self.random)
+                self.seller_counter += 1
+            return 200, json_type, json.dumps({"error": False, "msg": "Средства возвращены."}), {}
+        return 404, html_type, "Not found", {}
+
+    # Сценарий
+    def run_scenario(self) -> None:
+        """
+        Генерирует пачки заказов / сообщений по сценарию (до остановки эмулятора или окончания пачек).
+        """
+        scenario = self.scenario
+        if not scenario.orders_per_burst and not scenario.messages_per_burst:
+            return
+        burst = 0
+        while not self.stop_event.wait(scenario.burst_interval):
+            if scenario.bursts is not None and burst >= scenario.bursts:
+                return
+            burst += 1
+            for _ in range(scenario.orders_per_burst):
+                self.add_order()
+            for _ in range(scenario.messages_per_burst):
+                self.add_buyer_message()
+            logger.info(f"Пачка {burst}: {scenario.orders_per_burst} заказов, "
+                        f"{scenario.messages_per_burst} сообщений.")
+
+    def stats(self) -> dict:
+        """
+        :return: статистика эмулятора: запросы по путям, ответы 429, кол-во заказов / выдач и перцентили времени
+        выдачи (от появления заказа до первого сообщения продавца покупателю).
+        """
+        with self.lock:
+            times = sorted(self.delivery_times.values())
+            result = {
+                "scenario": self.scenario.name,
+                "requests": dict(self.requests),
+                "throttled": self.throttled,
+                "orders": len(self.orders),
+                "delivered": len(times),
+                "messages_received": self.messages_received
+            }
+        if times:
+            result["delivery_time"] = {"p50": times[len(times) // 2], "p90": times[int(len(times) * 0.9)],
+                                       "max": times[-1]}
+        return result
+
+    # Сервер
+    def make_handler(self) -> type:
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def process(self, method: str):
+                scenario = emulator.scenario
+                if scenario.latency or scenario.latency_jitter:
+                    time.sleep(scenario.latency + emulator.random.uniform(0, scenario.latency_jitter))
+                url = urlsplit(self.path)
+                # Тело читается и у GET-запросов: FunPayAPI отправляет данные формы и в них (lots/offerEdit).
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                form = parse_qs(body.decode("utf-8"), keep_blank_values=True) if method == "POST" else {}
+                authorized = "golden_key=" in (self.headers.get("Cookie") or "")
+                try:
+                    status, content_type, text, headers = emulator.handle(method, url.path,
+                                                                          parse_qs(url.query), form, authorized)
+                except:
+                    logger.debug("------TRACEBACK------", exc_info=True)
+                    status, content_type, text, headers = 500, "text/plain", "Internal Server Error", {}
+                data = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                if url.path == "/":
+                    self.send_header("Set-Cookie", f"PHPSESSID={gen_tag(emulator.random, 26)}; path=/")
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.process("GET")
+
+            def do_POST(self):
+                self.process("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self, host: str = "127.0.0.1", port: int = 8080) -> str:
+        """
+        Запускает HTTP-сервер и генерацию сценария в daemon-потоках.
+
+        :return: адрес эмулятора (для FunPayAPI.types.Links.set_base_url()).
+        """
+        self.server = ThreadingHTTPServer((host, port), self.make_handler())
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        Thread(target=self.run_scenario, daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальный эмулятор FunPay для нагрузочного тестирования FPC.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="orders_burst")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bursts", type=int, default=None, help="кол-во пачек (по умолчанию - бесконечно)")
+    parser.add_argument("--interval", type=float, default=None, help="интервал между пачками в секундах")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    scenario = SCENARIOS[args.scenario]
+    if args.bursts is not None:
+        scenario = replace(scenario, bursts=args.bursts)
+    if args.interval is not None:
+        scenario = replace(scenario, burst_interval=args.interval)
+
+    emulator = FunPayEmulator(scenario, seed=args.seed)
+    url = emulator.start(args.host, args.port)
+    logger.info(f"Эмулятор FunPay запущен: {url} (сценарий: {scenario.name}). "
+                f"Запустите FPC с FUNPAY_BASE_URL={url}.")
+    try:
+        while True:
+            time.sleep(10)
+            logger.info(json.dumps(emulator.stats(), ensure_ascii=False))
+    except KeyboardInterrupt:
+        emulator.stop()
+        print(json.dumps(emulator.stats(), ensure_ascii=False, indent=4))
+
+
+if __name__ == "__main__":
+    main()
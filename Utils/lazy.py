@@ -0,0 +1,32 @@
+"""
+В данном модуле написан отложенный импорт модулей: модуль импортируется при первом обращении к его атрибуту.
+Используется для подсистем, которые могут быть выключены (например, Telegram бот), чтобы не замедлять запуск.
+"""
+
+from types import ModuleType
+import importlib
+
+
+class LazyModule:
+    """
+    Прокси модуля, импортирующий модуль при первом обращении к любому его атрибуту.
+    """
+    def __init__(self, name: str):
+        """
+        :param name: полное имя модуля (например, "tg_bot.utils").
+        """
+        self.__name = name
+        self.__module: ModuleType | None = None
+
+    def load(self) -> ModuleType:
+        """
+        Импортирует модуль (если он еще не импортирован).
+
+        :return: модуль.
+        """
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return self.__module
+
+    def __getattr__(self, item):
+        return getattr(self.load(), item)
@@ -1,13 +1,26 @@
 """
-В данном модуле написаны форматтеры для логгера.
+В данном модуле написаны форматтеры для логгера и перевод логгеров на асинхронную запись (QueueHandler +
+QueueListener): потоки FPC только кладут запись в очередь, а форматирование и запись в консоль / файл выполняются
+в отдельном потоке.
 """
 
 from colorama import Fore, Back, Style
 import logging.handlers
 import logging
+import atexit
+import queue
 import re
 
 
+COLORS = {
+    "$YELLOW": Fore.YELLOW,
+    "$CYAN": Fore.CYAN,
+    "$MAGENTA": Fore.MAGENTA,
+    "$BLUE": Fore.BLUE,
+}
+COLORS_RE = re.compile(r"\$(?:YELLOW|CYAN|MAGENTA|BLUE|RESET)")
+
+
 def add_colors(text: str) -> str:
     """
     Заменяет ключевые слова на коды цветов.
@@ -24,20 +37,15 @@ def add_colors(text: str) -> str:
 
     :return: цветной текст.
     """
-    colors = {
-        "$YELLOW": Fore.YELLOW,
-        "$CYAN": Fore.CYAN,
-        "$MAGENTA": Fore.MAGENTA,
-        "$BLUE": Fore.BLUE,
-    }
-    for c in colors:
-        text = text.replace(c, colors[c])
+    for c in COLORS:
+        text = text.replace(c, COLORS[c])
     return text
 
 
 class CLILoggerFormatter(logging.Formatter):
     """
     Форматтер для вывода логов в консоль.
+    Шаблоны строк для каждого уровня логирования собираются один раз при создании форматтера.
     """
     log_format = f"{Fore.BLACK + Style.BRIGHT}[%(asctime)s]{Style.RESET_ALL}" \
                  f"{Fore.CYAN}>{Style.RESET_ALL} $RESET%(levelname)s:$spaces %(message)s{Style.RESET_ALL}"
@@ -54,17 +62,34 @@ class CLILoggerFormatter(logging.Formatter):
     max_level_name_length = 10
 
     def __init__(self):
-        super(CLILoggerFormatter, self).__init__()
+        super(CLILoggerFormatter, self).__init__(datefmt=self.time_format)
+        # {уровень: (шаблон строки, {ключевое слово: код цвета})}
+        self.templates: dict[int, tuple[str, dict[str, str]]] = {}
+        for level, color in self.colors.items():
+            level_name = logging.getLevelName(level)
+            template = self.log_format.replace("$RESET", color) \
+                .replace("%(levelname)s", level_name) \
+                .replace("$spaces", " " * (self.max_level_name_length - len(level_name)))
+            self.templates[level] = (template, {**COLORS, "$RESET": color})
+
+    def get_template(self, record: logging.LogRecord) -> tuple[str, dict[str, str]]:
+        template = self.templates.get(record.levelno)
+        if template is None:
+            color = self.colors.get(record.levelno, "")
+            template = (self.log_format.replace("$RESET", color)
+                        .replace("%(levelname)s", record.levelname)
+                        .replace("$spaces", " " * max(0, self.max_level_name_length - len(record.levelname))),
+                        {**COLORS, "$RESET": color})
+            self.templates[record.levelno] = template
+        return template
 
     def format(self, record: logging.LogRecord) -> str:
-        msg = record.getMessage()
-        msg = add_colors(msg)
-        msg = msg.replace("$RESET", self.colors[record.levelno])
-        record.msg = msg
-        log_format = self.log_format.replace("$RESET", self.colors[record.levelno])\
-            .replace("$spaces", " " * (self.max_level_name_length - len(record.levelname)))
-        formatter = logging.Formatter(log_format, self.time_format)
-        return formatter.format(record)
+        template, colors = self.get_template(record)
+        msg = COLORS_RE.sub(lambda m: colors[m.group()], record.getMessage())
+        result = template % {"asctime": self.formatTime(record, self.datefmt), "message": msg}
+        if record.exc_info:
+            result += "\n" + self.formatException(record.exc_info)
+        return result
 
 
 class FileLoggerFormatter(logging.Formatter):
@@ -73,15 +98,109 @@ class FileLoggerFormatter(logging.Formatter):
     """
     log_format = "[%(asctime)s][%(filename)s][%(lineno)d]> %(levelname).1s: %(message)s"
     max_level_name_length = 12
-    clear_expression = re.compile(r"(\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~]))|(\n)|(\r)")
+    clear_expression = re.compile(r"(\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~]))|(\n)|(\r)|"
+                                  r"(\$(?:YELLOW|CYAN|MAGENTA|BLUE|RESET))")
     time_format = "%H:%M:%S"
 
     def __init__(self):
-        super(FileLoggerFormatter, self).__init__()
+        super(FileLoggerFormatter, self).__init__(self.log_format, self.time_format)
 
     def format(self, record: logging.LogRecord) -> str:
-        msg = record.getMessage()
-        msg = self.clear_expression.sub("", msg)
-        record.msg = msg
-        formatter = logging.Formatter(self.log_format, self.time_format)
-        return formatter.format(record)
+        msg = self.clear_expression.sub("", record.getMessage())
+        result = self.log_format % {"asctime": self.formatTime(record, self.datefmt), "filename": record.filename,
+                                    "lineno": record.lineno, "levelname": record.levelname, "message": msg}
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            result += "\n" + record.exc_text
+        return result
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, не форматирующий запись в потоке, который ее создал: сообщение (с аргументами) и traceback
+    форматируются в потоке QueueListener'а. Поэтому аргументы, переданные в логгер, не должны изменяться после
+    вызова логгера.
+    Если очередь переполнена, запись отбрасывается и учитывается в self.dropped; когда в очереди снова появляется
+    место, перед следующей записью в очередь кладется одно предупреждение с кол-вом пропущенных записей.
+    """
+    def __init__(self, queue_obj: queue.Queue):
+        super(LazyQueueHandler, self).__init__(queue_obj)
+        self.dropped = 0
+        self.unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Вызывается под self.lock (из Handler.handle()), поэтому счетчики изменяются без гонок.
+        try:
+            if self.unreported:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": record.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"Очередь логов переполнена: пропущено записей: {self.unreported}."
+                }))
+                self.unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self.unreported += 1
+
+
+__listeners: list[logging.handlers.QueueListener] = []
+__queue_handlers: list[LazyQueueHandler] = []
+
+
+def start_queue_logging(logger_names: list[str], max_queue_size: int = 10000) -> None:
+    """
+    Переводит логгеры на асинхронную запись: обработчики логгеров заменяются на LazyQueueHandler, а сами
+    обработчики вызываются QueueListener'ом в отдельном потоке (по одному потоку на каждый набор обработчиков).
+    Если очередь переполнена (например, диск не успевает), новые записи отбрасываются (см. LazyQueueHandler.enqueue),
+    а не блокируют потоки FPC.
+
+    :param logger_names: названия логгеров.
+
+    :param max_queue_size: максимальное кол-во записей в очереди.
+    """
+    queue_handlers: dict[tuple, LazyQueueHandler] = {}
+    for name in logger_names:
+        logger_obj = logging.getLogger(name)
+        handlers = tuple(i for i in logger_obj.handlers if not isinstance(i, logging.handlers.QueueHandler))
+        if not handlers:
+            continue
+        queue_handler = queue_handlers.get(handlers)
+        if queue_handler is None:
+            records_queue = queue.Queue(max_queue_size)
+            queue_handler = LazyQueueHandler(records_queue)
+            listener = logging.handlers.QueueListener(records_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            __listeners.append(listener)
+            __queue_handlers.append(queue_handler)
+            queue_handlers[handlers] = queue_handler
+        for handler in handlers:
+            logger_obj.removeHandler(handler)
+        logger_obj.addHandler(queue_handler)
+
+
+def dropped_records() -> int:
+    """
+    Возвращает кол-во записей, отброшенных из-за переполнения очередей логов.
+
+    :return: кол-во отброшенных записей.
+    """
+    return sum(i.dropped for i in __queue_handlers)
+
+
+def stop_queue_logging() -> None:
+    """
+    Дописывает все записи из очередей и останавливает потоки QueueListener'ов.
+    """
+    while __listeners:
+        try:
+            __listeners.pop().stop()
+        except:
+            pass
+
+
+atexit.register(stop_queue_logging)
@@ -0,0 +1,89 @@
+"""
+В данном модуле написан поиск названий лотов из конфига автовыдачи в названии заказа / лота (алгоритм Ахо-Корасик).
+"""
+
+from collections import deque
+
+
+class LotMatcher:
+    """
+    Ищет в тексте подстроки из заранее заданного списка за один проход по тексту.
+    Результат совпадает с линейным поиском "первый из patterns, который входит в text":
+    из всех найденных подстрок возвращается та, что стоит раньше в списке patterns.
+    """
+    def __init__(self, patterns: list[str]):
+        """
+        :param patterns: список подстрок (названий секций конфига автовыдачи) в порядке приоритета.
+        """
+        self.patterns = list(patterns)
+        # Автомат: переходы, суффиксные ссылки и минимальный индекс подстроки, оканчивающейся в вершине
+        # (с учетом суффиксных ссылок).
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.best: list[int | None] = [None]
+
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                node = next_node
+            if self.best[node] is None or index < self.best[node]:
+                self.best[node] = index
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, next_node in self.goto[node].items():
+                queue.append(next_node)
+                if node:
+                    fail = self.fail[node]
+                    while fail and char not in self.goto[fail]:
+                        fail = self.fail[fail]
+                    self.fail[next_node] = self.goto[fail].get(char, 0)
+                self.best[next_node] = self.min_index(self.best[next_node], self.best[self.fail[next_node]])
+
+    @staticmethod
+    def min_index(a: int | None, b: int | None) -> int | None:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return min(a, b)
+
+    def find_first_index(self, text: str) -> int | None:
+        """
+        Находит индекс первой (по порядку в patterns) подстроки, входящей в text.
+
+        :param text: текст (название заказа / лота).
+
+        :return: индекс подстроки в patterns или None, если ни одна подстрока не найдена.
+        """
+        # Пустая подстрока (если есть) входит в любой текст.
+        result = self.best[0]
+        node = 0
+        for char in text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            if self.best[node] is not None and (result is None or self.best[node] < result):
+                result = self.best[node]
+                if not result:
+                    break
+        return result
+
+    def find_first(self, text: str) -> str | None:
+        """
+        Находит первую (по порядку в patterns) подстроку, входящую в text.
+
+        :param text: текст (название заказа / лота).
+
+        :return: подстрока или None, если ни одна подстрока не найдена.
+        """
+        index = self.find_first_index(text)
+        return None if index is None else self.patterns[index]
@@ -0,0 +1,209 @@
+"""
+В данном модуле написана очередь исходящих сообщений FunPay: сообщения одного чата отправляются строго по очереди,
+сообщения разных чатов - параллельно, а частота запросов всего аккаунта ограничивается token bucket'ом.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+if TYPE_CHECKING:
+    from FunPayAPI.types import Message
+
+from concurrent.futures import Future
+from threading import Lock
+from Utils.dispatcher import EventDispatcher
+import FunPayAPI.exceptions
+import logging
+import time
+
+
+logger = logging.getLogger("FPC.message_queue")
+
+
+class TokenBucket:
+    """
+    Token bucket: в среднем не более rate запросов в секунду, допускаются всплески до capacity запросов.
+    """
+    def __init__(self, rate: float | int = 3.0, capacity: int = 5):
+        """
+        :param rate: скорость пополнения (токенов в секунду).
+
+        :param capacity: максимальное кол-во накопленных токенов.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.time()
+        self.paused_until = 0.0
+        self.lock = Lock()
+
+    def acquire(self) -> float:
+        """
+        Забирает 1 токен, ожидая его появления (и окончания паузы после ошибки 429).
+
+        :return: время ожидания в секундах.
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.time()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float | int) -> None:
+        """
+        Приостанавливает выдачу токенов на seconds секунд и обнуляет накопленные токены.
+
+        :param seconds: длительность паузы в секундах.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+            self.tokens = 0.0
+
+
+class MessageQueue:
+    """
+    Очередь исходящих сообщений.
+    """
+    def __init__(self, send_func: Callable[[Message], dict], on_sent: Callable[[Message], None] | None = None,
+                 workers: int = 4, rate: float | int = 3.0, burst: int = 5, max_pending: int = 1000,
+                 max_throttled: int = 5):
+        """
+        :param send_func: функция, отправляющая одно сообщение (Account.send_message).
+
+        :param on_sent: функция, вызываемая после успешной отправки сообщения.
+
+        :param workers: кол-во чатов, в которые сообщения отправляются одновременно.
+
+        :param rate: максимальная средняя частота отправки сообщений (в секунду) для всего аккаунта.
+
+        :param burst: максимальное кол-во сообщений, отправляемых подряд без ожидания.
+
+        :param max_pending: максимальное кол-во сообщений в очереди (при переполнении постановка в очередь
+        блокируется).
+
+        :param max_throttled: сколько раз подряд сообщение может получить ошибку 429, прежде чем это будет
+        считаться неудачной попыткой.
+        """
+        self.send_func = send_func
+        self.on_sent = on_sent
+        self.bucket = TokenBucket(rate, burst)
+        self.dispatcher = EventDispatcher(workers=workers, max_pending=max_pending)
+        self.max_throttled = max_throttled
+
+        self.lock = Lock()
+        self.sent = 0
+        self.failed = 0
+        self.throttled = 0
+        self.total_rate_wait = 0.0
+
+    def submit(self, messages: list[Message], attempts: int = 3) -> Future:
+        """
+        Ставит сообщения в очередь чата (все сообщения списка должны относиться к одному чату и отправляются
+        подряд; если одно из них не отправлено, остальные не отправляются).
+
+        :param messages: список сообщений.
+
+        :param attempts: кол-во попыток на отправку каждого сообщения.
+
+        :return: Future, результат которого - True, если все сообщения доставлены, иначе False.
+        """
+        future = Future()
+        if not messages:
+            future.set_result(True)
+            return future
+        self.dispatcher.start()
+        self.dispatcher.submit(("node", messages[0].node_id), [self.deliver], (messages, attempts, future),
+                               self.call)
+        return future
+
+    @staticmethod
+    def call(func: Callable, args: tuple) -> None:
+        func(*args)
+
+    def deliver(self, messages: list[Message], attempts: int, future: Future) -> None:
+        result = False
+        try:
+            result = all(self.send(mes, attempts) for mes in messages)
+        except:
+            logger.error(f"Произошла непредвиденная ошибка при отправке сообщения в чат "
+                         f"$YELLOW{messages[0].node_id}$RESET.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+        future.set_result(result)
+
+    def send(self, mes: Message, attempts: int) -> bool:
+        """
+        Отправляет одно сообщение с повторными попытками. Ошибка 429 приостанавливает отправку всех сообщений
+        аккаунта на время из Retry-After (или 10 секунд) и не расходует попытку.
+
+        :param mes: сообщение.
+
+        :param attempts: кол-во попыток.
+
+        :return: True, если сообщение доставлено, иначе False.
+        """
+        current_attempts = attempts
+        throttled = 0
+        while current_attempts:
+            wait = self.bucket.acquire()
+            with self.lock:
+                self.total_rate_wait += wait
+            try:
+                response = self.send_func(mes)
+                if response.get("response") and response.get("response").get("error") is None:
+                    if self.on_sent is not None:
+                        self.on_sent(mes)
+                    with self.lock:
+                        self.sent += 1
+                    logger.info(f"Отправил сообщение в чат $YELLOW{mes.node_id}.")
+                    return True
+            except FunPayAPI.exceptions.StatusCodeIsNot200 as e:
+                if e.status_code == 429 and throttled < self.max_throttled:
+                    throttled += 1
+                    delay = e.retry_after if e.retry_after is not None else 10
+                    with self.lock:
+                        self.throttled += 1
+                    logger.warning(f"Ошибка 429 при отправке сообщения в чат $YELLOW{mes.node_id}$RESET. "
+                                   f"Отправка сообщений приостановлена на {delay} сек.")
+                    self.bucket.pause(delay)
+                    continue
+                logger.debug("------TRACEBACK------", exc_info=True)
+            except:
+                logger.debug("------TRACEBACK------", exc_info=True)
+            # if error in response
+            logger.warning(f"Произошла ошибка при отправке сообщения в чат $YELLOW{mes.node_id}.$RESET "
+                           f"Подробнее в файле logs/log.log")
+            logger.info(f"Осталось попыток: {current_attempts}.")
+            current_attempts -= 1
+            time.sleep(1)
+
+        logger.error(f"Не удалось отправить сообщение в чат $YELLOW{mes.node_id}$RESET: "
+                     f"превышено кол-во попыток.")
+        with self.lock:
+            self.failed += 1
+        return False
+
+    def stats(self) -> dict:
+        """
+        Возвращает метрики очереди.
+
+        :return: словарь с метриками.
+        """
+        with self.lock:
+            sent = self.sent
+            result = {
+                "sent": sent,
+                "failed": self.failed,
+                "throttled": self.throttled,
+                "avg_rate_wait": self.total_rate_wait / (sent + self.failed) if sent + self.failed else 0.0
+            }
+        result["pending"] = self.dispatcher.stats()["pending"]
+        return result
@@ -0,0 +1,357 @@
+"""
+В данном модуле написан реестр метрик FPC (счетчики, показатели и гистограммы) и локальный HTTP-сервер, отдающий
+метрики в текстовом формате Prometheus.
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable
+from threading import Lock, Thread
+import logging
+import math
+
+
+logger = logging.getLogger("FPC.metrics")
+
+# Границы корзин гистограмм по умолчанию (в секундах).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_value(value: float) -> str:
+    """
+    Форматирует значение для текстового формата Prometheus.
+    """
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    """
+    :return: метки в формате Prometheus ({name="value",...}) или пустая строка, если меток нет.
+    """
+    labels = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Metric:
+    """
+    Базовый класс метрики. Значения хранятся отдельно для каждого набора значений меток.
+    """
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        """
+        :param name: название метрики (например, fpc_funpay_requests_total).
+
+        :param description: описание метрики.
+
+        :param labels: названия меток.
+        """
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.lock = Lock()
+        self.values: dict[tuple, float | list] = {}
+
+    def check_labels(self, labels: tuple) -> None:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labels}, получено: {labels}.")
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        """
+        :return: список сэмплов метрики [(суффикс названия, метки в формате Prometheus, значение)].
+        """
+        with self.lock:
+            items = list(self.values.items())
+        return [("", format_labels(self.labels, k), v) for k, v in items]
+
+    def render(self) -> list[str]:
+        """
+        :return: строки метрики в текстовом формате Prometheus.
+        """
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(f"{self.name}{suffix}{labels} {format_value(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+    def summary(self) -> list[str]:
+        """
+        :return: краткое описание значений метрики для Telegram (по строке на каждый набор меток).
+        """
+        return [f"{self.name}{labels}: {format_value(round(value, 3))}" for _, labels, value in self.samples()]
+
+
+class Counter(Metric):
+    """
+    Счетчик (только увеличивается).
+    """
+    type_name = "counter"
+
+    def inc(self, value: float = 1, labels: tuple = ()) -> None:
+        """
+        Увеличивает счетчик.
+
+        :param value: на сколько увеличить.
+
+        :param labels: значения меток (в порядке self.labels).
+        """
+        self.check_labels(labels)
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def get(self, labels: tuple = ()) -> float:
+        with self.lock:
+            return self.values.get(labels, 0)
+
+
+class Gauge(Metric):
+    """
+    Показатель (текущее значение). Если передана функция, значение вычисляется при каждом чтении метрики.
+    """
+    type_name = "gauge"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (),
+                 func: Callable[[], float] | None = None):
+        """
+        :param func: функция, возвращающая текущее значение (только для метрик без меток).
+        """
+        super(Gauge, self).__init__(name, description, labels)
+        self.func = func
+
+    def set(self, value: float, labels: tuple = ()) -> None:
+        self.check_labels(labels)
+        with self.lock:
+            self.values[labels] = value
+
+    def inc(self, value: float = 1, labels: tuple = ()) -> None:
+        self.check_labels(labels)
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def dec(self, value: float = 1, labels: tuple = ()) -> None:
+        self.inc(-value, labels)
+
+    def get(self, labels: tuple = ()) -> float:
+        if self.func is not None:
+            return self.func()
+        with self.lock:
+            return self.values.get(labels, 0)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        if self.func is None:
+            return super(Gauge, self).samples()
+        try:
+            return [("", "", float(self.func()))]
+        except:
+            logger.debug(f"Не удалось получить значение метрики {self.name}.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            return []
+
+
+class Histogram(Metric):
+    """
+    Гистограмма (распределение значений по корзинам + сумма и кол-во значений).
+    """
+    type_name = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        :param buckets: верхние границы корзин (по возрастанию, без +Inf).
+        """
+        super(Histogram, self).__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        """
+        Добавляет значение в гистограмму.
+
+        :param value: значение (например, длительность в секундах).
+
+        :param labels: значения меток (в порядке self.labels).
+        """
+        self.check_labels(labels)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                # [кол-во значений в каждой корзине (не накопительно) + корзина +Inf, сумма, кол-во]
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self.values[labels] = state
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self) -> list[tuple[tuple, list[int], float, int]]:
+        """
+        :return: копия состояния [(значения меток, кол-во значений в корзинах, сумма, кол-во)].
+        """
+        with self.lock:
+            return [(k, list(v[0]), v[1], v[2]) for k, v in self.values.items()]
+
+    def quantile(self, counts: list[int], total: int, q: float) -> float:
+        """
+        Оценивает квантиль по корзинам (верхняя граница корзины, в которую попадает квантиль).
+        """
+        target = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return math.inf
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        result = []
+        for labels, counts, total_sum, total in self.snapshot():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                result.append(("_bucket", format_labels(self.labels, labels, f'le="{format_value(bound)}"'),
+                               cumulative))
+            result.append(("_sum", format_labels(self.labels, labels), total_sum))
+            result.append(("_count", format_labels(self.labels, labels), total))
+        return result
+
+    def summary(self) -> list[str]:
+        result = []
+        for labels, counts, total_sum, total in self.snapshot():
+            if not total:
+                continue
+            p95 = self.quantile(counts, total, 0.95)
+            result.append(f"{self.name}{format_labels(self.labels, labels)}: {total} шт., "
+                          f"ср. {round(total_sum / total, 3)}, p95 ≤ {format_value(p95)}")
+        return result
+
+
+class Registry:
+    """
+    Реестр метрик. Метрики создаются один раз по названию: повторный вызов counter() / gauge() / histogram()
+    с тем же названием возвращает уже созданную метрику.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.metrics: dict[str, Metric] = {}
+
+    def __get_or_create(self, cls: type, name: str, *args, **kwargs) -> Metric:
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self.metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Метрика {name} уже зарегистрирована с типом {metric.type_name}.")
+            return metric
+
+    def counter(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.__get_or_create(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str, labels: tuple[str, ...] = (),
+              func: Callable[[], float] | None = None) -> Gauge:
+        return self.__get_or_create(Gauge, name, description, labels, func=func)
+
+    def histogram(self, name: str, description: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.__get_or_create(Histogram, name, description, labels, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        """
+        :return: все метрики в текстовом формате Prometheus.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list[str]:
+        """
+        :return: краткое описание всех метрик для Telegram.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.summary())
+        return lines
+
+
+class MetricsServer:
+    """
+    Локальный HTTP-сервер, отдающий метрики реестра по GET /metrics (в отдельном daemon-потоке).
+    """
+    def __init__(self, registry: Registry, port: int, host: str = "127.0.0.1",
+                 routes: dict[str, tuple[str, Callable[[], str]]] | None = None):
+        """
+        :param registry: реестр метрик.
+
+        :param port: порт.
+
+        :param host: адрес (по умолчанию - только локальные подключения).
+
+        :param routes: дополнительные страницы {путь: (Content-Type, функция, возвращающая текст страницы)}.
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.routes = {"/": ("text/plain; version=0.0.4; charset=utf-8", registry.render_prometheus),
+                       "/metrics": ("text/plain; version=0.0.4; charset=utf-8", registry.render_prometheus),
+                       **(routes or {})}
+        self.server: ThreadingHTTPServer | None = None
+
+    def make_handler(self) -> type:
+        routes = self.routes
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                route = routes.get(self.path.split("?")[0])
+                if route is None:
+                    self.send_error(404)
+                    return
+                content_type, func = route
+                body = func().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> bool:
+        """
+        Запускает сервер.
+
+        :return: True, если сервер запущен, False - если нет (например, порт занят).
+        """
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), self.make_handler())
+        except OSError:
+            logger.error(f"Не удалось запустить сервер метрик на {self.host}:{self.port}.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            return False
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        logger.info(f"$CYANСервер метрик запущен: $YELLOWhttp://{self.host}:{self.port}/metrics$RESET.")
+        return True
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
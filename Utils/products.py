@@ -0,0 +1,466 @@
+"""
+В данном модуле написано хранилище товаров для файлов storage/products/*.txt.
+
+Файл с товарами остается обычным текстовым файлом (1 строка - 1 товар, пустые строки игнорируются), но товары
+не вырезаются из начала файла при каждой выдаче: хранилище запоминает смещение (курсор) первого невыданного товара
+и кол-во оставшихся товаров в файле состояния storage/cache/products/<имя файла>.json. Выданная часть файла
+удаляется (компактизация), когда выданные товары составляют не меньше COMPACT_SHARE от всех товаров файла,
+возвращенные товары дописываются в конец файла.
+
+Все операции выполняются под блокировкой (threading.RLock внутри процесса + блокировка файла между процессами).
+Состояние сохраняется атомарно (временный файл + fsync + os.replace), а операции, изменяющие сам файл с товарами
+(дозапись и компактизация), предварительно записываются в журнал и доводятся до конца при следующем обращении
+к хранилищу, если процесс упал посреди записи.
+"""
+
+from contextlib import contextmanager
+from threading import RLock
+import Utils.exceptions
+from Utils import storage
+import hashlib
+import logging
+import shutil
+import json
+import os
+
+
+logger = logging.getLogger("FPC.products")
+
+STATE_DIR = "storage/cache/products"
+# Доля выданных товаров (от выданных с последней компактизации и оставшихся), при которой файл компактизируется.
+# Перезапись файла амортизируется: на каждую выдачу приходится не больше O(1) перезаписанных строк.
+COMPACT_SHARE = 0.5
+# Кол-во байт перед курсором, по которым проверяется, что выданная часть файла не была изменена извне.
+PREFIX_CHECK_SIZE = 256
+
+
+class ProductsStore:
+    """
+    Хранилище товаров одного файла.
+    """
+    def __init__(self, path: str, state_path: str | None = None):
+        """
+        :param path: путь до файла с товарами.
+
+        :param state_path: путь до файла состояния (по умолчанию storage/cache/products/<имя файла>.json).
+        Рядом с ним создаются файл журнала (.journal) и файл блокировки (.lock).
+        """
+        self.path = path
+        self.state_path = state_path or os.path.join(STATE_DIR, f"{os.path.basename(path)}.json")
+        base_path = self.state_path[:-5] if self.state_path.endswith(".json") else self.state_path
+        self.journal_path = f"{base_path}.journal"
+        self.lock = RLock()
+        self.file_lock = storage.FileLock(f"{base_path}.lock")
+        self.lock_depth = 0
+
+        # Смещение (в байтах) первого невыданного товара.
+        self.offset = 0
+        # Кол-во оставшихся товаров (None - неизвестно, нужно посчитать).
+        self.amount: int | None = None
+        # Кол-во выданных товаров перед курсором (с последней компактизации).
+        self.consumed = 0
+        # Размер и время изменения файла после последней записи хранилищем. Если они не совпадают с текущими,
+        # значит файл изменили извне и кол-во товаров нужно пересчитать.
+        self.size = -1
+        self.mtime_ns = -1
+        self.prefix_hash = ""
+        # Товары, взятые для выдачи, но еще не подтвержденные / не возвращенные: {токен (ID заказа): [товары]}.
+        self.pending: dict[str, list[str]] = {}
+        # (размер, время изменения) файла состояния после последнего чтения / записи этим экземпляром.
+        self.state_stamp: tuple[int, int] | None = None
+        self.compactions = 0
+
+        with self.locked():
+            if self.pending:
+                logger.warning(f"В файле с товарами $YELLOW{self.path}$RESET есть товары, выданные для заказов "
+                               f"$YELLOW{', '.join(self.pending)}$RESET, доставка которых не была подтверждена "
+                               f"(возможно, бот был остановлен во время выдачи).")
+
+    @contextmanager
+    def locked(self):
+        """
+        Блокирует хранилище (между потоками и процессами). При первом входе подгружает состояние, если его
+        изменил другой процесс, и доводит до конца операцию из журнала.
+        """
+        with self.lock:
+            self.lock_depth += 1
+            try:
+                if self.lock_depth == 1:
+                    self.file_lock.acquire()
+                    self.refresh()
+                    self.recover()
+                yield
+            finally:
+                self.lock_depth -= 1
+                if not self.lock_depth:
+                    self.file_lock.release()
+
+    def refresh(self) -> None:
+        """
+        Перечитывает файл состояния, если он был изменен не этим экземпляром.
+        """
+        try:
+            stat = os.stat(self.state_path)
+        except FileNotFoundError:
+            return
+        if (stat.st_size, stat.st_mtime_ns) != self.state_stamp:
+            self.load_state()
+
+    def load_state(self) -> None:
+        """
+        Загружает состояние хранилища из файла состояния.
+        """
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            stat = os.stat(self.state_path)
+            self.offset = int(data["offset"])
+            self.amount = None if data["amount"] is None else int(data["amount"])
+            self.consumed = int(data.get("consumed", 0))
+            self.size = int(data["size"])
+            self.mtime_ns = int(data["mtime_ns"])
+            self.prefix_hash = data["prefix_hash"]
+            self.pending = data.get("pending", {})
+            self.state_stamp = (stat.st_size, stat.st_mtime_ns)
+        except:
+            logger.warning(f"Не удалось загрузить состояние файла с товарами $YELLOW{self.path}$RESET. "
+                           f"Товары будут пересчитаны.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            self.offset, self.amount, self.size, self.mtime_ns, self.prefix_hash = 0, None, -1, -1, ""
+            self.consumed = 0
+
+    def save_state(self) -> None:
+        """
+        Атомарно сохраняет состояние хранилища в файл состояния. Именно этот момент является точкой фиксации
+        выдачи товара.
+        """
+        data = {"offset": self.offset, "amount": self.amount, "consumed": self.consumed, "size": self.size,
+                "mtime_ns": self.mtime_ns, "prefix_hash": self.prefix_hash, "pending": self.pending}
+        storage.atomic_write(self.state_path, json.dumps(data, ensure_ascii=False))
+        stat = os.stat(self.state_path)
+        self.state_stamp = (stat.st_size, stat.st_mtime_ns)
+
+    def write_journal(self, entry: dict) -> None:
+        storage.atomic_write(self.journal_path, json.dumps(entry, ensure_ascii=False))
+
+    def clear_journal(self) -> None:
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def recover(self) -> None:
+        """
+        Доводит до конца операцию, записанную в журнал (если процесс упал во время ее выполнения).
+        """
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except:
+            # Журнал записывается атомарно, поэтому нечитаемый журнал - это не наша запись.
+            logger.warning(f"Не удалось прочитать журнал файла с товарами $YELLOW{self.path}$RESET.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            self.clear_journal()
+            return
+
+        logger.warning(f"Восстанавливаю прерванную операцию ({entry['op']}) с файлом с товарами "
+                       f"$YELLOW{self.path}$RESET.")
+        if entry["op"] == "add":
+            # Дозапись повторяется с исходного размера файла: недописанный хвост отбрасывается.
+            self.append(entry["data"].encode("utf-8"), entry["size"])
+            if entry.get("token") is not None:
+                self.pending.pop(entry["token"], None)
+        elif entry["op"] == "compact":
+            if os.path.exists(self.path) and os.path.getsize(self.path) == entry["new_size"]:
+                self.offset, self.consumed, self.prefix_hash = 0, 0, ""
+            elif os.path.exists(f"{self.path}.tmp"):
+                os.remove(f"{self.path}.tmp")
+        self.amount = None
+        self.sync(save=False)
+        self.save_state()
+        self.clear_journal()
+
+    def remember(self, stat: os.stat_result) -> None:
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+
+    def hash_prefix(self, f) -> str:
+        """
+        Считает хэш последних PREFIX_CHECK_SIZE байт перед курсором.
+
+        :param f: файл с товарами, открытый в режиме "rb".
+        """
+        start = max(0, self.offset - PREFIX_CHECK_SIZE)
+        f.seek(start)
+        return hashlib.md5(f.read(self.offset - start)).hexdigest()
+
+    @staticmethod
+    def parse_line(line: bytes) -> str | None:
+        """
+        Возвращает товар из строки файла или None, если строка пустая.
+        """
+        line = line.rstrip(b"\r\n")
+        return line.decode("utf-8") if line else None
+
+    def count_lines(self, data: bytes) -> int:
+        return sum(1 for line in data.split(b"\n") if self.parse_line(line) is not None)
+
+    def sync(self, save: bool = True) -> os.stat_result | None:
+        """
+        Сверяет состояние хранилища с файлом. Если файл был изменен извне, пересчитывает товары после курсора.
+        Если была изменена выданная часть файла (например, файл перезаписан), курсор сбрасывается в начало.
+
+        :param save: сохранить ли состояние, если оно изменилось.
+
+        :return: os.stat_result файла с товарами или None, если файла нет.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.offset, self.amount, self.consumed, self.prefix_hash = 0, 0, 0, ""
+            self.size = self.mtime_ns = -1
+            return None
+
+        if self.amount is not None and stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+            return stat
+
+        with open(self.path, "rb") as f:
+            if self.offset and (stat.st_size < self.offset or self.hash_prefix(f) != self.prefix_hash):
+                logger.warning(f"Файл с товарами $YELLOW{self.path}$RESET был перезаписан. "
+                               f"Товары будут выдаваться с начала файла.")
+                self.offset, self.consumed, self.prefix_hash = 0, 0, ""
+            f.seek(self.offset)
+            self.amount = sum(1 for line in f if self.parse_line(line) is not None)
+        self.remember(stat)
+        if save:
+            self.save_state()
+        return stat
+
+    def count(self) -> int:
+        """
+        Возвращает кол-во товаров в файле (без чтения файла, если он не изменялся извне).
+
+        :return: кол-во товаров.
+        """
+        with self.locked():
+            self.sync()
+            return self.amount
+
+    def take(self, amount: int = 1, token: str | None = None) -> list[str]:
+        """
+        Берет из файла amount первых товаров.
+        Если передан token, товары резервируются за ним до вызова confirm() / release(), а повторный вызов с тем же
+        токеном возвращает те же самые товары (выдача ровно один раз, даже если заказ обрабатывается повторно).
+
+        :param amount: кол-во товаров.
+
+        :param token: токен выдачи (например, ID заказа).
+
+        :return: список товаров.
+        """
+        with self.locked():
+            if token is not None and token in self.pending:
+                return list(self.pending[token])
+            if self.sync() is None:
+                raise FileNotFoundError(self.path)
+            if not self.amount:
+                raise Utils.exceptions.NoProductsError(self.path)
+            if self.amount < amount:
+                raise Utils.exceptions.NotEnoughProductsError(self.path, self.amount, amount)
+
+            products = []
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                while len(products) < amount:
+                    line = f.readline()
+                    if not line:
+                        break
+                    product = self.parse_line(line)
+                    if product is not None:
+                        products.append(product)
+                offset = f.tell()
+
+                if len(products) < amount:
+                    self.amount = len(products)
+                    self.save_state()
+                    raise Utils.exceptions.NotEnoughProductsError(self.path, self.amount, amount)
+
+                self.offset = offset
+                self.prefix_hash = self.hash_prefix(f)
+            self.amount -= len(products)
+            self.consumed += len(products)
+            if token is not None:
+                self.pending[token] = products
+            self.save_state()
+
+            if self.consumed >= (self.consumed + self.amount) * COMPACT_SHARE:
+                self.compact()
+            return list(products)
+
+    def confirm(self, token: str) -> None:
+        """
+        Подтверждает доставку товаров, зарезервированных за токеном.
+
+        :param token: токен выдачи.
+        """
+        with self.locked():
+            if self.pending.pop(token, None) is not None:
+                self.save_state()
+
+    def release(self, token: str) -> None:
+        """
+        Возвращает товары, зарезервированные за токеном, в конец файла (например, если их не удалось отправить).
+
+        :param token: токен выдачи.
+        """
+        with self.locked():
+            products = self.pending.get(token)
+            if products is None:
+                return
+            self.add(products, token)
+
+    def append(self, data: bytes, size: int | None = None) -> None:
+        """
+        Дописывает данные в конец файла (с новой строки) и сбрасывает их на диск.
+
+        :param data: данные.
+
+        :param size: размер файла до дозаписи (если файл длиннее - лишний хвост обрезается).
+        """
+        with open(self.path, "ab+") as f:
+            if size is not None:
+                f.truncate(size)
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(self, products: list[str], token: str | None = None) -> None:
+        """
+        Дописывает товары в конец файла.
+
+        :param products: список товаров.
+
+        :param token: токен выдачи, резерв которого снимается вместе с дозаписью (используется release()).
+        """
+        if not products:
+            return
+        text = "\n".join(products)
+        with self.locked():
+            stat = self.sync()
+            size = stat.st_size if stat else 0
+            self.write_journal({"op": "add", "size": size, "data": text, "token": token})
+            self.append(text.encode("utf-8"), size)
+            self.amount += self.count_lines(text.encode("utf-8"))
+            if token is not None:
+                self.pending.pop(token, None)
+            self.remember(os.stat(self.path))
+            self.save_state()
+            self.clear_journal()
+
+    def compact(self) -> None:
+        """
+        Удаляет из файла выданные товары (все, что до курсора).
+        """
+        with self.locked():
+            stat = self.sync()
+            if stat is None or not self.offset:
+                return
+            tmp_path = f"{self.path}.tmp"
+            self.write_journal({"op": "compact", "offset": self.offset, "new_size": stat.st_size - self.offset})
+            with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+                src.seek(self.offset)
+                shutil.copyfileobj(src, dst)
+            storage.atomic_replace(tmp_path, self.path)
+            self.offset, self.consumed, self.prefix_hash = 0, 0, ""
+            self.remember(os.stat(self.path))
+            self.compactions += 1
+            self.save_state()
+            self.clear_journal()
+
+    def reset(self) -> None:
+        """
+        Сбрасывает курсор в начало файла и пересчитывает товары. Необходимо вызывать после того, как файл был
+        заменен новым в обход хранилища.
+        """
+        with self.locked():
+            self.offset, self.amount, self.consumed, self.prefix_hash = 0, None, 0, ""
+            self.sync()
+
+    def import_file(self, src_path: str) -> int:
+        """
+        Атомарно заменяет файл с товарами файлом src_path в обычном формате (1 строка - 1 товар).
+        Файл src_path перемещается, поэтому должен находиться на том же диске.
+
+        :param src_path: путь до нового файла с товарами.
+
+        :return: кол-во товаров в файле.
+        """
+        with self.locked():
+            storage.atomic_replace(src_path, self.path)
+            self.reset()
+            return self.amount
+
+    def import_text(self, text: str) -> int:
+        """
+        Атомарно заменяет содержимое файла товарами из текста в обычном формате (1 строка - 1 товар).
+
+        :param text: текст с товарами.
+
+        :return: кол-во товаров в файле.
+        """
+        with self.locked():
+            storage.atomic_write(self.path, text)
+            self.reset()
+            return self.amount
+
+    def export_text(self) -> str:
+        """
+        Возвращает оставшиеся товары в обычном формате (1 строка - 1 товар).
+
+        :return: текст с товарами.
+        """
+        with self.locked():
+            if self.sync() is None:
+                return ""
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                return f.read().decode("utf-8")
+
+
+__stores: dict[str, ProductsStore] = {}
+__stores_lock = RLock()
+
+
+def get_store(path: str) -> ProductsStore:
+    """
+    Возвращает хранилище товаров для указанного файла (для каждого файла создается один экземпляр).
+
+    :param path: путь до файла с товарами.
+
+    :return: экземпляр ProductsStore.
+    """
+    key = os.path.normpath(path)
+    with __stores_lock:
+        if key not in __stores:
+            __stores[key] = ProductsStore(path)
+        return __stores[key]
+
+
+def forget(path: str) -> None:
+    """
+    Удаляет хранилище, файл состояния и журнал указанного файла с товарами (например, после удаления файла).
+
+    :param path: путь до файла с товарами.
+    """
+    key = os.path.normpath(path)
+    with __stores_lock:
+        store = __stores.pop(key, None) or ProductsStore(path)
+    with store.locked():
+        for file_path in (store.state_path, store.journal_path):
+            if os.path.exists(file_path):
+                os.remove(file_path)
@@ -0,0 +1,279 @@
+"""
+В данном модуле написан планировщик поднятия лотов: очередь с приоритетом (heap) по времени следующего поднятия
+каждой игры, сохранение этих времен на диск и параллельное поднятие разных игр с общим ограничением частоты запросов.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable
+if TYPE_CHECKING:
+    from FunPayAPI.types import Category
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Lock, Event
+from Utils import storage
+import logging
+import heapq
+import json
+import time
+import os
+
+
+logger = logging.getLogger("FPC.raise_scheduler")
+
+
+class RateLimiter:
+    """
+    Общий для всех потоков ограничитель частоты запросов: запросы начинаются не чаще, чем раз в min_interval секунд.
+    """
+    def __init__(self, min_interval: float | int = 0.5):
+        """
+        :param min_interval: минимальный интервал между запросами в секундах.
+        """
+        self.min_interval = min_interval
+        self.lock = Lock()
+        self.next_slot = 0.0
+
+    def wait(self) -> float:
+        """
+        Ожидает своей очереди на выполнение запроса.
+
+        :return: время ожидания в секундах.
+        """
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause(self, seconds: float | int) -> None:
+        """
+        Откладывает все следующие запросы на seconds секунд (например, после ошибки 429).
+
+        :param seconds: длительность паузы в секундах.
+        """
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.time() + seconds)
+
+
+class RaiseScheduler:
+    """
+    Планировщик поднятия лотов.
+    """
+    def __init__(self, raise_func: Callable[[Category], int | float], workers: int = 4,
+                 min_interval: float | int = 0.5, state_path: str | None = None):
+        """
+        :param raise_func: функция, поднимающая все категории игры переданной категории и возвращающая время
+        (timestamp) следующей попытки поднятия этой игры.
+
+        :param workers: кол-во игр, поднимаемых одновременно.
+
+        :param min_interval: минимальный интервал между запросами поднятия (общий для всех потоков).
+
+        :param state_path: путь до файла, в котором сохраняются времена следующего поднятия
+        (None - не сохранять).
+        """
+        self.raise_func = raise_func
+        self.workers = workers
+        self.limiter = RateLimiter(min_interval)
+        self.state_path = state_path
+        self.lock = Lock()
+        # Запись файла состояния (из потоков поднятия, по завершении каждой игры).
+        self.save_lock = Lock()
+        # Устанавливается, когда поднятие игры завершено и ее новое время поднятия добавлено в очередь.
+        self.wakeup = Event()
+
+        # {ID игры: категория, через которую поднимается игра}
+        self.games: dict[int, Category] = {}
+        # {ID игры: timestamp следующего поднятия}
+        self.deadlines: dict[int, int | float] = {}
+        # Очередь (timestamp, ID игры). Устаревшие записи (не совпадающие с self.deadlines) пропускаются при извлечении.
+        self.heap: list[tuple[int | float, int]] = []
+        self.categories_source: list[Category] | None = None
+        self.executor: ThreadPoolExecutor | None = None
+        # ID игр, поднятие которых выполняется сейчас.
+        self.in_flight: set[int] = set()
+
+        self.raises = 0
+        self.errors = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_rate_wait = 0.0
+        self.load_state()
+
+    def load_state(self) -> None:
+        """
+        Загружает сохраненные времена следующего поднятия.
+        """
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.deadlines = {int(game_id): deadline for game_id, deadline in data.items()}
+            logger.info(f"Загружены времена поднятия лотов $YELLOW{len(self.deadlines)}$RESET игр.")
+        except:
+            logger.warning("Не удалось загрузить времена поднятия лотов.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+
+    def save_state(self) -> None:
+        """
+        Сохраняет времена следующего поднятия.
+        """
+        if not self.state_path:
+            return
+        with self.save_lock:
+            with self.lock:
+                data = json.dumps({str(game_id): deadline for game_id, deadline in self.deadlines.items()})
+            try:
+                storage.atomic_write(self.state_path, data)
+            except:
+                logger.warning("Не удалось сохранить времена поднятия лотов.")
+                logger.debug("------TRACEBACK------", exc_info=True)
+
+    def set_categories(self, categories: list[Category]) -> None:
+        """
+        Обновляет список поднимаемых игр. Для новых игр используется сохраненное время следующего поднятия
+        (если есть), иначе игра поднимается сразу.
+
+        :param categories: список категорий аккаунта.
+        """
+        with self.lock:
+            self.categories_source = categories
+            self.games = {}
+            for cat in categories:
+                if cat.game_id is not None and cat.game_id not in self.games:
+                    self.games[cat.game_id] = cat
+            # self.deadlines изменяется на месте: на этот словарь могут ссылаться извне (Cardinal.raise_time).
+            for game_id in [i for i in self.deadlines if i not in self.games]:
+                del self.deadlines[game_id]
+            now = int(time.time())
+            for game_id in self.games:
+                self.deadlines.setdefault(game_id, now)
+            self.heap = [(deadline, game_id) for game_id, deadline in self.deadlines.items()]
+            heapq.heapify(self.heap)
+
+    def next_deadline(self) -> int | float:
+        """
+        :return: timestamp ближайшего поднятия (float("inf"), если поднимать нечего).
+        """
+        with self.lock:
+            while self.heap and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            return self.heap[0][0] if self.heap else float("inf")
+
+    def pop_due(self) -> list[tuple[int | float, Category]]:
+        """
+        Извлекает из очереди все игры, время поднятия которых настало (кроме игр, поднятие которых еще выполняется:
+        их новое время поднятия добавится в очередь по завершении).
+
+        :return: список (запланированное время, категория).
+        """
+        due = []
+        now = time.time()
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                deadline, game_id = heapq.heappop(self.heap)
+                if self.deadlines.get(game_id) != deadline or game_id in self.in_flight:
+                    continue
+                self.in_flight.add(game_id)
+                due.append((deadline, self.games[game_id]))
+        return due
+
+    def reschedule(self, game_id: int, deadline: int | float) -> None:
+        with self.lock:
+            if game_id not in self.games:
+                return
+            self.deadlines[game_id] = deadline
+            heapq.heappush(self.heap, (deadline, game_id))
+
+    def raise_game(self, deadline: int | float, cat: Category) -> None:
+        rate_wait = self.limiter.wait()
+        started = time.time()
+        try:
+            next_time = self.raise_func(cat)
+        except:
+            logger.error(f"Произошла непредвиденная ошибка при поднятии лотов игры с ID {cat.game_id}. "
+                         f"Подробнее в файле logs/log.log.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            next_time = int(time.time()) + 10
+            with self.lock:
+                self.errors += 1
+        duration = time.time() - started
+        lateness = max(0.0, started - deadline)
+        with self.lock:
+            self.raises += 1
+            self.total_duration += duration
+            self.max_duration = max(self.max_duration, duration)
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            self.total_rate_wait += rate_wait
+        logger.debug(f"Поднятие игры {cat.game_id}: опоздание {round(lateness, 2)} с, "
+                     f"ожидание лимита {round(rate_wait, 2)} с, запрос {round(duration, 2)} с.")
+        self.reschedule(cat.game_id, next_time)
+
+    def run_pending(self) -> int | float:
+        """
+        Запускает поднятие лотов всех игр, время поднятия которых настало (параллельно, не более self.workers игр
+        одновременно), не дожидаясь завершения. Каждая игра по завершении поднятия сама добавляется в очередь,
+        сохраняет новые времена поднятия и будит wait().
+
+        :return: timestamp ближайшего следующего поднятия (без учета игр, поднятие которых еще выполняется).
+        """
+        due = self.pop_due()
+        if due:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="raise")
+            for deadline, cat in due:
+                future = self.executor.submit(self.raise_game, deadline, cat)
+                future.add_done_callback(lambda f, game_id=cat.game_id: self.on_raise_done(game_id, f))
+        return self.next_deadline()
+
+    def on_raise_done(self, game_id: int, future: Future) -> None:
+        """
+        Вызывается по завершении поднятия игры (в потоке поднятия).
+
+        :param game_id: ID игры.
+
+        :param future: Future поднятия.
+        """
+        if future.exception() is not None:
+            logger.error(f"Произошла ошибка в потоке поднятия лотов игры с ID {game_id}.")
+            logger.debug("------TRACEBACK------", exc_info=future.exception())
+            self.reschedule(game_id, int(time.time()) + 10)
+        self.save_state()
+        with self.lock:
+            self.in_flight.discard(game_id)
+        self.wakeup.set()
+
+    def wait(self, timeout: float | int | None) -> None:
+        """
+        Ожидает наступления времени следующего поднятия (timeout) или завершения поднятия какой-либо игры.
+
+        :param timeout: время ожидания в секундах (None - пока не завершится поднятие).
+        """
+        self.wakeup.wait(timeout)
+        self.wakeup.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает метрики планировщика.
+
+        :return: словарь с метриками.
+        """
+        with self.lock:
+            raises = self.raises
+            return {
+                "games": len(self.games),
+                "raises": raises,
+                "errors": self.errors,
+                "avg_duration": self.total_duration / raises if raises else 0.0,
+                "max_duration": self.max_duration,
+                "avg_lateness": self.total_lateness / raises if raises else 0.0,
+                "max_lateness": self.max_lateness,
+                "avg_rate_wait": self.total_rate_wait / raises if raises else 0.0
+            }
@@ -0,0 +1,113 @@
+"""
+В данном модуле написаны вспомогательные функции для надежной записи файлов: межпроцессная блокировка файла
+и атомарная запись (временный файл + fsync + os.replace).
+"""
+
+import time
+import os
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Эксклюзивная межпроцессная блокировка (fcntl.flock на Linux, msvcrt.locking на Windows).
+    Внутри одного процесса потоки необходимо дополнительно синхронизировать threading.Lock'ом.
+    """
+    def __init__(self, path: str):
+        """
+        :param path: путь до файла блокировки (создается, если не существует).
+        """
+        self.path = path
+        self.fd: int | None = None
+
+    def acquire(self) -> None:
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        if os.name == "nt":
+            while True:
+                try:
+                    msvcrt.locking(self.fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        else:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def release(self) -> None:
+        if self.fd is None:
+            return
+        try:
+            if os.name == "nt":
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def fsync_dir(path: str) -> None:
+    """
+    Сбрасывает на диск запись каталога (нужно после os.replace, чтобы переименование пережило сбой питания).
+    На Windows каталоги не открываются, поэтому ничего не делает.
+
+    :param path: путь до каталога.
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: bytes | str) -> None:
+    """
+    Атомарно перезаписывает файл: данные пишутся во временный файл, сбрасываются на диск, после чего временный
+    файл переименовывается в целевой. При сбое на диске остается либо старая, либо новая версия файла.
+
+    :param path: путь до файла.
+
+    :param data: новое содержимое файла (str записывается в UTF-8).
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(folder)
+
+
+def atomic_replace(src_path: str, path: str) -> None:
+    """
+    Сбрасывает на диск файл src_path и атомарно заменяет им файл path.
+
+    :param src_path: путь до нового файла.
+
+    :param path: путь до заменяемого файла.
+    """
+    with open(src_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(src_path, path)
+    fsync_dir(os.path.dirname(path))
@@ -0,0 +1,203 @@
+"""
+В данном модуле написан компилятор шаблонов текстов автоответа / автовыдачи: текст разбивается на части
+(обычный текст и $переменные) один раз, после чего при каждой подстановке вычисляются только те переменные,
+которые есть в шаблоне. Скомпилированные шаблоны кэшируются по тексту.
+"""
+
+from __future__ import annotations
+from typing import Callable, Any
+from datetime import datetime
+import re
+
+
+MONTHS = [
+    "Января", "Февраля", "Марта",
+    "Апреля", "Мая", "Июня",
+    "Июля", "Августа", "Сентября",
+    "Октября", "Ноября", "Декабря"
+]
+
+
+class RenderContext:
+    """
+    Данные, из которых вычисляются значения переменных при подстановке.
+    Текущее время берется один раз за подстановку и только если в шаблоне есть переменные даты / времени.
+    """
+    def __init__(self, obj: Any, extra: dict[str, str] | None = None):
+        """
+        :param obj: объект, для которого форматируется текст (Message или Order).
+
+        :param extra: значения дополнительных переменных ({"$product": ...}).
+        """
+        self.obj = obj
+        self.extra = extra or {}
+        self.__now: datetime | None = None
+
+    @property
+    def now(self) -> datetime:
+        if self.__now is None:
+            self.__now = datetime.now()
+        return self.__now
+
+    def get_extra(self, name: str) -> str:
+        """
+        :return: значение дополнительной переменной или сама переменная, если значение не передано.
+        """
+        return self.extra.get(name, name)
+
+
+def date_text(ctx: RenderContext) -> str:
+    return f"{ctx.now.day} {MONTHS[ctx.now.month - 1]}"
+
+
+COMMON_VARIABLES: dict[str, Callable[[RenderContext], str]] = {
+    "$full_date_text": lambda ctx: f"{date_text(ctx)} {ctx.now.year} года",
+    "$date_text": date_text,
+    "$date": lambda ctx: ctx.now.strftime("%d.%m.%Y"),
+    "$time": lambda ctx: ctx.now.strftime("%H:%M"),
+    "$full_time": lambda ctx: ctx.now.strftime("%H:%M:%S")
+}
+
+# Переменные текстов автоответа (объект - FunPayAPI.types.Message).
+MESSAGE_VARIABLES: dict[str, Callable[[RenderContext], str]] = {
+    **COMMON_VARIABLES,
+    "$username": lambda ctx: str(ctx.obj.chat_with),
+    "$message_text": lambda ctx: ctx.obj.text,
+    "$node_id": lambda ctx: str(ctx.obj.node_id)
+}
+
+# Переменные текстов автовыдачи (объект - FunPayAPI.types.Order).
+ORDER_VARIABLES: dict[str, Callable[[RenderContext], str]] = {
+    **COMMON_VARIABLES,
+    "$username": lambda ctx: ctx.obj.buyer_username,
+    "$order_desc": lambda ctx: ctx.obj.title,
+    "$order_id": lambda ctx: ctx.obj.id,
+    "$order_price": lambda ctx: str(ctx.obj.price),
+    "$buyer_id": lambda ctx: str(ctx.obj.buyer_id),
+    "$product": lambda ctx: ctx.get_extra("$product"),
+    "$product_amount": lambda ctx: ctx.get_extra("$product_amount")
+}
+
+VARIABLES: dict[str, dict[str, Callable[[RenderContext], str]]] = {
+    "message": MESSAGE_VARIABLES,
+    "order": ORDER_VARIABLES
+}
+
+MAX_CACHE_SIZE = 1024
+__patterns: dict[str, re.Pattern] = {}
+__cache: dict[tuple[str, str], Template] = {}
+
+
+class Template:
+    """
+    Скомпилированный шаблон: список частей, каждая из которых - либо текст, либо функция, вычисляющая значение
+    переменной.
+    """
+    def __init__(self, text: str, variables: dict[str, Callable[[RenderContext], str]], pattern: re.Pattern):
+        """
+        :param text: текст шаблона.
+
+        :param variables: {переменная: функция, вычисляющая ее значение}.
+
+        :param pattern: регулярное выражение, находящее переменные (см. get_pattern()).
+        """
+        self.text = text
+        self.parts: list[str | Callable[[RenderContext], str]] = []
+        self.names: set[str] = set()
+        position = 0
+        for match in pattern.finditer(text):
+            if match.start() > position:
+                self.parts.append(text[position:match.start()])
+            self.parts.append(variables[match.group()])
+            self.names.add(match.group())
+            position = match.end()
+        if position < len(text):
+            self.parts.append(text[position:])
+
+    def render(self, ctx: RenderContext) -> str:
+        """
+        Подставляет значения переменных.
+
+        :param ctx: данные для вычисления переменных.
+
+        :return: форматированный текст.
+        """
+        if not self.names:
+            return self.text
+        return "".join(part if isinstance(part, str) else part(ctx) for part in self.parts)
+
+
+def get_pattern(kind: str) -> re.Pattern:
+    """
+    Возвращает регулярное выражение, находящее переменные вида kind. Более длинные переменные проверяются первыми,
+    чтобы $date_text не распознавалась как $date.
+
+    :param kind: вид шаблона ("message" или "order").
+
+    :return: скомпилированное регулярное выражение.
+    """
+    pattern = __patterns.get(kind)
+    if pattern is None:
+        names = sorted(VARIABLES[kind], key=len, reverse=True)
+        pattern = re.compile("|".join(re.escape(i) for i in names))
+        __patterns[kind] = pattern
+    return pattern
+
+
+def compile_template(text: str, kind: str) -> Template:
+    """
+    Возвращает скомпилированный шаблон (из кэша, если текст уже компилировался).
+
+    :param text: текст шаблона.
+
+    :param kind: вид шаблона ("message" или "order").
+
+    :return: скомпилированный шаблон.
+    """
+    key = (kind, text)
+    template = __cache.get(key)
+    if template is None:
+        if len(__cache) >= MAX_CACHE_SIZE:
+            __cache.clear()
+        template = Template(text, VARIABLES[kind], get_pattern(kind))
+        __cache[key] = template
+    return template
+
+
+def render(text: str, kind: str, obj: Any, extra: dict[str, str] | None = None) -> str:
+    """
+    Форматирует текст, подставляя значения переменных.
+
+    :param text: текст шаблона.
+
+    :param kind: вид шаблона ("message" или "order").
+
+    :param obj: объект, для которого форматируется текст (Message или Order).
+
+    :param extra: значения дополнительных переменных.
+
+    :return: форматированный текст.
+    """
+    return compile_template(text, kind).render(RenderContext(obj, extra))
+
+
+def register_variable(kind: str, name: str, func: Callable[[RenderContext], str]) -> None:
+    """
+    Добавляет новую переменную (например, из плагина) и сбрасывает кэш шаблонов.
+
+    :param kind: вид шаблона ("message" или "order").
+
+    :param name: название переменной (вместе с $).
+
+    :param func: функция, принимающая RenderContext и возвращающая значение переменной.
+    """
+    VARIABLES[kind][name] = func
+    __patterns.pop(kind, None)
+    clear_cache()
+
+
+def clear_cache() -> None:
+    """
+    Очищает кэш скомпилированных шаблонов (вызывается при изменении конфигов автоответа / автовыдачи).
+    """
+    __cache.clear()
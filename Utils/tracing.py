@@ -0,0 +1,227 @@
+"""
+В данном модуле написана трассировка обработки заказов: для каждого заказа записываются этапы (spans) от запроса
+Runner'а, в ответе на который заказ был обнаружен, до завершения post_delivery хэндлеров. Завершенные трассировки
+хранятся в кольцевом буфере.
+"""
+
+from contextlib import contextmanager
+from collections import deque
+from threading import Lock
+import json
+import math
+import time
+
+
+class Trace:
+    """
+    Трассировка обработки одного заказа.
+    """
+    def __init__(self, order_id: str, started: float):
+        """
+        :param order_id: ID заказа.
+
+        :param started: время (time.time()) начала запроса Runner'а, в ответе на который обнаружен заказ.
+        """
+        self.order_id = order_id
+        self.started = started
+        # Время окончания последнего этапа, добавленного через mark().
+        self.last_mark = started
+        self.finished: float | None = None
+        self.status: str | None = None
+        # [(название этапа, начало (time.time()), длительность в секундах)]
+        self.spans: list[tuple[str, float, float]] = []
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        """
+        Добавляет этап.
+
+        :param name: название этапа.
+
+        :param start: время начала этапа.
+
+        :param end: время окончания этапа.
+        """
+        self.spans.append((name, start, max(0.0, end - start)))
+
+    def mark(self, name: str, end: float | None = None) -> None:
+        """
+        Добавляет этап, длящийся с окончания предыдущего mark() (или с начала трассировки) до end.
+
+        :param name: название этапа.
+
+        :param end: время окончания этапа (по умолчанию - текущее время).
+        """
+        end = time.time() if end is None else end
+        self.add_span(name, self.last_mark, end)
+        self.last_mark = end
+
+    @property
+    def total(self) -> float | None:
+        """
+        :return: общая длительность обработки заказа или None, если трассировка не завершена.
+        """
+        return None if self.finished is None else self.finished - self.started
+
+    def durations(self) -> dict[str, float]:
+        """
+        :return: суммарная длительность каждого этапа ({название: секунды}); например, несколько отправок
+        сообщений складываются в один этап "send".
+        """
+        result = {}
+        for name, _, duration in self.spans:
+            result[name] = result.get(name, 0.0) + duration
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "order_id": self.order_id,
+            "started": self.started,
+            "total": self.total,
+            "status": self.status,
+            "spans": [{"name": name, "offset": round(start - self.started, 6), "duration": round(duration, 6)}
+                      for name, start, duration in self.spans]
+        }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    :param values: отсортированные значения.
+
+    :param q: квантиль (0-1).
+
+    :return: значение квантиля (nearest-rank).
+    """
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+class Tracer:
+    """
+    Хранилище трассировок заказов: активные трассировки (по ID заказа) и кольцевой буфер завершенных.
+    Все методы, принимающие ID заказа, ничего не делают, если трассировки для заказа нет (например, для тестового
+    заказа автовыдачи), поэтому их можно вызывать без проверок.
+    """
+    def __init__(self, size: int = 500, max_active: int = 1000):
+        """
+        :param size: максимальное кол-во завершенных трассировок в буфере.
+
+        :param max_active: максимальное кол-во незавершенных трассировок (при превышении удаляются самые старые).
+        """
+        self.lock = Lock()
+        self.active: dict[str, Trace] = {}
+        self.finished: deque[Trace] = deque(maxlen=size)
+        self.max_active = max_active
+
+    def start(self, order_id: str, timings: dict[str, float]) -> Trace | None:
+        """
+        Начинает трассировку заказа по временным меткам Runner'а (FunPayAPI.types.Event.timings).
+
+        :param order_id: ID заказа.
+
+        :param timings: временные метки этапов получения события.
+
+        :return: трассировка или None, если временных меток нет.
+        """
+        if "poll" not in timings:
+            return None
+        trace = Trace(order_id, timings["poll"])
+        for name, key in (("runner_fetch", "runner"), ("orders_fetch", "orders"), ("parse", "parsed")):
+            if key in timings:
+                trace.mark(name, timings[key])
+        with self.lock:
+            self.active.pop(order_id, None)
+            while len(self.active) >= self.max_active:
+                self.active.pop(next(iter(self.active)))
+            self.active[order_id] = trace
+        return trace
+
+    def get(self, order_id: str) -> Trace | None:
+        with self.lock:
+            return self.active.get(order_id)
+
+    def mark(self, order_id: str, name: str) -> None:
+        """
+        Добавляет этап, длящийся с окончания предыдущего этапа до текущего момента (см. Trace.mark()).
+        """
+        trace = self.get(order_id)
+        if trace is not None:
+            trace.mark(name)
+
+    @contextmanager
+    def span(self, order_id: str, name: str):
+        """
+        Контекстный менеджер, записывающий этап длительностью с входа до выхода из блока with.
+
+        :param order_id: ID заказа.
+
+        :param name: название этапа.
+        """
+        trace = self.get(order_id)
+        if trace is None:
+            yield
+            return
+        start = time.time()
+        try:
+            yield
+        finally:
+            end = time.time()
+            trace.add_span(name, start, end)
+            trace.last_mark = end
+
+    def finish(self, order_id: str, status: str = "delivered") -> Trace | None:
+        """
+        Завершает трассировку и переносит ее в буфер завершенных.
+
+        :param order_id: ID заказа.
+
+        :param status: результат обработки ("delivered", "error").
+
+        :return: завершенная трассировка или None, если ее не было.
+        """
+        with self.lock:
+            trace = self.active.pop(order_id, None)
+            if trace is None:
+                return None
+            trace.finished = time.time()
+            trace.status = status
+            self.finished.append(trace)
+        return trace
+
+    def discard(self, order_id: str) -> None:
+        """
+        Удаляет незавершенную трассировку (заказ не выдается автоматически).
+        """
+        with self.lock:
+            self.active.pop(order_id, None)
+
+    def traces(self) -> list[Trace]:
+        with self.lock:
+            return list(self.finished)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Считает перцентили длительности каждого этапа и общей длительности по завершенным трассировкам.
+
+        :return: {название этапа (или "total"): {"count", "p50", "p90", "p99", "max"}}.
+        """
+        values: dict[str, list[float]] = {}
+        for trace in self.traces():
+            for name, duration in trace.durations().items():
+                values.setdefault(name, []).append(duration)
+            values.setdefault("total", []).append(trace.total)
+
+        result = {}
+        for name, durations in values.items():
+            durations.sort()
+            result[name] = {"count": len(durations), "p50": percentile(durations, 0.5),
+                            "p90": percentile(durations, 0.9), "p99": percentile(durations, 0.99),
+                            "max": durations[-1]}
+        return result
+
+    def to_json(self) -> str:
+        """
+        :return: завершенные трассировки и сводка по ним в формате JSON.
+        """
+        return json.dumps({"summary": self.summary(), "traces": [i.to_dict() for i in self.traces()]},
+                          indent=4, ensure_ascii=False)
@@ -2,11 +2,12 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Callable
 
 import Utils.exceptions
+import Utils.logger
 
 if TYPE_CHECKING:
     from configparser import ConfigParser
+    import tg_bot.bot
 
-from tg_bot import auto_response_cp, config_loader_cp, auto_delivery_cp, templates_cp, plugins_cp, file_uploader
 from types import ModuleType
 from typing import Callable
 from uuid import UUID
@@ -23,10 +24,12 @@ import os
 import FunPayAPI
 import handlers
 
-from Utils import cardinal_tools
-import tg_bot.bot
+from Utils import cardinal_tools, dispatcher, lot_matcher, raise_scheduler, message_queue, templates
+from Utils import config_watcher, metrics, tracing, storage
+import Utils.config_loader as cfg_loader
 
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError
+from threading import Thread, Lock
 
 
 logger = logging.getLogger("FPC")
@@ -55,6 +58,15 @@ def get_cardinal() -> None | Cardinal:
         return getattr(Cardinal, "instance")
 
 
+# Параметры основного конфига, которые читаются только при запуске (изменения применяются после перезапуска).
+RESTART_REQUIRED_PARAMS = [
+    ("FunPay", "golden_key"), ("FunPay", "user_agent"), ("Telegram", "enabled"), ("Telegram", "token"),
+    ("Proxy", "enable"), ("Proxy", "ip"), ("Proxy", "port"), ("Proxy", "login"), ("Proxy", "password"),
+    ("Other", "requestsDelay"), ("Other", "requestsDelayMin"), ("Other", "handlerWorkers"),
+    ("Other", "handlerTimeout"), ("Other", "configsWatchInterval"), ("Other", "metricsPort")
+]
+
+
 class PluginData:
     def __init__(self, name: str, version: str, desc: str, credentials: str, uuid: str,
                  path: str, plugin: ModuleType, settings_page: bool, delete_handler: Callable, enabled: bool):
@@ -93,6 +105,17 @@ class Cardinal(object):
         self.AD_CFG = auto_delivery_config
         self.AR_CFG = auto_response_config
         self.RAW_AR_CFG = raw_auto_response_config
+        # Типизированный снимок настроек для "горячих" мест (заменяется целиком при изменении конфигов).
+        self.settings: cfg_loader.Settings = cfg_loader.build_settings(self.MAIN_CFG, self.AR_CFG)
+        # Поиск лотов конфига автовыдачи в названиях заказов / лотов (перестраивается при изменении AD_CFG).
+        self.lot_matcher: lot_matcher.LotMatcher | None = None
+        self.lot_matcher_fingerprint: tuple[int, int] | None = None
+        # Замена конфигов (из ПУ Telegram или при изменении файлов) выполняется под этим локом.
+        self.config_lock = Lock()
+        self.config_watcher = config_watcher.ConfigWatcher(
+            {i: self.reload_config for i in ("configs/_main.cfg", "configs/auto_response.cfg",
+                                             "configs/auto_delivery.cfg")},
+            interval=self.settings.other.configs_watch_interval or 5)
 
         self.proxy = {}
         if self.MAIN_CFG["Proxy"].getboolean("enable"):
@@ -111,14 +134,36 @@ class Cardinal(object):
         self.account = FunPayAPI.account.Account(self.MAIN_CFG["FunPay"]["golden_key"],
                                                  self.MAIN_CFG["FunPay"]["user_agent"],
                                                  proxy=self.proxy)
-        self.runner = FunPayAPI.runner.Runner(self.account)
+        self.runner = FunPayAPI.runner.Runner(self.account, state_path="storage/cache/runner_state.json")
+        # Очередь исходящих сообщений FunPay (общее ограничение частоты для аккаунта, порядок внутри чата).
+        self.message_queue = message_queue.MessageQueue(self.account.send_message,
+                                                        on_sent=self.runner.update_saved_message)
         self.telegram: tg_bot.bot.TGBot | None = None
+        # Диспетчер хэндлеров событий (None - хэндлеры выполняются последовательно в потоке Runner'а).
+        self.dispatcher: dispatcher.EventDispatcher | None = None
+        workers = self.settings.other.handler_workers
+        if workers:
+            self.dispatcher = dispatcher.EventDispatcher(workers=workers,
+                                                         handler_timeout=self.settings.other.handler_timeout)
+
+        # Метрики запросов к FunPay, опроса Runner'а, хэндлеров и отправки сообщений.
+        self.metrics = metrics.Registry()
+        self.metrics_server: metrics.MetricsServer | None = None
+        # Трассировки обработки заказов (от запроса Runner'а до завершения post_delivery хэндлеров).
+        self.tracer = tracing.Tracer()
+        self.__init_metrics()
 
         self.running = False
         self.run_id = 0
+        # Время выполнения этапов запуска {название этапа: секунды}.
+        self.startup_timings: dict[str, float] = {}
         self.start_time = int(time.time())
 
-        self.raise_time = {}  # Временные метки поднятия категорий {id игры: след. время поднятия}
+        # Планировщик поднятия лотов (очередь игр по времени следующего поднятия, сохраняется между запусками).
+        self.raise_scheduler = raise_scheduler.RaiseScheduler(self.raise_game_lots,
+                                                              state_path="storage/cache/raise_times.json")
+        # Временные метки поднятия категорий {id игры: след. время поднятия}
+        self.raise_time = self.raise_scheduler.deadlines
         self.lots: list[FunPayAPI.types.Lot] = []  # Список лотов (при запуске FPC) (для восстановления / деактивации)
         self.categories: list[FunPayAPI.types.Category] = []  # Список категорий (при запуске FPC)
         self.telegram_lots: list[FunPayAPI.types.Lot] = []  # Список лотов (для Telegram-ПУ)
@@ -255,65 +300,19 @@ class Cardinal(object):
             return False
 
         # Привязываем к каждой категории её game_id. Если категория кэширована - берем game_id из кэша,
-        # если нет - делаем запрос к FunPay.
-        # Присваиваем каждому лоту game_id
-        # Так же добавляем game_id категории в self.game_ids
+        # если нет - делаем запрос к FunPay (параллельно для всех некэшированных категорий).
+        # Присваиваем каждому лоту game_id его категории.
         logger.info("Получаю ID игр, к которым относятся лоты и категории...")
         cached_categories = cardinal_tools.load_cached_categories()
-        for index, cat in enumerate(categories):
-            cached_category_name = f"{cat.id}_{cat.type.value}"
-            if cached_category_name in cached_categories:
-                categories[index].game_id = cached_categories[cached_category_name]
-                # Присваиваем game_id каждому лоту это категории.
-                category_lots = [(ind, lot) for ind, lot in enumerate(lots) if lot.category_id == cat.id]
-                for lot_tuple in category_lots:
-                    lots[lot_tuple[0]].game_id = cat.game_id
-                logger.info(f"Доп. данные о категории \"{cat.title}\" найдены в кэше.")
-                continue
+        if not self.__resolve_game_ids(categories, cached_categories, infinite_polling, attempts):
+            return False
 
-            logger.warning(f"Доп. данные о категории \"{cat.title}\" не найдены в кэше.")
-            logger.info("Отправляю запрос к FunPay...")
-            if infinite_polling:
-                count = 1
-            else:
-                count = attempts
-            while count:
-                try:
-                    game_id = self.account.get_category_game_id(cat)
-                    categories[index].game_id = game_id
-                    # Присваиваем game_id каждому лоту этой категории.
-                    category_lots = [(ind, lot) for ind, lot in enumerate(lots) if lot.category_id == cat.id]
-                    for lot_tuple in category_lots:
-                        lots[lot_tuple[0]].game_id = game_id
-                    logger.info(f"Доп. данные о категории \"{cat.title}\" получены!")
-                    time.sleep(0.2)
-                    break
-                except TimeoutError:
-                    logger.error(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
-                                 f"превышен тайм-аут ожидания.")
-                    logger.warning("Повторю попытку через 2 секунды...")
-                    time.sleep(2)
-                    if not infinite_polling:
-                        count -= 1
-                except FunPayAPI.exceptions.StatusCodeIsNot200 as e:
-                    logger.error(e)
-                    logger.warning("Повторю попытку через 2 секунды...")
-                    time.sleep(2)
-                    if not infinite_polling:
-                        count -= 1
-                except:
-                    logger.error(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
-                                 f"неизвестная ошибка.")
-                    logger.debug("------TRACEBACK------", exc_info=True)
-                    logger.warning("Повторю попытку через 2 секунды...")
-                    time.sleep(2)
-                    if not infinite_polling:
-                        count -= 1
-
-            if not count:
-                logger.error(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
-                             f"превышено кол-во попыток ({attempts}).")
-                return False
+        lots_by_category = {}
+        for lot in lots:
+            lots_by_category.setdefault(lot.category_id, []).append(lot)
+        for cat in categories:
+            for lot in lots_by_category.get(cat.id, []):
+                lot.game_id = cat.game_id
 
         if update_cardinal_lots:
             self.categories = categories
@@ -328,79 +327,229 @@ class Cardinal(object):
             self.last_telegram_lots_update = datetime.datetime.now()
             logger.info(f"Обновлена информация об активных лотах $YELLOW({len(lots)})$RESET для ПУ TG.")
         logger.info("Кэширую данные о категориях...")
-        cardinal_tools.cache_categories(self.categories, cached_categories)
+        cardinal_tools.cache_categories(categories, cached_categories)
         return True
 
+    def __resolve_game_ids(self, categories: list[FunPayAPI.types.Category], cached_categories: dict,
+                           infinite_polling: bool = False, attempts: int = 3, workers: int = 4) -> bool:
+        """
+        Присваивает каждой категории game_id: из кэша или запросом к FunPay (не более workers запросов одновременно).
+        Полученные game_id сразу добавляются в cached_categories и сохраняются в кэш (не чаще раза в секунду),
+        чтобы при сбое посреди загрузки не запрашивать их заново.
+
+        :param categories: список категорий.
+
+        :param cached_categories: кэшированные game_id категорий ({ID категории_тип категории: game_id}).
+
+        :param infinite_polling: бесконечно посылать запросы, пока не будет получен ответ.
+
+        :param attempts: максимальное кол-во попыток для каждой категории.
+
+        :param workers: максимальное кол-во одновременных запросов.
+
+        :return: True, если game_id получены для всех категорий, False, если нет.
+        """
+        uncached = []
+        for cat in categories:
+            cached_category_name = f"{cat.id}_{cat.type.value}"
+            if cached_category_name in cached_categories:
+                cat.game_id = cached_categories[cached_category_name]
+            else:
+                uncached.append(cat)
+        logger.info(f"Доп. данные о категориях найдены в кэше: $YELLOW{len(categories) - len(uncached)}"
+                    f"/{len(categories)}$RESET.")
+        if not uncached:
+            return True
+
+        logger.warning(f"Доп. данные о $YELLOW{len(uncached)}$RESET категориях не найдены в кэше. "
+                       f"Отправляю запросы к FunPay...")
+        cache_lock = Lock()
+        last_save = [time.time()]
+
+        def resolve(cat: FunPayAPI.types.Category) -> bool:
+            count = 1 if infinite_polling else attempts
+            while count:
+                try:
+                    cat.game_id = self.account.get_category_game_id(cat)
+                    logger.info(f"Доп. данные о категории \"{cat.title}\" получены!")
+                    with cache_lock:
+                        cached_categories[f"{cat.id}_{cat.type.value}"] = cat.game_id
+                        if time.time() - last_save[0] >= 1:
+                            cardinal_tools.cache_categories([], cached_categories)
+                            last_save[0] = time.time()
+                    return True
+                except TimeoutError:
+                    logger.error(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
+                                 f"превышен тайм-аут ожидания.")
+                except FunPayAPI.exceptions.StatusCodeIsNot200 as e:
+                    logger.error(e)
+                except:
+                    logger.error(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
+                                 f"неизвестная ошибка.")
+                    logger.debug("------TRACEBACK------", exc_info=True)
+                logger.warning("Повторю попытку через 2 секунды...")
+                time.sleep(2)
+                if not infinite_polling:
+                    count -= 1
+            logger.error(f"Не удалось получить ID игры, к которой относится категория \"{cat.title}\": "
+                         f"превышено кол-во попыток ({attempts}).")
+            return False
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(resolve, uncached))
+        with cache_lock:
+            cardinal_tools.cache_categories([], cached_categories)
+        return all(results)
+
     def __init_telegram(self) -> None:
         """
         Инициализирует Telegram бота.
         """
+        # Модули Telegram бота (и telebot) импортируются только при включенном Telegram.
+        import tg_bot.bot
         self.telegram = tg_bot.bot.TGBot(self)
         self.telegram.init()
 
+    def __init_metrics(self) -> None:
+        """
+        Создает метрики и подключает их к аккаунту и Runner'у.
+        """
+        m = self.metrics
+        self.funpay_requests = m.counter("fpc_funpay_requests_total", "Запросы к FunPay.",
+                                         ("method", "endpoint", "status"))
+        self.funpay_request_time = m.histogram("fpc_funpay_request_duration_seconds",
+                                               "Длительность запросов к FunPay.", ("method", "endpoint"))
+        self.polls = m.counter("fpc_runner_polls_total", "Опросы FunPay (Runner.get_updates).", ("result",))
+        self.poll_time = m.histogram("fpc_runner_poll_duration_seconds", "Длительность Runner.get_updates.")
+        self.poll_events = m.counter("fpc_runner_events_total", "События, полученные Runner'ом.")
+        self.handler_time = m.histogram("fpc_handler_duration_seconds", "Длительность выполнения хэндлеров.",
+                                        ("handler",))
+        self.handler_errors = m.counter("fpc_handler_errors_total", "Ошибки в хэндлерах.", ("handler",))
+        self.send_message_time = m.histogram("fpc_send_message_duration_seconds",
+                                             "Время от постановки сообщения в очередь до результата отправки.")
+        self.send_message_results = m.counter("fpc_send_message_total", "Отправленные сообщения FunPay.",
+                                              ("result",))
+        self.order_delivery_time = m.histogram("fpc_order_delivery_seconds",
+                                               "Время от запроса Runner'а, обнаружившего заказ, до завершения "
+                                               "post_delivery хэндлеров.", ("status",))
+        m.gauge("fpc_message_queue_pending", "Сообщения в очереди отправки.",
+                func=lambda: self.message_queue.stats()["pending"])
+        m.gauge("fpc_dispatcher_pending", "События в очереди диспетчера хэндлеров.",
+                func=lambda: self.dispatcher.stats()["pending"] if self.dispatcher is not None else 0)
+        m.gauge("fpc_poll_interval_seconds", "Текущий интервал опроса FunPay.",
+                func=lambda: self.runner.poll_interval or 0)
+        m.gauge("fpc_log_records_dropped", "Записи лога, отброшенные из-за переполнения очереди логов.",
+                func=Utils.logger.dropped_records)
+        m.gauge("fpc_uptime_seconds", "Время работы FPC.", func=lambda: time.time() - self.start_time)
+
+        self.account.request_hook = self.on_funpay_request
+        self.runner.poll_hook = self.on_poll
+
+    def on_funpay_request(self, request_method: str, url: str, status: int | None, duration: float) -> None:
+        """
+        Записывает метрики запроса к FunPay (Account.request_hook).
+        """
+        endpoint = FunPayAPI.utils.get_endpoint(url)
+        method = request_method.upper()
+        self.funpay_requests.inc(labels=(method, endpoint, "error" if status is None else str(status)))
+        self.funpay_request_time.observe(duration, (method, endpoint))
+
+    def on_poll(self, duration: float, events_count: int | None) -> None:
+        """
+        Записывает метрики опроса FunPay (Runner.poll_hook).
+        """
+        self.polls.inc(labels=("error" if events_count is None else "ok",))
+        self.poll_time.observe(duration)
+        if events_count:
+            self.poll_events.inc(events_count)
+
+    def on_message_sent(self, future: Future, started: float) -> None:
+        """
+        Записывает метрики отправки сообщения (вызывается по завершении Future из send_message_async()).
+        """
+        self.send_message_time.observe(time.monotonic() - started)
+        if future.exception() is not None:
+            result = "error"
+        else:
+            result = "ok" if future.result() else "failed"
+        self.send_message_results.inc(labels=(result,))
+
+    def finish_order_trace(self, order_id: str, status: str = "delivered") -> None:
+        """
+        Завершает трассировку обработки заказа и записывает ее длительность в метрики.
+
+        :param order_id: ID заказа.
+
+        :param status: результат обработки ("delivered", "error").
+        """
+        trace = self.tracer.finish(order_id, status)
+        if trace is None:
+            return
+        self.order_delivery_time.observe(trace.total, (status,))
+        logger.debug(f"Трассировка заказа {order_id}: {round(trace.total, 3)} с, этапы: "
+                     f"{ {k: round(v, 3) for k, v in trace.durations().items()} }.")
+
+    def export_order_traces(self, path: str = "storage/cache/order_traces.json") -> str:
+        """
+        Сохраняет завершенные трассировки заказов и сводку по ним в JSON файл.
+
+        :param path: путь до файла.
+
+        :return: путь до файла.
+        """
+        storage.atomic_write(path, self.tracer.to_json())
+        return path
+
     # Прочее
-    def raise_lots(self) -> int:
+    def raise_lots(self) -> int | float:
         """
-        Пытается поднять лоты.
+        Поднимает лоты всех игр, время поднятия которых настало.
 
         :return: предположительное время, когда нужно снова запустить данную функцию.
         """
-        # Время следующего вызова функции (по умолчанию - бесконечность).
-        next_call = float("inf")
-
-        for cat in self.categories:
-            if cat.game_id is None:
-                continue
+        if self.raise_scheduler.categories_source is not self.categories:
+            self.raise_scheduler.set_categories(self.categories)
+        return self.raise_scheduler.run_pending()
 
-            # Если game_id данной категории уже находится в self.game_ids, но время поднятия категорий
-            # данной игры еще не настало - пропускам эту категорию.
-            if cat.game_id in self.raise_time and self.raise_time[cat.game_id] > int(time.time()):
-                # Если записанное в self.game_ids время меньше текущего next_call'а
-                # обновляем время next_call'a на записанное время.
-                if self.raise_time[cat.game_id] < next_call:
-                    next_call = self.raise_time[cat.game_id]
-                continue
+    def raise_game_lots(self, cat: FunPayAPI.types.Category) -> int:
+        """
+        Пытается поднять лоты всех категорий, относящихся к игре cat.game_id.
+        Вызывается планировщиком поднятия лотов (возможно, параллельно для разных игр).
 
-            # В любом другом случае пытаемся поднять лоты всех категорий, относящихся к игре cat.game_id
-            try:
-                time.sleep(0.5)
-                result = self.account.raise_game_categories(cat)
-            except Exception as e:
-                if isinstance(e, FunPayAPI.exceptions.StatusCodeIsNot200) and e.status_code == 429:
-                    logger.warning(f"Ошибка 429 при поднятии категории \"{cat.title}\". Пауза на 10 сек...")
-                    time.sleep(10)
-                    next_time = int(time.time()) + 1
-                else:
-                    logger.error(f"Произошла непредвиденная ошибка при попытке поднять категорию \"{cat.title}. "
-                                 f"Подробнее в файле logs/log.log. "
-                                 f"(следующая попытка для данной категории через 10 секунд.)")
-                    logger.debug("------TRACEBACK------", exc_info=True)
-                    next_time = int(time.time()) + 10
-                if next_time < next_call:
-                    next_call = next_time
-                continue
+        :param cat: категория игры.
 
-            if not result.complete:
-                logger.warning(f"Не удалось поднять категорию \"{cat.title}\". "
-                               f"FunPay говорит подождать еще {cardinal_tools.time_to_str(result.wait)}.")
-                logger.debug(f"Ответ FunPay: {result.funpay_response}")
-                next_time = int(time.time()) + result.wait
-            else:
-                for category_name in result.raised_category_names:
-                    logger.info(f"Поднял категорию \"{category_name}\". ")
-                logger.info(f"Все категории, относящиеся к игре с ID {cat.game_id} подняты!")
-                logger.info(f"Попробую еще раз через  {cardinal_tools.time_to_str(result.wait)}.")
-                next_time = int(time.time()) + result.wait
-            self.run_handlers(self.post_lots_raise_handlers, (self, cat.game_id, result))
-
-            self.raise_time[cat.game_id] = next_time
-            if next_time < next_call:
-                next_call = next_time
-        return next_call
+        :return: время следующей попытки поднятия лотов этой игры.
+        """
+        try:
+            result = self.account.raise_game_categories(cat)
+        except Exception as e:
+            if isinstance(e, FunPayAPI.exceptions.StatusCodeIsNot200) and e.status_code == 429:
+                logger.warning(f"Ошибка 429 при поднятии категории \"{cat.title}\". Пауза на 10 сек...")
+                # Пауза общая для всех игр: FunPay ограничивает частоту запросов аккаунта, а не игры.
+                self.raise_scheduler.limiter.pause(10)
+                return int(time.time()) + 10
+            logger.error(f"Произошла непредвиденная ошибка при попытке поднять категорию \"{cat.title}. "
+                         f"Подробнее в файле logs/log.log. "
+                         f"(следующая попытка для данной категории через 10 секунд.)")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            return int(time.time()) + 10
+
+        if not result.complete:
+            logger.warning(f"Не удалось поднять категорию \"{cat.title}\". "
+                           f"FunPay говорит подождать еще {cardinal_tools.time_to_str(result.wait)}.")
+            logger.debug(f"Ответ FunPay: {result.funpay_response}")
+        else:
+            for category_name in result.raised_category_names:
+                logger.info(f"Поднял категорию \"{category_name}\". ")
+            logger.info(f"Все категории, относящиеся к игре с ID {cat.game_id} подняты!")
+            logger.info(f"Попробую еще раз через  {cardinal_tools.time_to_str(result.wait)}.")
+        next_time = int(time.time()) + result.wait
+        self.run_handlers(self.post_lots_raise_handlers, (self, cat.game_id, result))
+        return next_time
 
     def send_message(self, msg: FunPayAPI.types.Message, attempts: int = 3) -> bool:
         """
-        Отправляет сообщение в чат FunPay.
+        Отправляет сообщение в чат FunPay (через очередь исходящих сообщений) и ожидает результата.
 
         :param msg: объект MessageEvent.
 
@@ -408,8 +557,25 @@ class Cardinal(object):
 
         :return: True, если сообщение доставлено, False, если нет.
         """
-        if self.MAIN_CFG["Other"].get("watermark"):
-            msg.text = f"{self.MAIN_CFG['Other']['watermark']}\n" + msg.text
+        return self.send_message_async(msg, attempts).result()
+
+    def send_message_async(self, msg: FunPayAPI.types.Message, attempts: int = 3,
+                           callback: Callable[[bool], None] | None = None) -> Future:
+        """
+        Ставит сообщение в очередь исходящих сообщений, не дожидаясь отправки.
+        Сообщения одного чата отправляются по порядку, сообщения разных чатов - параллельно.
+
+        :param msg: объект MessageEvent.
+
+        :param attempts: кол-во попыток на отправку сообщения.
+
+        :param callback: функция, вызываемая с результатом отправки (True / False).
+
+        :return: Future, результат которого - True, если сообщение доставлено, False, если нет.
+        """
+        watermark = self.settings.other.watermark
+        if watermark:
+            msg.text = f"{watermark}\n" + msg.text
 
         lines = [i.strip() for i in msg.text.split("\n")]
         msg.text = "\n".join(lines)
@@ -420,34 +586,38 @@ class Cardinal(object):
         split_messages = []
         while lines:
             text = "\n".join(lines[:20])
+            lines = lines[20:]
             if text.strip() == "[a][/a]":
                 continue
             msg_obj = FunPayAPI.types.Message(text, msg.node_id, msg.chat_with, msg.unread)
             split_messages.append(msg_obj)
-            lines = lines[20:]
 
-        for mes in split_messages:
-            current_attempts = attempts
-            while current_attempts:
-                try:
-                    response = self.account.send_message(mes)
-                    if response.get("response") and response.get("response").get("error") is None:
-                        self.runner.update_saved_message(mes)
-                        logger.info(f"Отправил сообщение в чат $YELLOW{msg.node_id}.")
-                        break
-                except:
-                    logger.debug("------TRACEBACK------", exc_info=True)
-                # if error in response
-                logger.warning(f"Произошла ошибка при отправке сообщения в чат $YELLOW{msg.node_id}.$RESET "
-                               f"Подробнее в файле logs/log.log")
-                logger.info(f"Осталось попыток: {current_attempts}.")
-                current_attempts -= 1
-                time.sleep(1)
-            else:
-                logger.error(f"Не удалось отправить сообщение в чат $YELLOW{msg.node_id}$RESET: "
-                             f"превышено кол-во попыток.")
-                return False
-        return True
+        started = time.monotonic()
+        future = self.message_queue.submit(split_messages, attempts)
+        future.add_done_callback(lambda f: self.on_message_sent(f, started))
+        if callback is not None:
+            future.add_done_callback(lambda f: self.run_send_callback(f, callback))
+        return future
+
+    @staticmethod
+    def run_send_callback(future: Future, callback: Callable[[bool], None]) -> None:
+        """
+        Передает результат отправки сообщения в callback (вызывается по завершении Future из send_message_async()).
+        Если отправка завершилась исключением (или была отменена), оно логируется, а в callback передается False.
+
+        :param future: Future из send_message_async().
+
+        :param callback: функция, принимающая результат отправки (True / False).
+        """
+        error = CancelledError() if future.cancelled() else future.exception()
+        if error is not None:
+            logger.error(f"Произошла ошибка при отправке сообщения: {error}")
+            logger.debug("------TRACEBACK------", exc_info=error)
+        try:
+            callback(False if error is not None else future.result())
+        except:
+            logger.error("Произошла ошибка в callback'е отправки сообщения.")
+            logger.debug("------TRACEBACK------", exc_info=True)
 
     def update_session(self, attempts: int = 3) -> bool:
         """
@@ -483,6 +653,8 @@ class Cardinal(object):
         Запускает хэндлеры, привязанные к тому или иному событию.
         """
         instance_id = self.run_id
+        if self.dispatcher is not None:
+            self.dispatcher.start()
         events_handlers = {
             FunPayAPI.types.EventTypes.INITIAL_MESSAGE: self.init_message_handlers,
             FunPayAPI.types.EventTypes.MESSAGES_LIST_CHANGED: self.messages_list_changed_handlers,
@@ -494,10 +666,35 @@ class Cardinal(object):
             FunPayAPI.types.EventTypes.ORDER_STATUS_CHANGED: self.order_status_changed_handlers,
         }
 
-        for event in self.runner.listen(delay=int(self.MAIN_CFG["Other"]["requestsDelay"])):
+        # requestsDelay - задержка при простое, requestsDelayMin - сразу после событий (адаптивный опрос).
+        settings = self.settings.other
+        for event in self.runner.listen(delay=settings.requests_delay, min_delay=settings.requests_delay_min):
             if instance_id != self.run_id:
                 break
-            self.run_handlers(events_handlers[event.type], (self, event))
+            if event.type is FunPayAPI.types.EventTypes.NEW_ORDER:
+                self.tracer.start(event.order.id, event.timings)
+            key = self.get_event_key(event)
+            if self.dispatcher is None or key is None:
+                self.run_handlers(events_handlers[event.type], (self, event))
+            else:
+                self.dispatcher.submit(key, events_handlers[event.type], (self, event), self.run_handler)
+
+    @staticmethod
+    def get_event_key(event: FunPayAPI.types.Event) -> tuple | None:
+        """
+        Возвращает ключ очереди диспетчера для события: события одного чата / заказа выполняются по порядку,
+        события разных чатов / заказов - параллельно.
+
+        :param event: событие.
+
+        :return: ключ или None, если хэндлеры события нужно выполнить сразу в потоке Runner'а
+        (Initial-события и события изменения списков: от них зависит состояние Кардинала для следующих событий).
+        """
+        if event.type == FunPayAPI.types.EventTypes.NEW_MESSAGE:
+            return "node", event.message.node_id
+        if event.type in (FunPayAPI.types.EventTypes.NEW_ORDER, FunPayAPI.types.EventTypes.ORDER_STATUS_CHANGED):
+            return "order", event.order.id
+        return None
 
     def lots_raise_loop(self):
         """
@@ -509,14 +706,15 @@ class Cardinal(object):
 
         logger.info("$CYANЦикл автоподнятия лотов запущен (это не значит, что автоподнятие лотов включено).")
         while True:
-            if not self.MAIN_CFG["FunPay"].getboolean("autoRaise"):
+            if not self.settings.funpay.auto_raise:
                 time.sleep(10)
                 continue
             next_time = self.raise_lots()
             delay = next_time - int(time.time())
             if delay <= 0:
                 continue
-            time.sleep(delay)
+            # Поднятия выполняются в фоне: ожидание прерывается, когда какая-либо игра получит новое время поднятия.
+            self.raise_scheduler.wait(delay if delay != float("inf") else None)
 
     def update_session_loop(self):
         """
@@ -530,28 +728,83 @@ class Cardinal(object):
             sleep_time = 60 if not result else 3600
 
     # Управление процессом
-    def init(self):
-        self.add_handlers_from_plugin(handlers)
-        self.load_plugins()
-        self.add_handlers()
+    def timed_stage(self, name: str, func: Callable, *args):
+        """
+        Выполняет этап запуска и записывает время его выполнения в self.startup_timings.
+
+        :param name: название этапа.
+
+        :param func: функция этапа.
+
+        :param args: аргументы функции.
+
+        :return: результат функции.
+        """
+        started = time.time()
+        try:
+            return func(*args)
+        finally:
+            self.startup_timings[name] = time.time() - started
 
+    def __init_telegram_commands(self) -> None:
+        """
+        Устанавливает меню команд Telegram бота и запускает его поллинг.
+        """
+        self.telegram.setup_commands()
+        Thread(target=self.telegram.run, daemon=True).start()
+
+    def __init_funpay(self) -> None:
+        """
+        Инициализирует аккаунт FunPay и загружает лоты / категории.
+        """
+        self.timed_stage("Аккаунт FunPay", self.__init_account)
+        self.timed_stage("Лоты и категории", self.__init_lots_and_categories)
+
+    def init(self):
+        started = time.time()
+        self.timed_stage("Хэндлеры и плагины", self.__init_handlers)
         self.block_list = cardinal_tools.load_block_list()
 
-        if self.MAIN_CFG["Telegram"].getboolean("enabled"):
-            self.__init_telegram()
+        telegram_enabled = self.settings.telegram_enabled
+        if telegram_enabled:
+            self.timed_stage("Telegram бот", self.__init_telegram)
+            from tg_bot import auto_response_cp, config_loader_cp, auto_delivery_cp, templates_cp, plugins_cp, \
+                file_uploader
             for module in [auto_response_cp, auto_delivery_cp, config_loader_cp, templates_cp, plugins_cp,
                            file_uploader]:
                 self.add_handlers_from_plugin(module)
 
-        self.run_handlers(self.pre_init_handlers, (self, ))
+        self.timed_stage("pre_init хэндлеры", self.run_handlers, self.pre_init_handlers, (self, ))
+
+        # Установка команд Telegram бота (запрос к Telegram) не зависит от FunPay и выполняется параллельно
+        # с инициализацией аккаунта.
+        telegram_thread = None
+        if telegram_enabled:
+            telegram_thread = Thread(target=self.timed_stage, args=("Команды Telegram", self.__init_telegram_commands),
+                                     daemon=True)
+            telegram_thread.start()
+        self.__init_funpay()
+        if telegram_thread is not None:
+            telegram_thread.join()
+
+        self.timed_stage("post_init хэндлеры", self.run_handlers, self.post_init_handlers, (self, ))
+        self.startup_timings["Всего"] = time.time() - started
+        self.log_startup_timings()
 
-        if self.MAIN_CFG["Telegram"].getboolean("enabled"):
-            self.telegram.setup_commands()
-            Thread(target=self.telegram.run, daemon=True).start()
+    def __init_handlers(self) -> None:
+        """
+        Регистрирует встроенные хэндлеры и загружает плагины.
+        """
+        self.add_handlers_from_plugin(handlers)
+        self.load_plugins()
+        self.add_handlers()
 
-        self.__init_account()
-        self.__init_lots_and_categories()
-        self.run_handlers(self.post_init_handlers, (self, ))
+    def log_startup_timings(self) -> None:
+        """
+        Выводит в лог время выполнения этапов запуска.
+        """
+        report = "\n".join(f"    {name}: {round(seconds, 2)} с" for name, seconds in self.startup_timings.items())
+        logger.info(f"$MAGENTAВремя запуска по этапам:\n{report}")
 
     def run(self):
         self.run_id += 1
@@ -561,6 +814,13 @@ class Cardinal(object):
 
         Thread(target=self.lots_raise_loop, daemon=True).start()
         Thread(target=self.update_session_loop, daemon=True).start()
+        if self.settings.other.configs_watch_interval:
+            Thread(target=self.config_watcher.loop, daemon=True).start()
+        if self.settings.other.metrics_port and self.metrics_server is None:
+            self.metrics_server = metrics.MetricsServer(self.metrics, self.settings.other.metrics_port,
+                                                        routes={"/traces": ("application/json; charset=utf-8",
+                                                                            self.tracer.to_json)})
+            self.metrics_server.start()
         self.process_events()
 
     def start(self):
@@ -573,6 +833,7 @@ class Cardinal(object):
         self.run_id += 1
         self.run_handlers(self.pre_start_handlers, (self, ))
         self.run_handlers(self.post_stop_handlers, (self, ))
+        self.runner.flush_state()
 
     def update_lots_and_categories(self):
         """
@@ -593,6 +854,121 @@ class Cardinal(object):
         with open(file_path, "w", encoding="utf-8") as f:
             config.write(f)
 
+        cardinal = get_cardinal()
+        if cardinal is None:
+            return
+        # Изменение файла самим FPC не должно приводить к его повторной загрузке.
+        if getattr(cardinal, "config_watcher", None) is not None:
+            cardinal.config_watcher.remember(file_path)
+        # Сравнение по is: ConfigParser - Mapping, и оператор in сравнивал бы содержимое конфигов.
+        if config is cardinal.AD_CFG:
+            cardinal.lot_matcher = None
+        if any(config is i for i in (cardinal.AD_CFG, cardinal.AR_CFG, cardinal.RAW_AR_CFG)):
+            templates.clear_cache()
+        if any(config is i for i in (cardinal.MAIN_CFG, cardinal.AR_CFG, cardinal.RAW_AR_CFG)):
+            cardinal.update_settings()
+
+    def update_settings(self) -> None:
+        """
+        Пересобирает снимок настроек (self.settings) по текущим конфигам и атомарно заменяет им старый.
+        """
+        self.settings = cfg_loader.build_settings(self.MAIN_CFG, self.AR_CFG)
+
+    def apply_main_config(self, config: ConfigParser) -> list[str]:
+        """
+        Применяет новый (уже проверенный) основной конфиг без перезапуска.
+
+        :param config: новый основной конфиг.
+
+        :return: список измененных параметров, которые вступят в силу только после перезапуска FPC.
+        """
+        with self.config_lock:
+            settings = cfg_loader.build_settings(config, self.AR_CFG)
+            restart_required = [f"{section}.{param}" for section, param in RESTART_REQUIRED_PARAMS
+                                if self.MAIN_CFG[section].get(param) != config[section].get(param)]
+            self.MAIN_CFG = config
+            self.settings = settings
+        return restart_required
+
+    def apply_auto_response_config(self, config: ConfigParser, raw_config: ConfigParser) -> None:
+        """
+        Применяет новый (уже проверенный) конфиг автоответчика без перезапуска.
+
+        :param config: новый конфиг автоответчика (с разделенными командами).
+
+        :param raw_config: новый исходный конфиг автоответчика.
+        """
+        with self.config_lock:
+            settings = cfg_loader.build_settings(self.MAIN_CFG, config)
+            self.RAW_AR_CFG, self.AR_CFG = raw_config, config
+            self.settings = settings
+            templates.clear_cache()
+
+    def apply_auto_delivery_config(self, config: ConfigParser) -> None:
+        """
+        Применяет новый (уже проверенный) конфиг автовыдачи без перезапуска. LotMatcher строится до замены конфига.
+
+        :param config: новый конфиг автовыдачи.
+        """
+        with self.config_lock:
+            matcher = lot_matcher.LotMatcher(config.sections())
+            self.AD_CFG = config
+            self.lot_matcher = matcher
+            self.lot_matcher_fingerprint = (id(config), len(config))
+            templates.clear_cache()
+
+    def reload_config(self, path: str) -> bool:
+        """
+        Перечитывает и проверяет конфиг, измененный вне FPC, и применяет его. Если конфиг невалиден,
+        продолжает использоваться старый.
+
+        :param path: путь до конфига (configs/_main.cfg, configs/auto_response.cfg или configs/auto_delivery.cfg).
+
+        :return: True, если конфиг применен, иначе False.
+        """
+        logger.info(f"Обнаружено изменение конфига $YELLOW{path}$RESET. Проверяю...")
+        try:
+            if path == "configs/_main.cfg":
+                restart_required = self.apply_main_config(cfg_loader.load_main_config(path))
+                if restart_required:
+                    logger.warning(f"Изменения параметров {', '.join(restart_required)} вступят в силу только "
+                                   f"после перезапуска.")
+            elif path == "configs/auto_response.cfg":
+                self.apply_auto_response_config(cfg_loader.load_auto_response_config(path),
+                                                cfg_loader.load_raw_auto_response_config(path))
+            elif path == "configs/auto_delivery.cfg":
+                self.apply_auto_delivery_config(cfg_loader.load_auto_delivery_config(path))
+            else:
+                return False
+        except (Utils.exceptions.ConfigParseError, configparser.Error) as e:
+            logger.error(f"Конфиг {path} не применен: {e}")
+            return False
+        except UnicodeDecodeError:
+            logger.error(f"Конфиг {path} не применен: ошибка при расшифровке UTF-8.")
+            return False
+        except:
+            logger.error(f"Конфиг {path} не применен: произошла непредвиденная ошибка. Подробнее в файле "
+                         f"logs/log.log.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+            return False
+        logger.info(f"Конфиг {path} применен.")
+        return True
+
+    def get_lot_matcher(self) -> lot_matcher.LotMatcher:
+        """
+        Возвращает LotMatcher по секциям конфига автовыдачи. Перестраивает его, если AD_CFG был заменен,
+        изменилось кол-во секций или конфиг был сохранен через save_config().
+
+        :return: экземпляр LotMatcher.
+        """
+        fingerprint = (id(self.AD_CFG), len(self.AD_CFG))
+        matcher = self.lot_matcher
+        if matcher is None or self.lot_matcher_fingerprint != fingerprint:
+            matcher = lot_matcher.LotMatcher(self.AD_CFG.sections())
+            self.lot_matcher = matcher
+            self.lot_matcher_fingerprint = fingerprint
+        return matcher
+
     # Загрузка плагинов
     @staticmethod
     def is_uuid_valid(uuid: str):
@@ -689,12 +1065,26 @@ class Cardinal(object):
         :param args: аргументы для функций.
         """
         for func in handlers_list:
-            try:
-                if getattr(func, "plugin_uuid") is None or self.plugins[getattr(func, "plugin_uuid")].enabled:
-                    func(*args)
-            except:
-                logger.error("Произошла ошибка при выполнении хэндлера. Подробнее в файле logs/log.log.")
-                logger.debug("------TRACEBACK------", exc_info=True)
+            self.run_handler(func, args)
+
+    def run_handler(self, func: Callable, args) -> None:
+        """
+        Выполняет хэндлер (если он не относится к выключенному плагину).
+
+        :param func: хэндлер.
+
+        :param args: аргументы для хэндлера.
+        """
+        name = f"{getattr(func, '__module__', None)}.{getattr(func, '__name__', 'handler')}"
+        started = time.monotonic()
+        try:
+            if getattr(func, "plugin_uuid") is None or self.plugins[getattr(func, "plugin_uuid")].enabled:
+                func(*args)
+        except:
+            self.handler_errors.inc(labels=(name,))
+            logger.error("Произошла ошибка при выполнении хэндлера. Подробнее в файле logs/log.log.")
+            logger.debug("------TRACEBACK------", exc_info=True)
+        self.handler_time.observe(time.monotonic() - started, (name,))
 
     def add_telegram_commands(self, uuid: str, commands: list[tuple[str, str, bool]]):
         """
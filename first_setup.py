@@ -43,7 +43,12 @@ default_config = {
 
     "Other": {
         "watermark": "",
-        "requestsDelay": "6"
+        "requestsDelay": "6",
+        "requestsDelayMin": "0.5",
+        "configsWatchInterval": "5",
+        "handlerWorkers": "4",
+        "handlerTimeout": "60",
+        "metricsPort": "0"
     }
 }
 
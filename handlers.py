@@ -19,7 +19,11 @@ import logging
 from threading import Thread
 
 import re
-from tg_bot import utils, keyboards
+from Utils.lazy import LazyModule
+
+# Модули Telegram бота нужны только при включенном Telegram: telebot импортируется при первом обращении.
+utils = LazyModule("tg_bot.utils")
+keyboards = LazyModule("tg_bot.keyboards")
 
 
 logger = logging.getLogger("FPC.handlers")
@@ -76,13 +80,14 @@ def send_response_handler(cardinal: Cardinal, event: NewMessageEvent) -> None:
     """
     Проверяет, является ли сообщение командой, и если да, отправляет ответ на данную команду.
     """
-    if event.message.chat_with in cardinal.block_list and int(cardinal.MAIN_CFG["BlockList"]["blockResponse"]):
+    settings = cardinal.settings
+    if event.message.chat_with in cardinal.block_list and settings.block_list.block_response:
         return
 
     command = event.message.text.strip().lower()
-    if not int(cardinal.MAIN_CFG["FunPay"]["autoResponse"]):
+    if not settings.funpay.auto_response:
         return
-    if command not in cardinal.AR_CFG:
+    if command not in settings.commands:
         return
 
     logger.info(f"Получена команда $YELLOW{command}$RESET "
@@ -100,11 +105,12 @@ def send_new_message_notification_handler(cardinal: Cardinal, event: NewMessageE
     """
     if not cardinal.telegram or not event.message.unread:
         return
-    if event.message.chat_with in cardinal.block_list and int(cardinal.MAIN_CFG["BlockList"]["blockNewMessageNotification"]):
+    settings = cardinal.settings
+    if event.message.chat_with in cardinal.block_list and settings.block_list.block_new_message_notification:
         return
     if event.message.sys_type is not None and event.message.sys_type != SystemMessageTypes.NON_SYSTEM:
         return
-    if event.message.text.strip().lower() in cardinal.AR_CFG.sections():
+    if event.message.text.strip().lower() in settings.commands:
         return
     if event.message.text.startswith("!автовыдача"):
         return
@@ -122,10 +128,11 @@ def send_command_notification_handler(cardinal: Cardinal, event: NewMessageEvent
     """
     Отправляет уведомление о введенной комманде в телеграм.
     """
-    if event.message.chat_with in cardinal.block_list and int(cardinal.MAIN_CFG["BlockList"]["blockCommandNotification"]):
+    settings = cardinal.settings
+    if event.message.chat_with in cardinal.block_list and settings.block_list.block_command_notification:
         return
     command = event.message.text.strip().lower()
-    if not cardinal.telegram or command not in cardinal.AR_CFG:
+    if not cardinal.telegram or command not in settings.commands:
         return
 
     if not cardinal.AR_CFG[command].getboolean("telegramNotification"):
@@ -197,10 +204,10 @@ def get_lot_config_by_name(cardinal: Cardinal, name: str) -> configparser.Sectio
 
     :return: секцию конфига или None.
     """
-    for i in cardinal.AD_CFG.sections():
-        if i in name:
-            return cardinal.AD_CFG[i]
-    return None
+    lot_name = cardinal.get_lot_matcher().find_first(name)
+    if lot_name is None or lot_name not in cardinal.AD_CFG:
+        return None
+    return cardinal.AD_CFG[lot_name]
 
 
 def check_lot_products_count(config_obj: configparser.SectionProxy) -> int:
@@ -241,7 +248,7 @@ def send_new_order_notification_handler(cardinal: Cardinal, event: NewOrderEvent
     """
     Отправляет уведомления о новом заказе в телеграм.
     """
-    if event.order.buyer_username in cardinal.block_list and int(cardinal.MAIN_CFG["BlockList"]["blockNewOrderNotification"]):
+    if event.order.buyer_username in cardinal.block_list and cardinal.settings.block_list.block_new_order_notification:
         return
     if not cardinal.telegram:
         return
@@ -268,12 +275,13 @@ def deliver_product(cardinal: Cardinal, event: NewOrderEvent, delivery_obj: conf
     [Результат выполнения, текст товара, оставшееся кол-во товара] - в любом другом случае.
     """
     node_id = cardinal.account.get_node_id_by_username(event.order.buyer_username)
-    response_text = cardinal_tools.format_order_text(delivery_obj["response"], event.order)
 
     # Проверяем, есть ли у лота файл с товарами. Если нет, то просто отправляем response лота.
     if delivery_obj.get("productsFileName") is None:
+        response_text = cardinal_tools.format_order_text(delivery_obj["response"], event.order)
         new_msg_obj = Message(response_text, node_id, None)
-        result = cardinal.send_message(new_msg_obj)
+        with cardinal.tracer.span(event.order.id, "send"):
+            result = cardinal.send_message(new_msg_obj)
         if not result:
             logger.error(f"Не удалось отправить товар для ордера $YELLOW{event.order.id}$RESET. ")
         return result, response_text, -1
@@ -281,73 +289,88 @@ def deliver_product(cardinal: Cardinal, event: NewOrderEvent, delivery_obj: conf
     # Получаем товар.
     file_name = delivery_obj.get("productsFileName")
     products = []
-    if cardinal.MAIN_CFG["FunPay"].getboolean("multiDelivery") and not delivery_obj.getboolean("disableMultiDelivery"):
-        result = AMOUNT_EXPRESSION.findall(event.order.title)
-        if result:
-            amount = int(result[0].split(" ")[0])
-            products = cardinal_tools.get_product(f"storage/products/{file_name}", amount)
-    if not products:
-        products = cardinal_tools.get_product(f"storage/products/{file_name}")
+    with cardinal.tracer.span(event.order.id, "product_take"):
+        if cardinal.settings.funpay.multi_delivery and not delivery_obj.getboolean("disableMultiDelivery"):
+            result = AMOUNT_EXPRESSION.findall(event.order.title)
+            if result:
+                amount = int(result[0].split(" ")[0])
+                products = cardinal_tools.get_product(f"storage/products/{file_name}", amount, event.order.id)
+        if not products:
+            products = cardinal_tools.get_product(f"storage/products/{file_name}", token=event.order.id)
 
     product_text = "\n".join(products[0]).replace("\\n", "\n")
-    response_text = response_text.replace("$product", product_text)
+    response_text = cardinal_tools.format_order_text(delivery_obj["response"], event.order,
+                                                     {"$product": product_text,
+                                                      "$product_amount": str(len(products[0]))})
 
     # Отправляем товар.
     new_msg_obj = Message(response_text, node_id, None)
-    result = cardinal.send_message(new_msg_obj)
+    with cardinal.tracer.span(event.order.id, "send"):
+        result = cardinal.send_message(new_msg_obj)
 
     # Если произошла какая-либо ошибка при отправлении товара, возвращаем товар обратно в файл с товарами.
     if not result:
-        cardinal_tools.add_products(f"storage/products/{file_name}", [product_text])
+        cardinal_tools.return_products(f"storage/products/{file_name}", event.order.id)
         logger.error(f"Не удалось отправить товар для ордера $YELLOW{event.order.id}$RESET. ")
+    else:
+        cardinal_tools.confirm_products(f"storage/products/{file_name}", event.order.id)
     return result, response_text, cardinal_tools.count_products(f"storage/products/{file_name}")
 
 
 def deliver_product_handler(cardinal: Cardinal, event: NewOrderEvent, *args) -> None:
     """
     Обертка для deliver_product(), обрабатывающая ошибки.
+    Записывает этапы обработки заказа в трассировку (cardinal.tracer).
     """
-    if event.order.buyer_username in cardinal.block_list and cardinal.MAIN_CFG["BlockList"].getboolean("blockDelivery"):
+    # Этап "dispatch" - от создания события Runner'ом до начала выдачи (очередь хэндлеров и предыдущие хэндлеры).
+    cardinal.tracer.mark(event.order.id, "dispatch")
+    if event.order.buyer_username in cardinal.block_list and cardinal.settings.block_list.block_delivery:
         logger.info(f"Пользователь {event.order.buyer_username} находится в ЧС и включена блокировка автовыдачи. "
                     f"$YELLOW(ID: {event.order.id})$RESET")
         if cardinal.telegram:
             text = f"Пользователь {event.order.buyer_username} находится в ЧС и включена блокировка автовыдачи."
             Thread(target=cardinal.telegram.send_notification, args=(text, ),
                    kwargs={"notification_type": utils.NotificationTypes.delivery}, daemon=True).start()
+        cardinal.tracer.discard(event.order.id)
         return
 
     # Ищем название лота в конфиге.
-    delivery_obj = None
-    config_lot_name = ""
-    for lot_name in cardinal.AD_CFG:
-        if lot_name in event.order.title:
-            delivery_obj = cardinal.AD_CFG[lot_name]
-            config_lot_name = lot_name
-            break
+    delivery_obj = get_lot_config_by_name(cardinal, event.order.title)
+    config_lot_name = delivery_obj.name if delivery_obj is not None else ""
 
     if delivery_obj is None:
         logger.info(f"Лот \"{event.order.title}\" не обнаружен в конфиге автовыдачи.")
+        cardinal.tracer.discard(event.order.id)
         return
 
     if delivery_obj.get("disable") is not None and delivery_obj.getboolean("disable"):
         logger.info(f"Для данного лота отключена автовыдача. $YELLOW(ID: {event.order.id})$RESET")
+        cardinal.tracer.discard(event.order.id)
         return
 
-    cardinal.run_handlers(cardinal.pre_delivery_handlers, (cardinal, event, config_lot_name))
+    with cardinal.tracer.span(event.order.id, "pre_delivery"):
+        cardinal.run_handlers(cardinal.pre_delivery_handlers, (cardinal, event, config_lot_name))
+    status = "delivered"
     try:
         result = deliver_product(cardinal, event, delivery_obj, *args)
         if not result[0]:
-            cardinal.run_handlers(cardinal.post_delivery_handlers,
-                                  (cardinal, event, config_lot_name, "Превышено кол-во попыток.", result[2], True))
+            status = "error"
+            with cardinal.tracer.span(event.order.id, "post_delivery"):
+                cardinal.run_handlers(cardinal.post_delivery_handlers,
+                                      (cardinal, event, config_lot_name, "Превышено кол-во попыток.", result[2], True))
         else:
             logger.info(f"Товар для ордера {event.order.id} выдан.")
-            cardinal.run_handlers(cardinal.post_delivery_handlers,
-                                  (cardinal, event, config_lot_name, result[1], result[2], False))
+            with cardinal.tracer.span(event.order.id, "post_delivery"):
+                cardinal.run_handlers(cardinal.post_delivery_handlers,
+                                      (cardinal, event, config_lot_name, result[1], result[2], False))
     except Exception as e:
+        status = "error"
         logger.error(f"Произошла непредвиденная ошибка при обработке заказа {event.order.id}.")
         logger.debug("------TRACEBACK------", exc_info=True)
-        cardinal.run_handlers(cardinal.post_delivery_handlers,
-                              (cardinal, event, config_lot_name, str(e), -1, True))
+        with cardinal.tracer.span(event.order.id, "post_delivery"):
+            cardinal.run_handlers(cardinal.post_delivery_handlers,
+                                  (cardinal, event, config_lot_name, str(e), -1, True))
+    cardinal.finish_order_trace(event.order.id, status)
 
 
 # REGISTER_TO_POST_DELIVERY
@@ -410,8 +433,9 @@ def update_lot_state(cardinal: Cardinal, lot: FunPayAPI.types.Lot, task: int) ->
 
 
 def update_lots_states(cardinal: Cardinal, event: NewOrderEvent):
-    if not any([cardinal.MAIN_CFG["FunPay"].getboolean("autoRestore"),
-                cardinal.MAIN_CFG["FunPay"].getboolean("autoDisable")]):
+    # Снимок настроек берется один раз: переключение в ПУ во время обхода лотов не смешивает старые и новые значения.
+    settings = cardinal.settings.funpay
+    if not any([settings.auto_restore, settings.auto_disable]):
         return
     if cardinal.current_lots_last_tag != event.tag or cardinal.last_state_change_tag == event.tag:
         return
@@ -430,16 +454,16 @@ def update_lots_states(cardinal: Cardinal, event: NewOrderEvent):
         if lot.id not in lots_ids:
             # и не найден в конфиге автовыдачи (глобальное автовосстановление включено)
             if config_obj is None:
-                if cardinal.MAIN_CFG["FunPay"].getboolean("autoRestore"):
+                if settings.auto_restore:
                     current_task = 1
 
             # и найден в конфиге автовыдачи
             else:
                 # и глобальное автовосстановление вкл. + не выключено в самом лоте в конфиге автовыдачи
-                if cardinal.MAIN_CFG["FunPay"].getboolean("autoRestore") and \
+                if settings.auto_restore and \
                         config_obj.get("disableAutoRestore") in ["0", None]:
                     # если глобальная автодеактивация выключена - восстанавливаем.
-                    if not cardinal.MAIN_CFG["FunPay"].getboolean("autoDisable"):
+                    if not settings.auto_disable:
                         current_task = 1
                     # если глобальная автодеактивация включена - восстанавливаем только если есть товары.
                     else:
@@ -453,7 +477,7 @@ def update_lots_states(cardinal: Cardinal, event: NewOrderEvent):
                 products_count = check_lot_products_count(config_obj)
                 # и все условия выполнены: нет товаров + включено глобальная автодеактивация + она не выключена в
                 # самом лоте в конфига автовыдачи - отключаем.
-                if all((not products_count, cardinal.MAIN_CFG["FunPay"].getboolean("autoDisable"),
+                if all((not products_count, settings.auto_disable,
                         config_obj.get("disableAutoDisable") in ["0", None])):
                     current_task = -1
 
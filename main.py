@@ -1,5 +1,7 @@
+import time
+IMPORT_STARTED = time.time()
+
 import Utils.config_loader as cfg_loader
-from first_setup import first_setup
 from colorama import Fore, Style
 import Utils.logger
 import logging.config
@@ -11,11 +13,18 @@ import os
 from cardinal import Cardinal
 import Utils.exceptions as excs
 
+IMPORT_TIME = time.time() - IMPORT_STARTED
+
 if getattr(sys, 'frozen', False):
     os.chdir(os.path.dirname(sys.executable))
 else:
     os.chdir(os.path.dirname(__file__))
 
+# Бенчмарки парсеров и горячих участков (python main.py --bench, подробнее в Utils/benchmarks.py).
+if "--bench" in sys.argv:
+    import Utils.benchmarks
+    sys.exit(Utils.benchmarks.main([i for i in sys.argv[1:] if i != "--bench"]))
+
 # Инициируем цветной текст и логгер.
 colorama.init()
 if not os.path.exists("logs"):
@@ -26,6 +35,8 @@ with open("configs/logger_config.json") as f:
     LOGGER_CONFIG = json.loads(f.read())
 logging.config.dictConfig(LOGGER_CONFIG)
 logging.raiseExceptions = False
+# Запись логов в консоль и файл выполняется в отдельном потоке и не задерживает обработку событий.
+Utils.logger.start_queue_logging(list(LOGGER_CONFIG["loggers"]))
 logger = logging.getLogger("main")
 logger.debug("-------------------Новый запуск.-------------------")
 
@@ -67,6 +78,7 @@ print(f"{Fore.MAGENTA}{Style.BRIGHT} * ИНСТРУКЦИЯ: {Fore.BLUE}{Style.B
 print("\n\n")
 
 if not os.path.exists("configs/_main.cfg"):
+    from first_setup import first_setup
     first_setup()
     sys.exit()
 
@@ -101,7 +113,14 @@ except:
     logger.error("Завершаю программу...")
     sys.exit()
 
+# Адрес FunPay можно заменить на адрес локального эмулятора (python -m Utils.funpay_emulator).
+if os.environ.get("FUNPAY_BASE_URL"):
+    import FunPayAPI.types
+    FunPayAPI.types.Links.set_base_url(os.environ["FUNPAY_BASE_URL"])
+    logger.warning(f"$YELLOWВсе запросы к FunPay отправляются на {FunPayAPI.types.Links.BASE_URL}.$RESET")
+
 # Запускаем основную программу Cardinal
+main_program = None
 try:
     main_program = Cardinal(
         MAIN_CONFIG,
@@ -109,10 +128,13 @@ try:
         AUTO_RESPONSE_CONFIG,
         RAW_AUTO_RESPONSE_CONFIG
     )
+    main_program.startup_timings["Импорт модулей"] = IMPORT_TIME
     main_program.init()
     main_program.run()
 except KeyboardInterrupt:
     logger.info("Завершаю программу...")
+    if main_program is not None:
+        main_program.runner.flush_state()
     sys.exit()
 except:
     logger.critical("При работе Кардинала произошла необработанная ошибка. Подробнее в файле logs/log.log")
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def read_fixture():
+    """
+    Возвращает функцию, читающую файл из tests/fixtures.
+    """
+    def read(name: str) -> str:
+        with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+            return f.read()
+    return read
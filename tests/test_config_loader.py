@@ -0,0 +1,50 @@
+import copy
+
+import pytest
+
+import first_setup
+from Utils import config_loader as cfg_loader
+from Utils.exceptions import ConfigParseError
+
+
+@pytest.fixture
+def write_config(tmp_path):
+    def write(**other: str) -> str:
+        settings = copy.deepcopy(first_setup.default_config)
+        settings["FunPay"]["golden_key"] = "0" * 32
+        settings["Telegram"]["secretKey"] = "secret"
+        settings["Other"].update(other)
+        path = tmp_path / "_main.cfg"
+        with open(path, "w", encoding="utf-8") as f:
+            first_setup.create_config_obj(settings).write(f)
+        return str(path)
+    return write
+
+
+def test_default_config(write_config):
+    settings = cfg_loader.build_settings(cfg_loader.load_main_config(write_config()))
+    assert settings.other.requests_delay_min < 1
+
+
+@pytest.mark.parametrize("value", ["0.1", "0.25", "2", "100"])
+def test_requests_delay_min_valid(write_config, value):
+    settings = cfg_loader.build_settings(cfg_loader.load_main_config(write_config(requestsDelayMin=value)))
+    assert settings.other.requests_delay_min == float(value)
+
+
+@pytest.mark.parametrize("value", ["0", "0.05", "100.5", "abc", "nan", "inf"])
+def test_requests_delay_min_invalid(write_config, value):
+    with pytest.raises(ConfigParseError):
+        cfg_loader.load_main_config(write_config(requestsDelayMin=value))
+
+
+@pytest.mark.parametrize("value, valid", [("0", True), ("9100", True), ("65535", True), ("65536", False),
+                                          ("-1", False), ("80.5", False), ("port", False)])
+def test_metrics_port(write_config, value, valid):
+    if not valid:
+        with pytest.raises(ConfigParseError) as e:
+            cfg_loader.load_main_config(write_config(metricsPort=value))
+        assert len(str(e.value)) < 500
+        return
+    settings = cfg_loader.build_settings(cfg_loader.load_main_config(write_config(metricsPort=value)))
+    assert settings.other.metrics_port == int(value)
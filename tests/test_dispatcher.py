@@ -0,0 +1,52 @@
+import random
+import threading
+import time
+
+from Utils.dispatcher import EventDispatcher
+
+
+def call(func, args):
+    func(*args)
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_events_of_one_key_are_fifo():
+    dispatcher = EventDispatcher(workers=4)
+    dispatcher.start()
+    done = []
+    lock = threading.Lock()
+
+    def handler(key, index):
+        time.sleep(random.random() / 500)
+        with lock:
+            done.append((key, index))
+
+    for index in range(50):
+        for key in range(3):
+            dispatcher.submit(key, [handler], (key, index), call)
+    assert wait_for(lambda: dispatcher.processed == 150)
+    dispatcher.stop()
+    for key in range(3):
+        assert [i for k, i in done if k == key] == list(range(50))
+
+
+def test_slow_key_does_not_block_others():
+    dispatcher = EventDispatcher(workers=2)
+    dispatcher.start()
+    release = threading.Event()
+    done = []
+    dispatcher.submit("slow", [lambda: release.wait(5)], (), call)
+    dispatcher.submit("slow", [lambda: done.append("slow")], (), call)
+    dispatcher.submit("fast", [lambda: done.append("fast")], (), call)
+    assert wait_for(lambda: done == ["fast"])
+    release.set()
+    assert wait_for(lambda: done == ["fast", "slow"])
+    dispatcher.stop()
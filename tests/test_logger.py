@@ -0,0 +1,28 @@
+import logging
+import queue
+
+from Utils.logger import LazyQueueHandler
+
+
+def test_full_queue_drops_records_silently(capsys):
+    records_queue = queue.Queue(2)
+    handler = LazyQueueHandler(records_queue)
+    logger = logging.getLogger("FPC.test_logger")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning("Запись %s", i)
+        assert handler.dropped == 3
+        assert capsys.readouterr().err == ""
+
+        records = [records_queue.get_nowait() for _ in range(2)]
+        assert [i.getMessage() for i in records] == ["Запись 0", "Запись 1"]
+        logger.warning("Запись 5")
+        # Перед следующей записью - одно предупреждение о пропущенных записях.
+        warning, record = records_queue.get_nowait(), records_queue.get_nowait()
+        assert "3" in warning.getMessage() and warning.levelno == logging.WARNING
+        assert record.getMessage() == "Запись 5"
+        assert handler.unreported == 0 and handler.dropped == 3
+    finally:
+        logger.removeHandler(handler)
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from Utils.lot_matcher import LotMatcher
+
+
+def linear_search(patterns: list[str], text: str) -> str | None:
+    for pattern in patterns:
+        if pattern in text:
+            return pattern
+    return None
+
+
+@pytest.mark.parametrize("patterns, text, expected", [
+    (["he", "she", "hers"], "ushers", "he"),
+    (["hers", "she"], "ushers", "hers"),
+    (["abcd", "bc"], "abce", "bc"),
+    (["Аккаунт", "Аккаунт Steam"], "Аккаунт Steam, 10 игр", "Аккаунт"),
+    (["x"], "abc", None),
+    ([], "abc", None),
+])
+def test_find_first(patterns, text, expected):
+    assert LotMatcher(patterns).find_first(text) == expected
+
+
+def test_matches_linear_search():
+    rnd = random.Random(0)
+    for _ in range(300):
+        patterns = ["".join(rnd.choices("abc", k=rnd.randint(1, 4))) for _ in range(rnd.randint(1, 8))]
+        matcher = LotMatcher(patterns)
+        for _ in range(10):
+            text = "".join(rnd.choices("abcd", k=rnd.randint(0, 12)))
+            assert matcher.find_first(text) == linear_search(patterns, text)
@@ -0,0 +1,18 @@
+from FunPayAPI import types
+from Utils.message_queue import MessageQueue
+
+
+def test_message_queue():
+    sent = []
+    responses = {1: {"response": {"error": None}}, 2: {"response": {"error": "Ошибка"}}}
+    queue = MessageQueue(lambda mes: responses[mes.node_id], on_sent=lambda mes: sent.append(mes.text),
+                         rate=100, burst=100)
+
+    ok = queue.submit([types.Message(f"Сообщение {i}", 1, "Buyer") for i in range(3)])
+    failed = queue.submit([types.Message("Ошибка", 2, "Buyer"), types.Message("Не отправится", 2, "Buyer")],
+                          attempts=1)
+    assert ok.result(5) is True
+    assert failed.result(5) is False
+    assert sent == [f"Сообщение {i}" for i in range(3)]
+    assert queue.sent == 3 and queue.failed == 1
+    queue.dispatcher.stop()
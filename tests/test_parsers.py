@@ -0,0 +1,82 @@
+"""
+Парсеры FunPayAPI.parsers сравниваются с эталонными результатами (tests/fixtures/golden.json), полученными
+разбором тех же страниц через BeautifulSoup (html.parser и lxml дают одинаковый результат).
+Фикстуры содержат закомментированные элементы, <script> с разметкой внутри строк и ">" в значениях атрибутов.
+"""
+
+import json
+
+import pytest
+from bs4 import BeautifulSoup
+
+from FunPayAPI import parsers, types
+
+
+@pytest.fixture
+def golden(read_fixture):
+    return json.loads(read_fixture("golden.json"))
+
+
+def test_parse_orders(read_fixture, golden):
+    orders = parsers.parse_orders(read_fixture("orders_trade.html"), True, True, True)
+    assert [{"id": i.id, "status": i.status.name, "title": i.title, "price": i.price,
+             "buyer_username": i.buyer_username, "buyer_id": i.buyer_id} for i in orders] == golden["orders"]
+
+
+def test_parse_orders_filters(read_fixture, golden):
+    html = read_fixture("orders_trade.html")
+    outstanding = [i["id"] for i in golden["orders"] if i["status"] == "OUTSTANDING"]
+    assert [i.id for i in parsers.parse_orders(html)] == outstanding
+    assert [i.id for i in parsers.parse_orders(html, exclude=outstanding[:1])] == outstanding[1:]
+
+
+def test_order_html_matches_soup(read_fixture):
+    html = read_fixture("orders_trade.html")
+    expected = [str(i) for i in BeautifulSoup(html, "html.parser").find_all("a", {"class": "tc-item"})]
+    orders = parsers.parse_orders(html, True, True, True)
+    assert [str(BeautifulSoup(i.html, "html.parser").a) for i in orders] == expected
+
+
+def test_parse_orders_not_authorized(read_fixture):
+    html = read_fixture("orders_trade.html").replace("user-link-name", "user-link")
+    with pytest.raises(parsers.exceptions.AccountDataNotfound):
+        parsers.parse_orders(html)
+
+
+def test_parse_chat_bookmarks(read_fixture, golden):
+    result = parsers.parse_chat_bookmarks(read_fixture("chat_bookmarks.html"))
+    assert [list(i) for i in result] == golden["chat_bookmarks"]
+
+
+@pytest.mark.parametrize("include_currency, key", [(False, "user_page"), (True, "user_page_currency")])
+def test_parse_user_page(read_fixture, golden, include_currency, key):
+    info = parsers.parse_user_page(read_fixture("user_page.html"), include_currency)
+    assert [{"id": i.id, "title": i.title, "public_link": i.public_link,
+             "currency": i.type == types.CategoryTypes.CURRENCY} for i in info.categories] == golden[key]["categories"]
+    assert [{"category_id": i.category_id, "id": i.id, "title": i.title, "price": i.price}
+            for i in info.lots] == golden[key]["lots"]
+
+
+def test_parse_account_page(read_fixture, golden):
+    data = parsers.parse_account_page(read_fixture("main_page.html"))
+    assert {k: data[k] for k in golden["account_page"]} == golden["account_page"]
+
+
+def test_iter_elements_nested_and_void():
+    html = ('<div class="x"><div class="y"><br><img src="a>b"/><div/></div>'
+            '<input value=\'</div>\'></div><div class="x">2</div>')
+    elements = list(parsers.iter_elements(html, "div", "x"))
+    assert [i.html for i in elements] == [html[:html.index('<div class="x">2')], '<div class="x">2</div>']
+    assert elements[0].find("div", "y").find("img")["src"] == "a>b"
+    assert parsers.find_element(html, "div", "z") is None
+
+
+def test_get_text():
+    html = 'a<!-- <b>c</b> --><script>if (1 < 2) {}</script><b title="x>y">&amp;b</b>'
+    assert parsers.get_text(html) == BeautifulSoup(html, "html.parser").get_text() == "a&b"
+
+
+def test_set_parser_backend():
+    with pytest.raises(ValueError):
+        parsers.set_parser_backend("html5lib")
+    assert parsers.PARSER_BACKEND == "html.parser"
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from Utils import products
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    def make(lines: list[str]) -> products.ProductsStore:
+        path = tmp_path / "goods.txt"
+        path.write_text("\n".join(lines), encoding="utf-8")
+        return products.ProductsStore(str(path), str(tmp_path / "state" / "goods.txt.json"))
+    return make
+
+
+def read_lines(store: products.ProductsStore) -> list[str]:
+    with open(store.path, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_compaction_by_consumed_share(make_store):
+    store = make_store([f"product {i}" for i in range(10)])
+    assert store.take(2) == ["product 0", "product 1"]
+    assert store.take(2) == ["product 2", "product 3"]
+    # Выдано 4 из 10 - файл не перезаписывается, выданные товары остаются перед курсором.
+    assert store.compactions == 0 and store.offset > 0
+    assert read_lines(store)[0] == "product 0"
+
+    assert store.take() == ["product 4"]
+    assert store.compactions == 1 and store.offset == 0 and store.consumed == 0
+    assert read_lines(store) == [f"product {i}" for i in range(5, 10)]
+    assert store.count() == 5
+
+
+def test_consumed_survives_restart(make_store):
+    store = make_store([f"product {i}" for i in range(10)])
+    store.take(3)
+    restored = products.ProductsStore(store.path, store.state_path)
+    assert restored.consumed == 3 and restored.count() == 7
+    assert restored.take() == ["product 3"]
+
+
+def test_take_with_token_is_idempotent(make_store):
+    store = make_store([f"product {i}" for i in range(10)])
+    assert store.take(2, token="ORDER1") == ["product 0", "product 1"]
+    assert store.take(2, token="ORDER1") == ["product 0", "product 1"]
+    assert store.count() == 8
+
+    store.release("ORDER1")
+    assert store.count() == 10 and "ORDER1" not in store.pending
+    assert read_lines(store)[-2:] == ["product 0", "product 1"]
+
+    store.take(1, token="ORDER2")
+    store.confirm("ORDER2")
+    restored = products.ProductsStore(store.path, store.state_path)
+    assert restored.pending == {} and restored.count() == 9
+
+
+def test_recover_interrupted_add(make_store):
+    store = make_store(["product 0", "product 1"])
+    size = store.sync().st_size
+    # Процесс упал посреди дозаписи: журнал записан, в файл попала только часть данных.
+    store.write_journal({"op": "add", "size": size, "data": "product 2\nproduct 3", "token": None})
+    with open(store.path, "ab") as f:
+        f.write(b"\nprodu")
+
+    restored = products.ProductsStore(store.path, store.state_path)
+    assert read_lines(restored) == ["product 0", "product 1", "product 2", "product 3"]
+    assert restored.count() == 4
+    assert not os.path.exists(restored.journal_path)
+
+
+@pytest.mark.parametrize("replaced", [True, False])
+def test_recover_interrupted_compact(make_store, replaced):
+    lines = [f"product {i}" for i in range(10)]
+    store = make_store(lines)
+    store.take(3)
+    offset, size = store.offset, store.sync().st_size
+    store.write_journal({"op": "compact", "offset": offset, "new_size": size - offset})
+    with open(store.path, "rb") as f:
+        rest = f.read()[offset:]
+    if replaced:
+        # Файл уже заменен, но состояние (курсор) не обновлено.
+        with open(store.path, "wb") as f:
+            f.write(rest)
+    else:
+        with open(f"{store.path}.tmp", "wb") as f:
+            f.write(rest[:5])
+
+    restored = products.ProductsStore(store.path, store.state_path)
+    assert restored.count() == 7
+    assert restored.take() == ["product 3"]
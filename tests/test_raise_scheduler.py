@@ -0,0 +1,42 @@
+import json
+import threading
+import time
+
+from FunPayAPI import types
+from Utils.raise_scheduler import RaiseScheduler
+
+
+def make_category(game_id: int) -> types.Category:
+    return types.Category(game_id * 10, game_id, f"Игра {game_id}", "", "", types.CategoryTypes.LOT)
+
+
+def test_run_pending_does_not_wait_for_slow_games(tmp_path):
+    release = threading.Event()
+    now = int(time.time())
+    state_path = tmp_path / "raise_times.json"
+
+    def raise_func(cat: types.Category) -> int:
+        if cat.game_id == 1:
+            release.wait(5)
+        return now + 1000 * cat.game_id
+
+    scheduler = RaiseScheduler(raise_func, workers=2, min_interval=0, state_path=str(state_path))
+    scheduler.set_categories([make_category(1), make_category(2)])
+
+    started = time.monotonic()
+    scheduler.run_pending()
+    assert time.monotonic() - started < 1
+    # Игра 1 еще поднимается и не извлекается из очереди повторно.
+    assert scheduler.pop_due() == []
+
+    scheduler.wait(5)
+    assert scheduler.deadlines[2] == now + 2000
+    assert json.loads(state_path.read_text())["2"] == now + 2000
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while scheduler.in_flight and time.monotonic() < deadline:
+        scheduler.wait(0.1)
+    assert scheduler.deadlines == {1: now + 1000, 2: now + 2000}
+    assert json.loads(state_path.read_text()) == {"1": now + 1000, "2": now + 2000}
+    assert scheduler.next_deadline() == now + 1000
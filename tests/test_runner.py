@@ -0,0 +1,90 @@
+import pytest
+
+from FunPayAPI import Runner, types
+from FunPayAPI.state import StateStore
+from Utils.benchmarks import make_account
+
+
+PAID, CLOSED = types.OrderStatuses.OUTSTANDING, types.OrderStatuses.COMPLETED
+
+
+def make_order(order_id: str, status: types.OrderStatuses = CLOSED) -> types.Order:
+    return types.Order("", order_id, f"Лот {order_id}", 10.0, "Buyer", 1, status)
+
+
+@pytest.fixture
+def runner():
+    runner = Runner(make_account({}))
+    # Страница от новых к старым: C (незавершенный), B, A.
+    runner.parse_orders([make_order("C", PAID), make_order("B"), make_order("A")])
+    runner.first_request = False
+    return runner
+
+
+def event_types(events: list[types.Event]) -> list[tuple[str, str]]:
+    return [(type(i).__name__, i.order.id) for i in events]
+
+
+def test_new_orders_on_top(runner):
+    events = runner.parse_orders([make_order("E", PAID), make_order("D", PAID), make_order("C"), make_order("B"),
+                                  make_order("A")])
+    assert event_types(events) == [("NewOrderEvent", "E"), ("NewOrderEvent", "D"), ("OrderStatusChangedEvent", "C")]
+    assert list(runner.saved_orders.keys())[-2:] == ["D", "E"]
+
+
+def test_early_break_on_ordered_page(runner):
+    def orders():
+        yield make_order("D", PAID)
+        yield make_order("C", PAID)
+        raise AssertionError("страница дочитана до конца")
+    assert event_types(runner.parse_orders(orders())) == [("NewOrderEvent", "D")]
+
+
+def test_reordered_page(runner):
+    # Самый новый сохраненный заказ (C) не первый среди известных: порядок изменился, новый заказ ниже известного.
+    events = runner.parse_orders([make_order("B"), make_order("D", PAID), make_order("C", PAID), make_order("A")])
+    assert event_types(events) == [("NewOrderEvent", "D")]
+
+
+def test_evicted_orders_are_skipped(runner):
+    # Закрытый неизвестный заказ ниже известных - вытесненный из self.saved_orders старый заказ.
+    events = runner.parse_orders([make_order("C", PAID), make_order("B"), make_order("A"), make_order("Z")])
+    assert events == []
+
+
+@pytest.mark.parametrize("counters, tag_changed, expected", [
+    ((0, 5), True, True),
+    ((1, 5), True, True),
+    ((1, 5), False, True),
+    ((0, 5), False, False),
+])
+def test_orders_fetch_needed(runner, counters, tag_changed, expected):
+    runner.last_orders_counters = (0, 5)
+    assert runner.orders_fetch_needed({"buyer": counters[0], "seller": counters[1]}, tag_changed) is expected
+
+
+def test_state_is_flushed_once(tmp_path):
+    path = tmp_path / "runner_state.json"
+    runner = Runner(make_account({}), state_path=str(path))
+    runner.update_saved_message(types.Message("Привет", 1, "Buyer"))
+    assert runner.state_dirty and not path.exists()
+    assert runner.flush_state() is True
+    assert path.exists() and not runner.state_dirty
+    assert runner.flush_state() is False
+
+    restored = Runner(make_account({}), state_path=str(path))
+    assert restored.warm_start()
+    assert restored.saved_messages[1].text == "Привет"
+
+
+def test_chats_index_is_bounded_and_local():
+    account = make_account({})
+    account.chats_by_username = StateStore(2)
+    requests_sent = []
+    account.method = lambda *args, **kwargs: requests_sent.append(args)
+    account.update_chats("", [(3, "C", "", False), (2, "B", "", False), (1, "A", "", False)])
+    # Самый старый чат (A) вытеснен из индекса; промах индекса не отправляет запрос к FunPay.
+    assert list(account.chats_by_username.items()) == [("B", 2), ("C", 3)]
+    assert account.get_node_id_by_username("A") is None
+    assert account.get_node_id_by_username("C") == 3
+    assert requests_sent == []
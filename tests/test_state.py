@@ -0,0 +1,56 @@
+import time
+
+from FunPayAPI import types
+from FunPayAPI.state import StateStore, SavedOrder
+
+
+def make_saved_order(order_id: str, status: types.OrderStatuses = types.OrderStatuses.COMPLETED) -> SavedOrder:
+    return SavedOrder(order_id, f"Лот {order_id}", 10.0, "Buyer", 1, status)
+
+
+def test_max_size_evicts_oldest():
+    store = StateStore(max_size=3)
+    for i in range(5):
+        store[i] = i
+    assert list(store.keys()) == [2, 3, 4]
+    assert store.evicted == 2
+
+
+def test_move_on_update():
+    lru = StateStore(max_size=2)
+    fifo = StateStore(max_size=2, move_on_update=False)
+    for store in (lru, fifo):
+        store["a"], store["b"] = 1, 2
+        store["a"] = 3
+        store["c"] = 4
+    assert list(lru.keys()) == ["a", "c"]
+    assert list(fifo.keys()) == ["b", "c"]
+
+
+def test_can_evict_keeps_outstanding_orders():
+    store = StateStore(max_size=2, can_evict=lambda i: i.status != types.OrderStatuses.OUTSTANDING)
+    store["A"] = make_saved_order("A", types.OrderStatuses.OUTSTANDING)
+    store["B"] = make_saved_order("B")
+    store["C"] = make_saved_order("C")
+    assert list(store.keys()) == ["A", "C"]
+
+
+def test_ttl(monkeypatch):
+    store = StateStore(ttl=60)
+    for order_id in ("A", "B", "C"):
+        store[order_id] = make_saved_order(order_id)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    store.touch("B")
+    assert store.evict() == 2
+    assert list(store.keys()) == ["B"]
+
+
+def test_ttl_keeps_newest_entry(monkeypatch):
+    store = StateStore(ttl=60)
+    store["A"] = make_saved_order("A")
+    store["B"] = make_saved_order("B")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert store.evict() == 1
+    assert list(store.keys()) == ["B"]
@@ -14,7 +14,7 @@ from tg_bot import utils, keyboards, CBT, MENU_CFG
 from telebot.types import InlineKeyboardButton as Button
 from telebot import types
 
-from Utils import cardinal_tools
+from Utils import cardinal_tools, products as products_store
 
 import itertools
 import random
@@ -258,8 +258,12 @@ $product""")
                                   "\n<code>$username</code> - никнейм написавшего пользователя."
                                   "\n<code>$product</code> - товар(-ы), полученный(-е) из товарного файла. "
                                   "Если товарный файл не привязан - не будет подменяться."
+                                  "\n<code>$product_amount</code> - кол-во выданных товаров. "
+                                  "Если товарный файл не привязан - не будет подменяться."
                                   "\n<code>$order_desc</code> - краткое описание заказа (лот, кол-во, сервер и т.д.)."
-                                  "\n<code>$order_id</code> - ID заказа.",
+                                  "\n<code>$order_id</code> - ID заказа."
+                                  "\n<code>$order_price</code> - сумма заказа."
+                                  "\n<code>$buyer_id</code> - ID покупателя.",
                                   parse_mode="HTML", reply_markup=keyboards.CLEAR_STATE_BTN)
         tg.set_user_state(c.message.chat.id, result.id, c.from_user.id, CBT.EDIT_LOT_DELIVERY_TEXT,
                           {"lot_index": lot_index, "offset": offset})
@@ -611,12 +615,8 @@ $product""")
         add_more_btn = Button("➕ Добавить еще",
                               callback_data=f"{CBT.ADD_PRODUCTS_TO_FILE}:{file_index}:{el_index}:{offset}:{prev_page}")
 
-        products_text = "\n".join(products)
-
         try:
-            with open(f"storage/products/{file_name}", "a", encoding="utf-8") as f:
-                f.write("\n")
-                f.write(products_text)
+            cardinal_tools.add_products(f"storage/products/{file_name}", products)
         except:
             logger.debug("------TRACEBACK------", exc_info=True)
             keyboard = types.InlineKeyboardMarkup().row(back_btn, try_again_btn)
@@ -648,6 +648,8 @@ $product""")
             .add(types.InlineKeyboardButton("◀️ Назад",
                                             callback_data=f"{CBT.EDIT_PRODUCTS_FILE}:{file_index}:{offset}"))
 
+        # Удаляем из файла уже выданные товары, чтобы отправить только оставшиеся.
+        products_store.get_store(f"storage/products/{file_name}").compact()
         with open(f"storage/products/{file_name}", "r", encoding="utf-8") as f:
             data = f.read().strip()
             if not data:
@@ -705,6 +707,7 @@ $product""")
 
         try:
             os.remove(f"storage/products/{file_name}")
+            products_store.forget(f"storage/products/{file_name}")
 
             logger.info(f"Пользователь $MAGENTA@{c.from_user.username} (id: {c.from_user.id})$RESET удалил "
                         f"файл с товарами $YELLOWstorage/products/{file_name}$RESET.")
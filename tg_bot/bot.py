@@ -68,6 +68,8 @@ class TGBot:
             "logs": "получить лог-файл",
             "del_logs": "удалить старые лог-файлы",
             "sys": "информация о нагрузке на систему",
+            "metrics": "метрики запросов, хэндлеров и очередей",
+            "traces": "задержки обработки заказов (по этапам)",
             "restart": "перезагрузить бота",
             "power_off": "выключить бота"
         }
@@ -448,6 +450,26 @@ class TGBot:
         run_time = current_time - self.cardinal.start_time
 
         ram = psutil.virtual_memory()
+        state = self.cardinal.runner.memory_report() if self.cardinal.runner else None
+        state_text = "" if state is None else f"""
+    Состояние чатов:  <code>{state['saved_messages']['entries']} шт. / {state['saved_messages']['bytes'] // 1024} KB</code>
+    Состояние заказов:  <code>{state['saved_orders']['entries']} шт. / {state['saved_orders']['bytes'] // 1024} KB</code>"""
+        if self.cardinal.dispatcher is not None:
+            d = self.cardinal.dispatcher.stats()
+            state_text += f"""
+    Очередь хэндлеров:  <code>{d['pending']} (потоков: {d['workers']}, зависло: {d['stuck']})</code>
+    Макс. ожидание в очереди:  <code>{round(d['max_queue_wait'], 2)} с</code>"""
+        if self.cardinal.runner.poll_interval is not None:
+            state_text += f"""
+    Интервал опроса FunPay:  <code>{round(self.cardinal.runner.poll_interval, 2)} с</code>"""
+        q = self.cardinal.message_queue.stats()
+        state_text += f"""
+    Очередь сообщений FunPay:  <code>{q['pending']} (отправлено: {q['sent']}, ошибок: {q['failed']}, 429: {q['throttled']})</code>"""
+        r = self.cardinal.raise_scheduler.stats()
+        if r["raises"]:
+            state_text += f"""
+    Поднятие лотов:  <code>{r['raises']} запр. по {r['games']} играм</code>
+    Опоздание поднятия:  <code>ср. {round(r['avg_lateness'], 2)} с / макс. {round(r['max_lateness'], 2)} с</code>"""
         cpu_usage = "\n".join(
             f"    CPU {i}:  <code>{l}%</code>" for i, l in enumerate(psutil.cpu_percent(percpu=True)))
         self.bot.send_message(msg.chat.id, f"""<b><u>Сводка данных</u></b>
@@ -460,17 +482,55 @@ class TGBot:
     Всего:  <code>{ram.total // 1048576} MB</code>
     Использовано:  <code>{ram.used // 1048576} MB</code>
     Свободно:  <code>{ram.free // 1048576} MB</code>
-    Используется ботом:  <code>{psutil.Process().memory_info().rss // 1048576} MB</code>
+    Используется ботом:  <code>{psutil.Process().memory_info().rss // 1048576} MB</code>{state_text}
 
 <b>Бот:</b>
     Аптайм:  <code>{cardinal_tools.time_to_str(run_time)}</code>
     Чат:  <code>{msg.chat.id}</code>""", parse_mode="HTML")
 
+    def send_metrics(self, msg: types.Message):
+        """
+        Отправляет краткую сводку метрик (длинная сводка разбивается на несколько сообщений).
+        """
+        lines = self.cardinal.metrics.summary()
+        if not lines:
+            self.bot.send_message(msg.chat.id, "Метрик пока нет.")
+            return
+        header = "<b><u>Метрики</u></b>\n"
+        if self.cardinal.metrics_server is not None:
+            header += f"Prometheus: <code>http://{self.cardinal.metrics_server.host}:" \
+                      f"{self.cardinal.metrics_server.port}/metrics</code>\n"
+        text = header
+        for line in lines:
+            line = f"\n<code>{utils.escape(line)}</code>"
+            if len(text) + len(line) > 4000:
+                self.bot.send_message(msg.chat.id, text, parse_mode="HTML")
+                text = ""
+            text += line
+        self.bot.send_message(msg.chat.id, text, parse_mode="HTML")
+
+    def send_order_traces(self, msg: types.Message):
+        """
+        Отправляет перцентили длительности этапов обработки заказов и JSON файл с трассировками.
+        """
+        summary = self.cardinal.tracer.summary()
+        if not summary:
+            self.bot.send_message(msg.chat.id, "Трассировок заказов пока нет.")
+            return
+        lines = "\n".join(f"    {name}:  <code>p50 {round(i['p50'], 2)} / p90 {round(i['p90'], 2)} / "
+                          f"p99 {round(i['p99'], 2)} / max {round(i['max'], 2)} с ({i['count']} шт.)</code>"
+                          for name, i in summary.items())
+        self.bot.send_message(msg.chat.id, f"<b><u>Задержки обработки заказов</u></b>\n\n{lines}", parse_mode="HTML")
+        path = self.cardinal.export_order_traces()
+        with open(path, "r", encoding="utf-8") as f:
+            self.bot.send_document(msg.chat.id, f)
+
     def restart_cardinal(self, msg: types.Message):
         """
         Перезапускает кардинал.
         """
         self.bot.send_message(msg.chat.id, "Перезагружаюсь...")
+        self.cardinal.runner.flush_state()
         cardinal_tools.restart_program()
 
     def ask_power_off(self, msg: types.Message):
@@ -505,6 +565,7 @@ class TGBot:
         if state == 6:
             self.bot.edit_message_text("Ладно, ладно, выключаюсь...", call.message.chat.id, call.message.id)
             self.bot.answer_callback_query(call.id)
+            self.cardinal.runner.flush_state()
             cardinal_tools.shut_down()
             return
 
@@ -760,6 +821,8 @@ ID чата: <code>{call.message.chat.id}</code>""",
         self.msg_handler(self.send_logs, commands=["logs"])
         self.msg_handler(self.del_logs, commands=["del_logs"])
         self.msg_handler(self.send_system_info, commands=["sys"])
+        self.msg_handler(self.send_metrics, commands=["metrics"])
+        self.msg_handler(self.send_order_traces, commands=["traces"])
         self.msg_handler(self.restart_cardinal, commands=["restart"])
         self.msg_handler(self.ask_power_off, commands=["power_off"])
 
@@ -8,7 +8,7 @@ if TYPE_CHECKING:
     from cardinal import Cardinal
     from tg_bot.bot import TGBot
 
-from Utils import config_loader as cfg_loader, exceptions as excs, cardinal_tools
+from Utils import config_loader as cfg_loader, exceptions as excs, products as products_store
 from telebot.types import InlineKeyboardButton as Button
 from tg_bot import utils, keyboards, CBT
 from telebot import types
@@ -90,12 +90,14 @@ def init_uploader(cardinal: Cardinal):
         tg.clear_user_state(m.chat.id, m.from_user.id, True)
         if not check_file(tg, m):
             return
-        if not download_file(tg, m, m.document.file_name,
-                             custom_path=f"storage/products"):
+        # Файл скачивается во временный файл и атомарно подменяет файл с товарами под блокировкой хранилища,
+        # чтобы не пересечься с выдачей товаров из этого же файла.
+        if not download_file(tg, m, "temp_products.txt"):
             return
 
         try:
-            products_count = cardinal_tools.count_products(f"storage/products/{utils.escape(m.document.file_name)}")
+            store = products_store.get_store(f"storage/products/{m.document.file_name}")
+            products_count = store.import_file("storage/cache/temp_products.txt")
         except:
             bot.send_message(m.chat.id,
                              "❌ Произошла ошибка при подсчете товаров. Подробнее в файле "
@@ -152,12 +154,15 @@ def init_uploader(cardinal: Cardinal):
             logger.debug("------TRACEBACK------", exc_info=True)
             return
 
-        cardinal.save_config(new_config, "configs/_main.cfg")
+        restart_required = cardinal.apply_main_config(new_config)
+        cardinal.save_config(cardinal.MAIN_CFG, "configs/_main.cfg")
         logger.info(f"Пользователь $MAGENTA@{m.from_user.username} (id: {m.from_user.id})$RESET "
-                    f"загрузил в бота основной конфиг.")
-        bot.send_message(m.chat.id, "✅ Основной конфиг успешно загружен. \n"
-                                    "Необходимо перезагрузить бота, что бы применить изменения. \n"
-                                    "Любое изменение основного конфига через переключатели на ПУ отменит все изменения.")
+                    f"загрузил в бота и установил основной конфиг.")
+        text = "✅ Основной конфиг успешно применен."
+        if restart_required:
+            text += (f"\nИзменения параметров <code>{utils.escape(', '.join(restart_required))}</code> "
+                     f"вступят в силу только после перезагрузки бота.")
+        bot.send_message(m.chat.id, text, parse_mode="HTML")
 
     def act_upload_auto_response_config(c: types.CallbackQuery):
         result = bot.send_message(c.message.chat.id, "Отправьте мне конфиг автоответчика.",
@@ -196,7 +201,7 @@ def init_uploader(cardinal: Cardinal):
             logger.debug("------TRACEBACK------", exc_info=True)
             return
 
-        cardinal.RAW_AR_CFG, cardinal.AR_CFG = raw_new_config, new_config
+        cardinal.apply_auto_response_config(new_config, raw_new_config)
         cardinal.save_config(cardinal.RAW_AR_CFG, "configs/auto_response.cfg")
 
         logger.info(f"Пользователь $MAGENTA@{m.from_user.username} (id: {m.from_user.id})$RESET "
@@ -239,7 +244,7 @@ def init_uploader(cardinal: Cardinal):
             logger.debug("------TRACEBACK------", exc_info=True)
             return
 
-        cardinal.AD_CFG = new_config
+        cardinal.apply_auto_delivery_config(new_config)
         cardinal.save_config(cardinal.AD_CFG, "configs/auto_delivery.cfg")
 
         logger.info(f"Пользователь $MAGENTA@{m.from_user.username} (id: {m.from_user.id})$RESET "